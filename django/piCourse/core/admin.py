@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Subject, TutorProfile, StudentProfile, LessonRequest
+from django.utils import timezone
+from .models import User, Subject, TutorProfile, StudentProfile, LessonRequest, Review, Task
+from . import export, reviews
+from .renderers import CSVRenderer, NDJSONRenderer
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -24,15 +27,21 @@ class SubjectAdmin(admin.ModelAdmin):
 
 @admin.register(TutorProfile)
 class TutorProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'hourly_rate', 'rating', 'get_subjects')
+    list_display = ('user', 'hourly_rate', 'rating', 'rating_count', 'completed_lessons', 'get_subjects')
     list_filter = ('rating', 'hourly_rate')
     search_fields = ('user__username', 'user__email', 'bio')
     ordering = ('-rating',)
+    actions = ['recompute_totals']
     
     def get_subjects(self, obj):
         return ", ".join([subject.name for subject in obj.subjects.all()])
     get_subjects.short_description = 'Subjects'
 
+    @admin.action(description='Recompute rating and lesson totals (background task)')
+    def recompute_totals(self, request, queryset):
+        reviews.recompute_totals.enqueue(tutor_ids=list(queryset.values_list('user_id', flat=True)))
+        self.message_user(request, 'Totals will be recomputed by the task worker.')
+
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'grade_level')
@@ -43,10 +52,12 @@ class StudentProfileAdmin(admin.ModelAdmin):
 @admin.register(LessonRequest)
 class LessonRequestAdmin(admin.ModelAdmin):
     list_display = ('student', 'tutor', 'subject', 'start_time', 'duration_minutes', 'status', 'created_at')
-    list_filter = ('status', 'subject', 'created_at')
+    list_filter = ('status', 'subject', 'start_time', 'created_at')
     search_fields = ('student__username', 'tutor__username', 'subject__name')
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
+    # "Tümünü seç" ile filtrelenmiş tüm kayıtlar parça parça akıtılır (core.export)
+    actions = ['export_as_csv', 'export_as_ndjson']
     
     fieldsets = (
         ('Request Details', {
@@ -57,4 +68,37 @@ class LessonRequestAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Export selected lesson requests as CSV')
+    def export_as_csv(self, request, queryset):
+        return export.streaming_response(queryset.order_by('start_time', 'id'), CSVRenderer(), request=request)
+
+    @admin.action(description='Export selected lesson requests as NDJSON')
+    def export_as_ndjson(self, request, queryset):
+        return export.streaming_response(queryset.order_by('start_time', 'id'), NDJSONRenderer(), request=request)
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ('lesson_request', 'tutor', 'student', 'rating', 'created_at')
+    list_filter = ('rating', 'created_at')
+    search_fields = ('tutor__username', 'student__username', 'comment')
+    ordering = ('-created_at',)
+    # Puan değişikliği eğitmen toplamlarına yansımaz (core.reviews); yalnızca yorum düzenlenebilir
+    readonly_fields = ('lesson_request', 'tutor', 'student', 'rating', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'worker', 'created_at')
+    list_filter = ('status', 'name')
+    ordering = ('run_at',)
+    readonly_fields = ('name', 'payload', 'attempts', 'worker', 'last_error', 'created_at')
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
 
+    @admin.action(description='Retry selected tasks now')
+    def retry(self, request, queryset):
+        queryset.update(status='queued', attempts=0, run_at=timezone.now())
@@ -0,0 +1,175 @@
+"""
+Async (ASGI) versions of the read-heavy catalogue endpoints and ``me`` GET.
+
+Under ASGI these views handle claim-carrying JWTs (core.auth) and catalogue
+cache hits (core.caching) on the event loop, and queries go through
+Django's async ORM. Throttle checks (a blocking SQLite or Redis call in
+core.throttling) and filter backends that validate against the database
+run via sync_to_async.
+
+The DRF classes in core.views remain the single source of querysets,
+serializers, filters, pagination, authentication and throttling;
+``AsyncAPIView`` only re-implements the request cycle around them.
+core.urls switches to these views when settings.ASYNC_VIEWS is on
+(``PICOURSE_ASYNC_VIEWS=1``). It is off by default: in bench_asgi's
+measurements these views still serve fewer requests per second under ASGI
+than the sync views under WSGI.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+from . import sparse, views
+from .auth import aclaimed_profile
+from .caching import AsyncCatalogueCacheMixin
+from .pagination import apaginate_limit_offset
+
+
+async def aauthenticate(request):
+    """Request._authenticate with awaitable authenticators."""
+    for authenticator in request.authenticators:
+        try:
+            if hasattr(authenticator, 'aauthenticate'):
+                user_auth = await authenticator.aauthenticate(request)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+        if user_auth is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth
+            return
+    request._not_authenticated()
+
+
+async def ainitial(view, request, *args, **kwargs):
+    """APIView.initial with authentication awaited."""
+    view.format_kwarg = view.get_format_suffix(**kwargs)
+    request.accepted_renderer, request.accepted_media_type = view.perform_content_negotiation(request)
+    request.version, request.versioning_scheme = view.determine_version(request, *args, **kwargs)
+    await aauthenticate(request)
+    view.check_permissions(request)
+    # Throttle deposu bloklayan bir SQLite/Redis çağrısıdır; olay döngüsünü (WebSocket'ler dahil) durdurmasın
+    await sync_to_async(view.check_throttles)(request)
+
+
+def _plain(response):
+    # DRF Response'u burada render edilir; aksi halde Django'nun async handler'ı
+    # render() için sync_to_async ile iş parçacığına geçer.
+    response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for name, value in response.items():
+        plain[name] = value
+    return plain
+
+
+class AsyncAPIView(View):
+    """Runs the DRF request cycle of ``api_view_class`` with an async handler."""
+    api_view_class = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # APIView.as_view gibi: JWT kullanıldığı için CSRF kontrolü yok
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def get(self, request, *args, **kwargs):
+        return await self.run(self.aget, request, *args, **kwargs)
+
+    async def run(self, handler, request, *args, **kwargs):
+        view = self.api_view_class()
+        view.args, view.kwargs = args, kwargs
+        view.headers = view.default_response_headers
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+        try:
+            await ainitial(view, drf_request, *args, **kwargs)
+            response = await handler(view, drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return _plain(view.finalize_response(drf_request, response, *args, **kwargs))
+
+    async def aget(self, view, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncListMixin:
+    # Bu parametreler verildiğinde filtre backend'leri veritabanına gider
+    sync_filter_params = ()
+
+    async def aget(self, view, request, *args, **kwargs):
+        queryset = view.get_queryset()
+        if any(param in request.query_params for param in self.sync_filter_params):
+            queryset = await sync_to_async(view.filter_queryset)(queryset)
+        else:
+            queryset = view.filter_queryset(queryset)
+
+        # core.fastpath: sayfa model nesnesi yerine .values() satırlarından kurulur
+        builder = view.get_row_builder() if hasattr(view, 'get_row_builder') else None
+        if builder is not None:
+            queryset = view.project_queryset(builder, queryset)
+
+        async def render(objects):
+            if builder is not None:
+                return await builder.arender(objects)
+            return view.get_serializer(objects, many=True).data
+
+        paginator = view.paginator
+        if paginator is None:
+            return Response(await render([obj async for obj in queryset]))
+        if hasattr(paginator, 'apaginate_queryset'):
+            page = await paginator.apaginate_queryset(queryset, request, view=view)
+        else:
+            page = await apaginate_limit_offset(paginator, queryset, request)
+        if page is None:
+            return Response(await render([obj async for obj in queryset]))
+        return paginator.get_paginated_response(await render(page))
+
+
+class SubjectListView(AsyncCatalogueCacheMixin, AsyncListMixin, AsyncAPIView):
+    api_view_class = views.SubjectListView
+
+
+class TutorListView(AsyncCatalogueCacheMixin, AsyncListMixin, AsyncAPIView):
+    api_view_class = views.TutorListView
+    # SubjectIndexFilter konu bitlerini sorgular; arama (TutorSearchFilter) sorgunun içinde çözülür
+    sync_filter_params = ('subject', 'subject_all', 'tutor_profile__subjects')
+
+
+class AsyncRetrieveMixin:
+    async def aget(self, view, request, *args, **kwargs):
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        # Serializer konuları okur; async bağlamda tembel sorgu yapılamayacağı için önceden yüklenir
+        # (?fields=/?expand= verilmişse gereken ön yüklemeleri core.sparse zaten ekledi)
+        queryset = view.filter_queryset(view.get_queryset())
+        if not sparse.is_requested(request):
+            queryset = queryset.prefetch_related('tutor_profile__subjects')
+        obj = await queryset.filter(**{view.lookup_field: kwargs[lookup_url_kwarg]}).afirst()
+        if obj is None:
+            raise Http404
+        view.check_object_permissions(request, obj)
+        return Response(view.get_serializer(obj).data)
+
+
+class TutorDetailView(AsyncCatalogueCacheMixin, AsyncRetrieveMixin, AsyncAPIView):
+    api_view_class = views.TutorDetailView
+
+
+class MeView(AsyncAPIView):
+    api_view_class = views.me.cls
+
+    async def aget(self, view, request, *args, **kwargs):
+        profile = await aclaimed_profile(request.user)
+        if profile is not None:
+            return Response(views.me_payload(profile.user))
+        # Claim'siz token ya da profilsiz kullanıcı: kullanıcı satırı ve profil sync yoldan
+        return Response(await sync_to_async(views.me_payload)(request.user))
+
+    async def patch(self, request, *args, **kwargs):
+        return await sync_to_async(views.me)(request, *args, **kwargs)
+
+
+me = MeView.as_view()
@@ -0,0 +1,171 @@
+"""
+Authentication for the API.
+
+``EmailOrUsernameBackend`` resolves the identifier against username and
+email in one indexed query and checks the password exactly once, so an
+email login no longer pays for a failed username attempt first.
+
+``PBKDF2PasswordHasher`` reads its work factor from
+``settings.PASSWORD_HASHING`` and only asks Django to re-hash stored
+passwords on login when the upgrade policy allows it.
+
+``RefreshToken`` embeds ``role`` and ``profile_id`` claims, and
+``ClaimsJWTAuthentication`` turns such tokens into a ``User`` whose other
+fields are deferred: ``id``/``role`` checks need no query, and the first
+access to any other field loads the whole row once. Tokens without the
+claims fall back to the regular per-request lookup.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as BasePBKDF2PasswordHasher
+from django.db import router
+from django.db.models import Q
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .models import StudentProfile, TutorProfile
+
+DEFAULTS = {
+    'ITERATIONS': None,  # None: Django'nun varsayılanı
+    # 'on_login': daha düşük iterasyonla saklanan parolalar girişte yeniden hash'lenir
+    # 'never': saklanan hash'ler olduğu gibi bırakılır (girişte ikinci hash + UPDATE yok)
+    'UPGRADE': 'on_login',
+}
+
+
+def get_hashing_settings():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class PBKDF2PasswordHasher(BasePBKDF2PasswordHasher):
+    """Django's PBKDF2-SHA256 hasher with a configurable iteration/upgrade policy."""
+
+    @property
+    def iterations(self):
+        return get_hashing_settings()['ITERATIONS'] or BasePBKDF2PasswordHasher.iterations
+
+    def must_update(self, encoded):
+        if get_hashing_settings()['UPGRADE'] == 'never':
+            return False
+        return super().must_update(encoded)
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        identifier = email or username or kwargs.get(get_user_model().USERNAME_FIELD)
+        if not identifier or password is None:
+            return None
+
+        UserModel = get_user_model()
+        # username ve email ayrı indekslerden okunur; eşleşme hem username hem de
+        # başka bir kullanıcının email'i olabileceği için username önceliklidir.
+        # Profiller aynı sorguda gelir; RefreshToken.for_user profile_id için tekrar sorgulamaz.
+        candidates = list(
+            UserModel._default_manager.filter(Q(username=identifier) | Q(email=identifier))
+            .select_related('tutor_profile', 'student_profile')[:2]
+        )
+        if not candidates:
+            # Var olmayan kullanıcı için de bir kez hash'lenir (zamanlama farkı oluşmasın)
+            UserModel().set_password(password)
+            return None
+        user = next((c for c in candidates if c.username == identifier), candidates[0])
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+def profile_for(user):
+    """The user's own profile for its role, or None."""
+    name = {'tutor': 'tutor_profile', 'student': 'student_profile'}.get(user.role)
+    return getattr(user, name, None) if name else None
+
+
+class RefreshToken(BaseRefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        profile = profile_for(user)
+        token['role'] = user.role
+        token['profile_id'] = profile.pk if profile is not None else None
+        return token
+
+
+def token_user(validated_token):
+    """
+    A ``User`` built from the token claims alone. Only ``id`` and ``role``
+    are loaded; User.refresh_from_db loads the remaining fields together on
+    first access.
+    """
+    UserModel = get_user_model()
+    loaded = {jwt_settings.USER_ID_FIELD: validated_token[jwt_settings.USER_ID_CLAIM], 'role': validated_token['role']}
+    fields = [f.attname for f in UserModel._meta.concrete_fields if f.attname in loaded]
+    user = UserModel.from_db(router.db_for_read(UserModel), fields, [loaded[name] for name in fields])
+    user.token_claims = validated_token
+    return user
+
+
+def _claimed_profile_queryset(user):
+    claims = getattr(user, 'token_claims', None)
+    if not claims or claims.get('profile_id') is None:
+        return None
+    if user.role == 'tutor':
+        qs = TutorProfile.objects.prefetch_related('subjects')
+    elif user.role == 'student':
+        qs = StudentProfile.objects.all()
+    else:
+        return None
+    return qs.select_related('user').filter(pk=claims['profile_id'], user_id=user.pk)
+
+
+def claimed_profile(user):
+    """
+    Load the profile named by the token's ``profile_id`` claim together with
+    its user row, or None when the request was not authenticated by claims.
+    """
+    qs = _claimed_profile_queryset(user)
+    return qs.first() if qs is not None else None
+
+
+async def aclaimed_profile(user):
+    qs = _claimed_profile_queryset(user)
+    return await qs.afirst() if qs is not None else None
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips the User query for tokens carrying a
+    ``role`` claim. Such tokens are trusted until they expire (like
+    simplejwt's stateless mode): deactivating a user or changing its role
+    takes effect when the access token expires, not immediately.
+    """
+
+    def get_user(self, validated_token):
+        if not self.has_claims(validated_token):
+            return super().get_user(validated_token)
+        return token_user(validated_token)
+
+    @staticmethod
+    def has_claims(validated_token):
+        return 'role' in validated_token and jwt_settings.USER_ID_CLAIM in validated_token
+
+    async def aauthenticate(self, request):
+        """authenticate() for core.async_views: only claim-less tokens reach the database."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if self.has_claims(validated_token):
+            return token_user(validated_token), validated_token
+        return await sync_to_async(super().get_user)(validated_token), validated_token
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = 'core.auth.ClaimsJWTAuthentication'
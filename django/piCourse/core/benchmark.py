@@ -0,0 +1,288 @@
+"""
+Load drivers for the API.
+
+``run_wsgi`` replays requests against Django's WSGI handler from a pool of
+threads (one worker thread per concurrent client, like a threaded WSGI
+server); ``run_asgi`` replays them against the ASGI handler as concurrent
+tasks on a single event loop. Both skip the network and HTTP parsing, so
+the numbers isolate the framework and application cost. ``run_http``
+sends the same requests over real sockets, to ``serve_wsgi``'s local
+server or to any running instance. ``summarize`` turns the recorded
+latencies into throughput and p50/p95/p99; ``query_stats`` and
+``scrape_query_stats`` read queries per request from core.metrics.
+"""
+import asyncio
+import http.client
+import io
+import json
+import math
+import re
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import count
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import metrics
+
+# Bağlantı hatası gibi yanıt alınamayan istekler bu durum koduyla sayılır
+NO_RESPONSE = 599
+
+
+class Target:
+    """
+    One endpoint to replay: ``method`` ``url`` with optional extra headers
+    and a JSON ``body``, either a dict or a callable building one from the
+    request's sequence number (e.g. a unique lesson time per request).
+    """
+
+    def __init__(self, name, url, headers=None, unique=False, method='GET', body=None, view=None):
+        self.name = name
+        self.url = url
+        self.headers = headers or {}
+        # Her isteğe farklı bir sorgu parametresi eklenir: önbellek ıskası ölçülür
+        self.unique = unique
+        self.counter = count()
+        self.method = method
+        self.body = body
+        self.sequence = count()
+        # core.metrics'teki görünüm adı (url_name); sorgu sayıları bu adla okunur
+        self.view = view
+
+    def split(self):
+        parts = urlsplit(self.url)
+        query = parts.query
+        if self.unique:
+            query = '&'.join(filter(None, [query, f'_bench={next(self.counter)}']))
+        return parts.path, query
+
+    def payload(self):
+        if self.body is None:
+            return b''
+        body = self.body(next(self.sequence)) if callable(self.body) else self.body
+        return json.dumps(body).encode()
+
+    def request_headers(self):
+        if self.body is None:
+            return self.headers
+        return {'Content-Type': 'application/json', **self.headers}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, elapsed):
+    ordered = sorted(latencies)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(1 for status in statuses if status >= 400),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+    }
+
+
+def unthrottle():
+    """Raise every DRF throttle rate out of reach; the throttle store still runs on each request."""
+    for scope in SimpleRateThrottle.THROTTLE_RATES:
+        SimpleRateThrottle.THROTTLE_RATES[scope] = '1000000000/hour'
+
+
+def query_stats(view):
+    """Mean SQL queries per request core.metrics recorded for ``view`` in this process."""
+    hist = metrics.registry.queries.get(view)
+    return round(hist.sum / hist.count, 2) if hist and hist.count else None
+
+
+QUERY_SERIES = re.compile(r'^picourse_db_queries_(sum|count)\{view="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+
+def scrape_query_stats(base_url):
+    """``{view: (query_sum, request_count)}`` from a server's /api/internal/metrics/."""
+    with urllib.request.urlopen(base_url.rstrip('/') + '/api/internal/metrics/', timeout=10) as response:
+        text = response.read().decode()
+    stats = {}
+    for kind, view, value in QUERY_SERIES.findall(text):
+        query_sum, requests = stats.get(view, (0.0, 0))
+        if kind == 'sum':
+            query_sum = float(value)
+        else:
+            requests = int(float(value))
+        stats[view] = (query_sum, requests)
+    return stats
+
+
+def _wsgi_environ(target):
+    path, query = target.split()
+    body = target.payload()
+    environ = {
+        'REQUEST_METHOD': target.method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_LENGTH': str(len(body)),
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in target.request_headers().items():
+        key = name.upper().replace('-', '_')
+        environ[key if key == 'CONTENT_TYPE' else 'HTTP_' + key] = value
+    return environ
+
+
+def run_wsgi(application, target, total, concurrency):
+    latencies, statuses = [], []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    def one(_):
+        environ = _wsgi_environ(target)
+        started = time.perf_counter()
+        body = application(environ, start_response)
+        for _chunk in body:
+            pass
+        if hasattr(body, 'close'):
+            body.close()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def _asgi_request(application, target, statuses):
+    path, query = target.split()
+    body = target.payload()
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': target.method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')] + [
+            (name.lower().encode(), value.encode()) for name, value in target.request_headers().items()
+        ],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    done = asyncio.Event()
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # Yanıt bitene kadar bağlantı açık kalır
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            done.set()
+
+    await application(scope, receive, send)
+
+
+async def _run_asgi(application, target, total, concurrency):
+    latencies, statuses = [], []
+    remaining = count()
+
+    async def client():
+        while next(remaining) < total:
+            started = time.perf_counter()
+            await _asgi_request(application, target, statuses)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def run_asgi(application, target, total, concurrency):
+    return asyncio.run(_run_asgi(application, target, total, concurrency))
+
+
+def run_http(base_url, target, total, concurrency):
+    """Replay over HTTP; every client thread keeps its own connection alive where the server allows."""
+    parts = urlsplit(base_url)
+    local = threading.local()
+    latencies, statuses = [], []
+
+    def one(_):
+        path, query = target.split()
+        body = target.payload()
+        started = time.perf_counter()
+        try:
+            conn = getattr(local, 'conn', None)
+            if conn is None:
+                conn = local.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            conn.request(target.method, path + (f'?{query}' if query else ''), body=body or None,
+                         headers=target.request_headers())
+            response = conn.getresponse()
+            response.read()
+            statuses.append(response.status)
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            statuses.append(NO_RESPONSE)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_wsgi(application, host='127.0.0.1'):
+    """Serve ``application`` on an ephemeral local port for the duration of the block; yields the base URL."""
+    server = make_server(host, 0, application, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
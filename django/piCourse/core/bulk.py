@@ -0,0 +1,248 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import notifications, realtime, reviews, scheduling
+from .models import LessonRequest, Subject, TutorProfile, User
+
+BULK_MAX_ITEMS = 100
+
+
+class BulkCreateItemSerializer(serializers.Serializer):
+    """Field-level checks only; cross-row rules are checked set-wise below."""
+    tutor = serializers.IntegerField()
+    subject = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    duration_minutes = serializers.IntegerField(min_value=1, max_value=scheduling.MAX_LESSON_MINUTES)
+    note = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class BulkStatusItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=LessonRequest.STATUS_CHOICES)
+
+
+class Calendar:
+    """
+    Per-tutor sorted (start, end) intervals used to check a whole batch
+    against existing bookings and against itself without extra queries.
+    """
+
+    def __init__(self):
+        self.intervals = defaultdict(list)
+
+    @classmethod
+    def load(cls, tutor_ids, start, end, exclude_ids=()):
+        calendar = cls()
+        rows = LessonRequest.objects.filter(
+            tutor_id__in=tutor_ids,
+            start_time__gt=start - timedelta(minutes=scheduling.MAX_LESSON_MINUTES),
+            start_time__lt=end,
+            end_time__gt=start,
+            status__in=scheduling.BLOCKING_STATUSES,
+        ).exclude(pk__in=exclude_ids).values_list('tutor_id', 'start_time', 'end_time')
+        for tutor_id, booked_start, booked_end in rows.iterator():
+            calendar.add(tutor_id, booked_start, booked_end)
+        return calendar
+
+    def add(self, tutor_id, start, end):
+        insort(self.intervals[tutor_id], (start, end))
+
+    def is_free(self, tutor_id, start, end):
+        intervals = self.intervals[tutor_id]
+        # Süre üst sınırı sayesinde yalnızca start - MAX_LESSON_MINUTES sonrası başlayanlara bakılır
+        i = bisect_left(intervals, (start - timedelta(minutes=scheduling.MAX_LESSON_MINUTES),))
+        while i < len(intervals) and intervals[i][0] < end:
+            if intervals[i][1] > start:
+                return False
+            i += 1
+        return True
+
+
+def validate_batch(items):
+    if not isinstance(items, list) or not items:
+        raise serializers.ValidationError('Expected a non-empty list of items.')
+    if len(items) > BULK_MAX_ITEMS:
+        raise serializers.ValidationError(f'At most {BULK_MAX_ITEMS} items per request.')
+
+
+def _parse(items, serializer_class, results):
+    valid = []
+    for index, raw in enumerate(items):
+        serializer = serializer_class(data=raw)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'ok': False, 'errors': serializer.errors}
+    return valid
+
+
+def bulk_create_lesson_requests(student, items):
+    """
+    Create lesson requests for ``student``. Every row is validated, valid
+    rows are inserted with one bulk_create in a single transaction and a
+    result is returned per input item, in input order.
+    """
+    validate_batch(items)
+    results = [None] * len(items)
+    valid = _parse(items, BulkCreateItemSerializer, results)
+    if not valid:
+        return results
+
+    tutor_ids = {data['tutor'] for _, data in valid}
+    subject_ids = {data['subject'] for _, data in valid}
+    teaches = set(
+        TutorProfile.subjects.through.objects.filter(
+            tutorprofile__user_id__in=tutor_ids,
+            tutorprofile__user__role='tutor',
+            subject_id__in=subject_ids,
+        ).values_list('tutorprofile__user_id', 'subject_id')
+    )
+
+    unmatched = [(index, data) for index, data in valid if (data['tutor'], data['subject']) not in teaches]
+    if unmatched:
+        # Hata yolu: hatalı alanı belirlemek için küme bazlı iki ek sorgu
+        known_tutors = set(User.objects.filter(
+            id__in={data['tutor'] for _, data in unmatched}, role='tutor'
+        ).values_list('id', flat=True))
+        known_subjects = set(Subject.objects.filter(
+            id__in={data['subject'] for _, data in unmatched}
+        ).values_list('id', flat=True))
+        for index, data in unmatched:
+            if data['tutor'] not in known_tutors:
+                errors = {'tutor': ['Geçersiz eğitmen seçildi.']}
+            elif data['subject'] not in known_subjects:
+                errors = {'subject': ['Geçersiz konu seçildi.']}
+            else:
+                errors = {'subject': ['Tutor does not teach this subject']}
+            results[index] = {'index': index, 'ok': False, 'errors': errors}
+        valid = [(index, data) for index, data in valid if results[index] is None]
+        if not valid:
+            return results
+
+    lessons = []
+    with transaction.atomic():
+        tutor_ids = {data['tutor'] for _, data in valid}
+        scheduling.lock_tutors(tutor_ids)
+        pending = []
+        for index, data in valid:
+            lesson = LessonRequest(
+                student=student,
+                tutor_id=data['tutor'],
+                subject_id=data['subject'],
+                start_time=data['start_time'],
+                duration_minutes=data['duration_minutes'],
+                note=data.get('note'),
+            )
+            lesson.compute_end_time()
+            pending.append((index, lesson))
+
+        calendar = Calendar.load(
+            tutor_ids,
+            min(lesson.start_time for _, lesson in pending),
+            max(lesson.end_time for _, lesson in pending),
+        )
+        for index, lesson in pending:
+            if not calendar.is_free(lesson.tutor_id, lesson.start_time, lesson.end_time):
+                results[index] = {
+                    'index': index, 'ok': False,
+                    'errors': {'start_time': [scheduling.BookingConflict.default_detail]},
+                }
+                continue
+            calendar.add(lesson.tutor_id, lesson.start_time, lesson.end_time)
+            lessons.append((index, lesson))
+
+        if lessons:
+            LessonRequest.objects.bulk_create([lesson for _, lesson in lessons])
+            # bulk_create post_save göndermez; bildirimler tek görev olarak kuyruğa girer
+            events = [(lesson.id, None) for _, lesson in lessons]
+            notifications.lesson_events(events)
+            realtime.lesson_events(events)
+
+    for index, lesson in lessons:
+        results[index] = {'index': index, 'ok': True, 'id': lesson.id}
+    return results
+
+
+def bulk_update_status(tutor, items):
+    """
+    Apply ``{id, status}`` transitions to the tutor's own lesson requests
+    with one bulk_update. Reopening a rejected request is checked against
+    the tutor's calendar, including the other rows of the batch.
+    """
+    validate_batch(items)
+    results = [None] * len(items)
+    valid = _parse(items, BulkStatusItemSerializer, results)
+
+    seen = set()
+    for index, data in valid:
+        if data['id'] in seen:
+            results[index] = {'index': index, 'ok': False, 'errors': {'id': ['Duplicate id in batch.']}}
+        seen.add(data['id'])
+    valid = [(index, data) for index, data in valid if results[index] is None]
+    if not valid:
+        return results
+
+    updated = []
+    with transaction.atomic():
+        scheduling.lock_tutor(tutor.id)
+        lessons = LessonRequest.objects.filter(tutor=tutor, id__in=seen).only(
+            'id', 'tutor_id', 'status', 'start_time', 'end_time', 'updated_at'
+        ).in_bulk()
+
+        reopened = []
+        for index, data in valid:
+            lesson = lessons.get(data['id'])
+            if lesson is None:
+                results[index] = {'index': index, 'ok': False, 'errors': {'id': ['Not found.']}}
+            elif (data['status'] in scheduling.BLOCKING_STATUSES
+                  and lesson.status not in scheduling.BLOCKING_STATUSES):
+                reopened.append((index, lesson, data['status']))
+            else:
+                updated.append((index, lesson, data['status']))
+
+        if reopened:
+            batch_ids = [lesson.id for _, lesson, _ in updated + reopened]
+            calendar = Calendar.load(
+                [tutor.id],
+                min(lesson.start_time for _, lesson, _ in reopened),
+                max(lesson.end_time for _, lesson, _ in reopened),
+                exclude_ids=batch_ids,
+            )
+            # Toplu işlemde takvimde kalmaya devam eden satırlar da yer tutar
+            for _, lesson, new_status in updated:
+                if new_status in scheduling.BLOCKING_STATUSES:
+                    calendar.add(tutor.id, lesson.start_time, lesson.end_time)
+            for index, lesson, new_status in reopened:
+                if calendar.is_free(tutor.id, lesson.start_time, lesson.end_time):
+                    calendar.add(tutor.id, lesson.start_time, lesson.end_time)
+                    updated.append((index, lesson, new_status))
+                else:
+                    results[index] = {
+                        'index': index, 'ok': False,
+                        'errors': {'status': [scheduling.BookingConflict.default_detail]},
+                    }
+
+        now = timezone.now()
+        transitions = []
+        events = []
+        for _, lesson, new_status in updated:
+            transitions.append((tutor.id, lesson.status, tutor.id, new_status))
+            if lesson.status != new_status:
+                events.append((lesson.id, lesson.status))
+            lesson.status = new_status
+            lesson.updated_at = now
+        if updated:
+            LessonRequest.objects.bulk_update([lesson for _, lesson, _ in updated], ['status', 'updated_at'])
+            # bulk_update post_save göndermez; tamamlanan ders sayacı burada güncellenir
+            reviews.record_completed(transitions)
+            notifications.lesson_events(events)
+            realtime.lesson_events(events)
+
+    for index, lesson, _ in updated:
+        results[index] = {'index': index, 'ok': True, 'id': lesson.id, 'status': lesson.status}
+    return results
@@ -0,0 +1,145 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'KEY_PREFIX': 'catalogue',
+}
+
+
+def get_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'CATALOGUE_CACHE', {})}
+
+
+def get_cache():
+    return caches[get_cache_settings()['ALIAS']]
+
+
+def _version_key(namespace):
+    return f"{get_cache_settings()['KEY_PREFIX']}:version:{namespace}"
+
+
+def bump_version(*namespaces):
+    """
+    Invalidate every cached payload of the given namespaces. Versions are
+    timestamps, so bumping is a single blind write and doubles as the
+    Last-Modified value of the namespace. Writers bump from
+    ``transaction.on_commit``: bumped earlier, a concurrent read could
+    cache the pre-commit rows under the new version.
+    """
+    version = time.time_ns()
+    get_cache().set_many({_version_key(ns): version for ns in namespaces}, timeout=None)
+
+
+def get_versions(namespaces):
+    cache = get_cache()
+    keys = [_version_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # Sürüm yoksa (ilk istek / cache temizlendi) "şimdi" kabul edilir
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+async def _acall(cache, method, *args):
+    # LocMemCache yalnızca süreç belleğini okur: olay döngüsünde doğrudan çağrılır.
+    # Diğer backend'lerde Django'nun a* metotları (sync_to_async sarmalayıcıları) kullanılır.
+    if isinstance(cache, LocMemCache):
+        return getattr(cache, method)(*args)
+    return await getattr(cache, 'a' + method)(*args)
+
+
+async def aget_versions(namespaces):
+    cache = get_cache()
+    keys = [_version_key(ns) for ns in namespaces]
+    found = await _acall(cache, 'get_many', keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        await _acall(cache, 'set_many', missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _cache_identity(request, namespaces, versions):
+    """Payload cache key and the ETag/Last-Modified headers of a request."""
+    params = sorted(request.query_params.lists())
+    raw_key = repr((request.get_host(), request.path, params, list(zip(namespaces, versions))))
+    digest = hashlib.md5(raw_key.encode('utf-8')).hexdigest()
+    last_modified = max(versions) // 1_000_000_000
+    headers = {'ETag': f'"{digest}"', 'Last-Modified': http_date(last_modified)}
+    return f"{get_cache_settings()['KEY_PREFIX']}:payload:{digest}", last_modified, headers
+
+
+def _is_not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etags == ['*'] or etag in etags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return since is not None and last_modified <= since
+
+
+class CatalogueCacheMixin:
+    """
+    Read-through cache for public catalogue GET endpoints.
+
+    The serialized payload is cached per path + query parameters under a key
+    that embeds the current version of every namespace in
+    ``cache_namespaces``; core.signals bumps those versions on writes.
+    Responses carry ETag/Last-Modified and conditional requests get a 304.
+    """
+    cache_namespaces = ()
+
+    def get(self, request, *args, **kwargs):
+        versions = get_versions(self.cache_namespaces)
+        cache_key, last_modified, headers = _cache_identity(request, self.cache_namespaces, versions)
+        if _is_not_modified(request, headers['ETag'], last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache = get_cache()
+        data = cache.get(cache_key)
+        if data is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(cache_key, response.data, get_cache_settings()['TIMEOUT'])
+            for name, value in headers.items():
+                response[name] = value
+            return response
+        return Response(data, headers=headers)
+
+
+class AsyncCatalogueCacheMixin:
+    """
+    CatalogueCacheMixin for core.async_views: same keys, versions and
+    headers, so sync and async workers share cached payloads.
+    """
+
+    async def aget(self, view, request, *args, **kwargs):
+        namespaces = view.cache_namespaces
+        versions = await aget_versions(namespaces)
+        cache_key, last_modified, headers = _cache_identity(request, namespaces, versions)
+        if _is_not_modified(request, headers['ETag'], last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cache = get_cache()
+        data = await _acall(cache, 'get', cache_key)
+        if data is None:
+            response = await super().aget(view, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            await _acall(cache, 'set', cache_key, response.data, get_cache_settings()['TIMEOUT'])
+            for name, value in headers.items():
+                response[name] = value
+            return response
+        return Response(data, headers=headers)
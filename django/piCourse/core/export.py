@@ -0,0 +1,102 @@
+"""
+Streaming export of lesson request history.
+
+``streaming_response`` turns a LessonRequest queryset into a
+StreamingHttpResponse without holding the rows in memory: the queryset is
+read as ``.values()`` rows through ``iterator(chunk_size=...)`` (chunked
+fetches; a server-side cursor on PostgreSQL), each chunk is rendered by
+core.fastpath's RowBuilder, so rows carry the same representation as the
+API, and encoded by NDJSONRenderer or CSVRenderer (core.renderers) before
+the next chunk is read. Under ASGI (``request`` is an ASGIRequest) the
+response gets an async iterator that advances this pipeline one chunk at a
+time through ``sync_to_async``; Django would otherwise collect a sync
+iterator into a list before sending the first byte.
+
+Used by LessonRequestExportView (``/api/lesson-requests/export/``) and the
+LessonRequestAdmin export actions.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import fastpath
+from .models import LessonRequest
+from .serializers import LessonRequestSerializer
+
+CHUNK_SIZE = 2000
+# API'deki tüm alanlar, ?expand= ile açılanlar dahil
+FIELDS = tuple(LessonRequestSerializer.Meta.fields)
+
+
+def columns(names=FIELDS):
+    """CSV header of ``names``; nested serializers are flattened to ``review.rating`` style columns."""
+    serializer = LessonRequestSerializer(context={'sparse_fields': list(names)})
+    result = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.BaseSerializer):
+            result += [f'{name}.{child}' for child in field.fields]
+        else:
+            result.append(name)
+    return result
+
+
+def chunks(queryset, names=FIELDS, chunk_size=CHUNK_SIZE):
+    """Serialized rows of ``queryset`` as lists of at most ``chunk_size`` dicts."""
+    builder = fastpath.get_row_builder(LessonRequestSerializer, list(names))
+    if builder is None:
+        objects = queryset.iterator(chunk_size=chunk_size)
+        context = {'sparse_fields': list(names)}
+        while chunk := list(islice(objects, chunk_size)):
+            yield LessonRequestSerializer(chunk, many=True, context=context).data
+        return
+    rows = builder.project(queryset).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield builder.render(chunk)
+
+
+def lesson_history(user, role=None, status=(), start=None, end=None):
+    """``user``'s lessons as student or tutor, filtered by status and start time, oldest first."""
+    if (role or user.role) == 'student':
+        queryset = LessonRequest.objects.filter(student=user)
+    else:
+        queryset = LessonRequest.objects.filter(tutor=user)
+    if status:
+        queryset = queryset.filter(status__in=status)
+    if start is not None:
+        queryset = queryset.filter(start_time__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start_time__lt=end)
+    return queryset.order_by('start_time', 'id')
+
+
+async def _aiter(parts):
+    """Drive the sync generator ``parts`` from the event loop, one step per ``sync_to_async`` call."""
+    # thread_sensitive: queryset iterator'ü view'in iş parçacığında, aynı veritabanı bağlantısında kalır
+    step = sync_to_async(next)
+    end = object()
+    try:
+        while (part := await step(parts, end)) is not end:
+            yield part
+    finally:
+        # İstemci koparsa açık imleç de view'in iş parçacığında kapanır
+        await sync_to_async(parts.close)()
+
+
+def streaming_response(queryset, renderer, filename='lesson-requests', names=FIELDS, chunk_size=CHUNK_SIZE,
+                       request=None):
+    """StreamingHttpResponse of ``queryset`` encoded by ``renderer`` (NDJSONRenderer or CSVRenderer)."""
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type += f'; charset={renderer.charset}'
+    parts = renderer.render_rows(chunks(queryset, names, chunk_size), columns(names))
+    # DRF Request'i Django isteğini sarar
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        parts = _aiter(parts)
+    response = StreamingHttpResponse(parts, content_type=content_type)
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{renderer.format}"'
+    return response
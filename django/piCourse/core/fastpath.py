@@ -0,0 +1,289 @@
+"""
+Fast read path for the high-volume list endpoints.
+
+``RowBuilder`` renders a page from a ``.values()`` projection instead of
+model instances. The serializer's fields (after ``?fields=``/``?expand=``
+selection, core.sparse) are compiled once into per-field steps that read
+projected columns and convert them exactly as the DRF field would:
+
+- plain fields read ``field.source`` and use the field's own
+  ``to_representation`` (int/float/str, primary keys and ISO 8601
+  datetimes inline, the timezone resolved once per page);
+- ``SerializerMethodField`` ``x`` reads ``Meta.field_sources['x']`` and
+  calls the serializer's ``x_from_values`` function, which ``get_x`` also
+  delegates to, so both paths share one implementation;
+- a nested serializer is projected through its relation and rendered as
+  ``None`` when the related row is missing;
+- a nested ``many=True`` serializer over a many-to-many relation is
+  loaded with one query per page, the same query prefetch_related runs.
+
+The output is the serializer's, key for key and byte for byte once
+rendered. Fields the builder cannot compile make ``get_row_builder``
+return None and the view falls back to the serializer.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from . import sparse
+from .pagination import keyset_ordering
+
+# Bu tiplerde to_representation yalnızca tip dönüşümü yapar
+_CASTS = {
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.CharField: str,
+}
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _column(source):
+    return source.replace('.', LOOKUP_SEP)
+
+
+def current_timezone():
+    # DateTimeField.default_timezone; istek başına bir kez okunur (asgiref Local erişimi pahalı)
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def _converter(field):
+    cast = _CASTS.get(type(field))
+    if cast is not None:
+        return cast
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None  # .values() zaten birincil anahtarı verir
+    if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+        raise Unsupported(field.field_name)
+    return field.to_representation
+
+
+def _plain_step(column, convert):
+    if convert is None:
+        return itemgetter(column)
+
+    def step(row):
+        value = row[column]
+        return None if value is None else convert(value)
+    return step
+
+
+def _datetime_factory(column, field):
+    """DateTimeField.to_representation for ISO 8601 output, with the timezone resolved per render."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        step = _plain_step(column, field.to_representation)
+        return lambda tz: step
+
+    def factory(tz):
+        if hasattr(field, 'timezone'):
+            tz = field.timezone
+
+        def step(row):
+            value = row[column]
+            if not value:
+                return None
+            if tz is not None and value.tzinfo is not None:
+                value = value.astimezone(tz)
+            else:
+                value = field.enforce_timezone(value)
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return step
+    return factory
+
+
+def _method_step(function, columns):
+    get = itemgetter(*columns)
+    if len(columns) == 1:
+        return lambda row: function(get(row))
+    return lambda row: function(*get(row))
+
+
+class RowBuilder:
+    """Compiled renderer for one serializer and field selection."""
+
+    def __init__(self, serializer, prefix=''):
+        self.columns = []
+        # (alan, factory(tz) -> step); çok değerli alanlarda None
+        self.factories = []
+        self.relations = []  # (name, owner column, RelatedRows)
+        self.owner_columns = {}
+        self._steps = {}
+        model = serializer.Meta.model
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                function = getattr(type(serializer), f'{name}_from_values', None)
+                sources = getattr(serializer.Meta, 'field_sources', {}).get(name)
+                if function is None or not sources:
+                    raise Unsupported(name)
+                columns = [prefix + column for column in sources]
+                self.columns += columns
+                self.factories.append((name, _fixed(_method_step(function, columns))))
+            elif isinstance(field, serializers.ListSerializer):
+                related = RelatedRows(model, field)
+                owner = prefix + related.owner_column
+                self.columns.append(owner)
+                self.relations.append((name, owner, related))
+                self.owner_columns[name] = owner
+                self.factories.append((name, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                self.factories.append((name, self._nested_factory(field, prefix + _column(field.source) + LOOKUP_SEP)))
+            else:
+                if field.source == '*':
+                    raise Unsupported(name)
+                column = prefix + _column(field.source)
+                self.columns.append(column)
+                if type(field) is serializers.DateTimeField:
+                    self.factories.append((name, _datetime_factory(column, field)))
+                else:
+                    self.factories.append((name, _fixed(_plain_step(column, _converter(field)))))
+
+    def _nested_factory(self, field, prefix):
+        child = RowBuilder(field, prefix)
+        if child.relations:
+            raise Unsupported(field.field_name)
+        pk_column = prefix + field.Meta.model._meta.pk.attname
+        self.columns += [pk_column, *child.columns]
+
+        def factory(tz):
+            build, steps = child.build, child.steps(tz)
+
+            def step(row):
+                return None if row[pk_column] is None else build(row, steps)
+            return step
+        return factory
+
+    def steps(self, tz):
+        """Field steps for rendering in timezone ``tz``, compiled once per timezone."""
+        steps = self._steps.get(tz)
+        if steps is None:
+            steps = [(name, factory and factory(tz)) for name, factory in self.factories]
+            self._steps[tz] = steps
+        return steps
+
+    def build(self, row, steps, related=None):
+        result = {}
+        for name, step in steps:
+            if step is None:
+                result[name] = related[name].get(row[self.owner_columns[name]], [])
+            else:
+                result[name] = step(row)
+        return result
+
+    def project(self, queryset, keep=()):
+        """``queryset`` as dict rows carrying every column the builder (and ``keep``) reads."""
+        columns = list(dict.fromkeys([*self.columns, *keep]))
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def related_querysets(self, rows):
+        """``(name, RelatedRows, queryset)`` per many-valued field, for the owners in ``rows``."""
+        for name, owner, related in self.relations:
+            ids = {row[owner] for row in rows} - {None}
+            yield name, related, related.queryset(ids)
+
+    def render(self, rows):
+        tz = current_timezone()
+        related = {
+            name: relation.group(list(queryset), tz) for name, relation, queryset in self.related_querysets(rows)
+        }
+        steps = self.steps(tz)
+        return [self.build(row, steps, related) for row in rows]
+
+    async def arender(self, rows):
+        tz = current_timezone()
+        related = {}
+        for name, relation, queryset in self.related_querysets(rows):
+            related[name] = relation.group([row async for row in queryset], tz)
+        steps = self.steps(tz)
+        return [self.build(row, steps, related) for row in rows]
+
+
+def _fixed(step):
+    return lambda tz: step
+
+
+class RelatedRows:
+    """Rows of a ``many=True`` nested serializer over a many-to-many relation, grouped by owner."""
+
+    def __init__(self, model, field):
+        *path, name = field.source.split('.')
+        owner_model = model
+        for part in path:
+            owner_model = owner_model._meta.get_field(part).related_model
+        m2m = owner_model._meta.get_field(name)
+        if not m2m.many_to_many or m2m.auto_created:
+            raise Unsupported(field.field_name)
+        self.model = m2m.related_model
+        self.query_name = m2m.related_query_name()
+        self.owner_column = LOOKUP_SEP.join([*path, owner_model._meta.pk.attname])
+        self.child = RowBuilder(field.child)
+        if self.child.relations:
+            raise Unsupported(field.field_name)
+
+    def queryset(self, owner_ids):
+        # prefetch_related ile aynı FROM/JOIN/WHERE: satır sırası da aynı kalır
+        return self.model._default_manager.filter(**{f'{self.query_name}__in': owner_ids}).values(
+            *dict.fromkeys(self.child.columns), _owner=F(self.query_name),
+        )
+
+    def group(self, rows, tz):
+        groups = defaultdict(list)
+        build, steps = self.child.build, self.child.steps(tz)
+        for row in rows:
+            groups[row['_owner']].append(build(row, steps))
+        return groups
+
+
+_builders = {}
+
+
+def get_row_builder(serializer_class, names):
+    """Cached builder for ``serializer_class`` rendering ``names`` (None: its default fields), or None."""
+    key = (serializer_class, None if names is None else tuple(names))
+    if key not in _builders:
+        serializer = serializer_class(context={'sparse_fields': names})
+        try:
+            _builders[key] = RowBuilder(serializer)
+        except Unsupported:
+            _builders[key] = None
+    return _builders[key]
+
+
+class FastListMixin:
+    """
+    ``list`` for ListAPIView/ListCreateAPIView views whose serializer
+    supports RowBuilder: same filtering, pagination and payload, without
+    model instances.
+    """
+
+    def get_row_builder(self):
+        serializer_class = self.get_serializer_class()
+        names = sparse.selected_fields(serializer_class, self.request)
+        return get_row_builder(serializer_class, names)
+
+    def project_queryset(self, builder, queryset):
+        # İmleç konumu için etkin sıralamanın (?ordering=, arama alaka düzeyi) alanları da okunur
+        ordering = keyset_ordering(queryset, getattr(self, 'keyset_ordering', None)) or ()
+        return builder.project(queryset, [field.lstrip('-') for field in ordering])
+
+    def list(self, request, *args, **kwargs):
+        builder = self.get_row_builder()
+        if builder is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.project_queryset(builder, self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(builder.render(page))
+        return Response(builder.render(list(queryset)))
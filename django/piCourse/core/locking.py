@@ -0,0 +1,24 @@
+"""
+Write locks for transactions that read before they write.
+
+A booking checks the tutor's calendar and then inserts (core.scheduling);
+a task worker selects due tasks and then leases them (core.tasks). Both
+must hold a lock from the read to the commit. Backends with row locks use
+``SELECT ... FOR UPDATE`` on the rows involved. SQLite has no row locks:
+there ``write_lock`` takes the database write lock as the transaction's
+first statement, which is what ``BEGIN IMMEDIATE`` does, without making
+every other ``atomic()`` block, read-only ones included, queue behind the
+writer.
+"""
+
+
+def write_lock(connection):
+    """
+    On SQLite, hold the write lock for the rest of the current transaction;
+    call it before the transaction's first read. A no-op elsewhere.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    # Satır değiştirmeyen bir yazma da kilidi alır; kilit başka bir yazardaysa busy timeout kadar beklenir
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM django_migrations WHERE 0')
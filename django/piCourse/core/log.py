@@ -0,0 +1,144 @@
+"""
+Structured, non-blocking logging for the core app.
+
+settings.LOGGING wires these pieces together:
+
+* ``RequestIDMiddleware`` assigns every request an id (or reuses the
+  incoming ``X-Request-ID``) and decides once whether the request is sampled.
+* ``RequestContextFilter`` stamps ``request_id`` on each record and drops
+  records below ``always_level`` for requests that were not sampled.
+* ``QueueStreamHandler`` only formats and enqueues; a listener thread does
+  the actual stream I/O, so worker threads never wait on stdout.
+* ``JsonFormatter`` renders one JSON object per line.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+request_id_var = ContextVar('request_id', default=None)
+sampled_var = ContextVar('log_sampled', default=True)
+
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+RESPONSE_ID_HEADER = 'X-Request-ID'
+
+# LogRecord'un standart alanları; bunların dışındaki extra={...} anahtarları JSON'a eklenir
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def get_request_id():
+    return request_id_var.get()
+
+
+class RequestIDMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        tokens = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.reset(tokens)
+        response[RESPONSE_ID_HEADER] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        # ContextVar'lar view coroutine'ine aynı task içinde geçer
+        tokens = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.reset(tokens)
+        response[RESPONSE_ID_HEADER] = request.request_id
+        return response
+
+    def start(self, request):
+        request_id = request.META.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        rate = getattr(settings, 'LOG_SAMPLE_RATE', 1.0)
+        request.request_id = request_id
+        return request_id_var.set(request_id), sampled_var.set(rate >= 1.0 or random.random() < rate)
+
+    @staticmethod
+    def reset(tokens):
+        request_token, sampled_token = tokens
+        request_id_var.reset(request_token)
+        sampled_var.reset(sampled_token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds ``request_id`` and applies per-request sampling below ``always_level``."""
+
+    def __init__(self, always_level='WARNING'):
+        super().__init__()
+        self.always_level = logging.getLevelName(always_level) if isinstance(always_level, str) else always_level
+
+    def filter(self, record):
+        request_id = request_id_var.get()
+        if request_id is None:
+            # django.request yanıtı middleware zinciri bittikten sonra loglar
+            request_id = getattr(getattr(record, 'request', None), 'request_id', None)
+        record.request_id = request_id
+        return record.levelno >= self.always_level or sampled_var.get()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Formats in the calling thread, writes to ``stream`` from a background
+    listener thread. The queue is bounded; when it is full records are
+    dropped (and counted in ``dropped``) instead of blocking the request.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.target.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
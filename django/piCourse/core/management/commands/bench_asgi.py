@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core import benchmark
+from core.auth import RefreshToken
+from core.models import User
+
+ENDPOINTS = ('subjects', 'tutors', 'tutor-detail', 'me')
+
+
+class Command(BaseCommand):
+    help = 'Compare the async ASGI catalogue views with the sync WSGI views under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='Comma separated: ' + ', '.join(ENDPOINTS))
+        parser.add_argument('--cache', choices=['hit', 'miss'], default='hit',
+                            help='"miss" adds a unique query parameter to every catalogue request')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        # Dahili: tek bir modu bu süreçte çalıştırır (ASYNC_VIEWS ayarı süreç başında okunur)
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.stdout.write(json.dumps(self.run_mode(options)))
+            return
+
+        report = {}
+        for mode in ('wsgi', 'asgi'):
+            command = [
+                sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_asgi', '--mode', mode,
+                '--requests', str(options['requests']), '--concurrency', str(options['concurrency']),
+                '--endpoints', options['endpoints'], '--cache', options['cache'],
+            ]
+            env = {**os.environ, 'PICOURSE_ASYNC_VIEWS': '1' if mode == 'asgi' else '0'}
+            result = subprocess.run(command, env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise CommandError(f'{mode} run failed:\n{result.stderr}')
+            report[mode] = json.loads(result.stdout.strip().splitlines()[-1])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"{'endpoint':<14}{'mode':<6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name in report['wsgi']:
+            for mode in ('wsgi', 'asgi'):
+                row = report[mode][name]
+                self.stdout.write(
+                    f"{name:<14}{mode:<6}{row['throughput_rps']:>10}{row['p50_ms']:>10}"
+                    f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['errors']:>8}"
+                )
+
+    def run_mode(self, options):
+        mode = options['mode']
+        if settings.ASYNC_VIEWS != (mode == 'asgi'):
+            raise CommandError('Set PICOURSE_ASYNC_VIEWS=1 for the asgi mode and leave it unset for wsgi.')
+
+        # Ölçüm boyunca limitlere takılmamak için oranlar yükseltilir
+        benchmark.unthrottle()
+
+        if mode == 'asgi':
+            from django.core.asgi import get_asgi_application
+            application, run = get_asgi_application(), benchmark.run_asgi
+        else:
+            from django.core.wsgi import get_wsgi_application
+            application, run = get_wsgi_application(), benchmark.run_wsgi
+
+        results = {}
+        for target in self.targets(options):
+            run(application, target, min(options['requests'], 20), 1)  # ısınma
+            results[target.name] = run(application, target, options['requests'], options['concurrency'])
+        return results
+
+    def targets(self, options):
+        unique = options['cache'] == 'miss'
+        targets = []
+        for name in options['endpoints'].split(','):
+            if name in ('subjects', 'tutors'):
+                targets.append(benchmark.Target(name, reverse(name), unique=unique))
+            elif name == 'tutor-detail':
+                tutor_id = User.objects.filter(role='tutor').values_list('id', flat=True).first()
+                if tutor_id is None:
+                    raise CommandError('No tutors found; run seed_data first.')
+                targets.append(benchmark.Target(name, reverse(name, kwargs={'pk': tutor_id}), unique=unique))
+            elif name == 'me':
+                student = User.objects.filter(role='student').select_related('student_profile').first()
+                if student is None:
+                    raise CommandError('No students found; run seed_data first.')
+                token = RefreshToken.for_user(student).access_token
+                targets.append(benchmark.Target(name, reverse(name), headers={'Authorization': f'Bearer {token}'}))
+            else:
+                raise CommandError(f'Unknown endpoint {name!r}; choose from {", ".join(ENDPOINTS)}.')
+        return targets
@@ -0,0 +1,123 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import fastpath, sparse
+from core.renderers import ORJSONRenderer
+from core.models import LessonRequest, User
+from core.serializers import LessonRequestSerializer, TutorListSerializer
+
+# Karşılaştırılan iki yol: satır kurma (serializer / core.fastpath) ya da JSON kodlama (stdlib / orjson)
+STAGES = {
+    'build': ('serializer', 'fastpath'),
+    'render': ('json', 'orjson'),
+}
+
+ENDPOINTS = {
+    # Liste görünümlerinin sorgusu ve serializer'ı; ders talepleri birincil anahtara göre sıralanır
+    # ki ölçüm milyonlarca satırlık bir sıralamayı değil satır kurmayı ölçsün
+    'tutors': (
+        TutorListSerializer,
+        lambda: User.objects.filter(role='tutor').select_related('tutor_profile').prefetch_related(
+            'tutor_profile__subjects').order_by('-tutor_profile__rating', '-id'),
+    ),
+    'lesson-requests': (
+        LessonRequestSerializer,
+        lambda: LessonRequest.objects.with_names().order_by('-id'),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = ('Rows/second of the list serializers against the core.fastpath row builders on the same rows, '
+            'or (--stage render) of DRF\'s JSONRenderer against core.renderers.ORJSONRenderer')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Rows rendered per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per mode; the best one is reported')
+        parser.add_argument('--stage', choices=sorted(STAGES), default='build', help='What to compare')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='Comma separated: ' + ', '.join(ENDPOINTS))
+        parser.add_argument('--fields', default='', help='Optional ?fields= selection')
+        parser.add_argument('--expand', default='', help='Optional ?expand= selection')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in (sparse.FIELDS_PARAM, sparse.EXPAND_PARAM) if options[name]}
+        report = {}
+        for name in options['endpoints'].split(','):
+            if name not in ENDPOINTS:
+                raise CommandError(f'Unknown endpoint {name!r}; choose from {", ".join(ENDPOINTS)}.')
+            report[name] = self.measure(*ENDPOINTS[name], params, options['rows'], options['repeat'], options['stage'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        before, after = STAGES[options['stage']]
+        self.stdout.write(f"{'endpoint':<18}{'rows':>7}{before + ' rows/s':>20}{after + ' rows/s':>18}{'speedup':>9}")
+        for name, row in report.items():
+            self.stdout.write(
+                f"{name:<18}{row['rows']:>7}{row[before + '_rows_per_s']:>20}"
+                f"{row[after + '_rows_per_s']:>18}{row['speedup']:>9}"
+            )
+
+    def measure(self, serializer_class, base_queryset, params, rows, repeat, stage):
+        request = Request(APIRequestFactory().get('/', params))
+        try:
+            names = sparse.selected_fields(serializer_class, request)
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+        builder = fastpath.get_row_builder(serializer_class, names)
+        if builder is None:
+            raise CommandError(f'{serializer_class.__name__} has fields the row builder cannot compile.')
+        queryset = base_queryset()
+        if names is not None:
+            queryset = sparse.prune_queryset(queryset, serializer_class, names)
+
+        def serializer_path():
+            serializer = serializer_class(list(queryset[:rows]), many=True, context={'request': request})
+            return serializer.data
+
+        def fast_path():
+            return builder.render(list(builder.project(queryset)[:rows]))
+
+        renderer = JSONRenderer()
+        slow_payload, fast_payload = serializer_path(), fast_path()
+        if not slow_payload:
+            raise CommandError('No rows to render; run seed_data or loadtest seed first.')
+        if renderer.render(slow_payload) != renderer.render(fast_payload):
+            raise CommandError('Row builder output differs from the serializer.')
+
+        if stage == 'render':
+            fast_renderer = ORJSONRenderer()
+            if fast_renderer.render(fast_payload) != renderer.render(fast_payload):
+                raise CommandError('ORJSONRenderer output differs from JSONRenderer.')
+            runs = {
+                'json': lambda: renderer.render(fast_payload),
+                'orjson': lambda: fast_renderer.render(fast_payload),
+            }
+        else:
+            runs = {'serializer': serializer_path, 'fastpath': fast_path}
+
+        timings = {}
+        for mode, run in runs.items():
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[mode] = best
+
+        count = len(slow_payload)
+        before, after = STAGES[stage]
+        return {
+            'rows': count,
+            f'{before}_rows_per_s': round(count / timings[before]),
+            f'{after}_rows_per_s': round(count / timings[after]),
+            'speedup': round(timings[before] / timings[after], 2),
+        }
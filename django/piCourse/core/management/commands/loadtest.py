@@ -0,0 +1,286 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.urls import resolve, reverse
+
+from core import benchmark, metrics, seeding
+from core.auth import RefreshToken
+from core.models import LessonRequest, Subject, TutorProfile, User
+
+SCENARIOS = {
+    'catalogue': ['subjects', 'tutors', 'tutors-cursor', 'tutors-subject', 'tutors-filters', 'tutors-search',
+                  'tutor-detail'],
+    'lessons': ['lesson-requests-student', 'lesson-requests-tutor', 'lesson-request-create'],
+    'auth': ['login'],
+}
+SCENARIOS['all'] = [name for names in SCENARIOS.values() for name in names]
+ENDPOINTS = SCENARIOS['all']
+
+# Oluşturma senaryosu, tohum derslerinin (core.seeding) çok ötesindeki boş saatlere yazar
+CREATE_OFFSET = timedelta(days=2 * 365)
+
+
+class Command(BaseCommand):
+    help = 'Seed load-testing datasets, benchmark API scenarios and compare JSON baselines'
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest='action', required=True)
+
+        seed = actions.add_parser('seed', help='Bulk-create a synthetic dataset')
+        seed.add_argument('--subjects', type=int, default=16)
+        seed.add_argument('--tutors', type=int, default=1000)
+        seed.add_argument('--students', type=int, default=1000)
+        seed.add_argument('--lessons', type=int, default=10000, help='Lesson requests')
+        seed.add_argument('--batch-size', type=int, default=5000)
+        seed.add_argument('--prefix', default='load', help='Username prefix of the generated users')
+        seed.add_argument('--password', default=seeding.DEFAULT_PASSWORD)
+        seed.add_argument('--random-seed', type=int, default=0)
+        seed.add_argument('--workers', type=int, default=1, help='Processes generating rows in parallel')
+
+        run = actions.add_parser('run', help='Benchmark a scenario and write a JSON baseline')
+        run.add_argument('--scenario', choices=sorted(SCENARIOS), default='all')
+        run.add_argument('--endpoints', help='Comma separated subset instead of a scenario: ' + ', '.join(ENDPOINTS))
+        run.add_argument('--transport', choices=['wsgi', 'asgi', 'http'], default='wsgi',
+                         help='wsgi/asgi: in-process handler; http: real sockets (local server unless --url)')
+        run.add_argument('--url', help='Base URL of an already running server for --transport http')
+        run.add_argument('--requests', type=int, default=1000, help='Requests per endpoint')
+        run.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+        run.add_argument('--cache', choices=['hit', 'miss'], default='hit',
+                         help='"miss" adds a unique query parameter to every catalogue request')
+        run.add_argument('--prefix', default='load')
+        run.add_argument('--password', default=seeding.DEFAULT_PASSWORD)
+        run.add_argument('--output', help='Write the baseline JSON to this file (default: stdout)')
+
+        compare = actions.add_parser('compare', help='Diff two baselines endpoint by endpoint')
+        compare.add_argument('baseline')
+        compare.add_argument('candidate')
+        compare.add_argument('--max-regression', type=float,
+                             help='Fail if p95 grows by more than this percentage or queries per request grow')
+
+    def handle(self, *args, **options):
+        getattr(self, options['action'])(options)
+
+    def seed(self, options):
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users with the prefix {options['prefix']!r} already exist; "
+                               'use another --prefix or a fresh database (DATABASE_PATH).')
+        counts = seeding.seed_volume(
+            subjects=options['subjects'], tutors=options['tutors'], students=options['students'],
+            lessons=options['lessons'], batch_size=options['batch_size'], password=options['password'],
+            prefix=options['prefix'], random_seed=options['random_seed'], workers=options['workers'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{total} {name}' for name, total in counts.items())
+        ))
+
+    def run(self, options):
+        transport = options['transport']
+        if transport == 'asgi' and not settings.ASYNC_VIEWS:
+            raise CommandError('Set PICOURSE_ASYNC_VIEWS=1 for the asgi transport.')
+        if options['url'] and transport != 'http':
+            raise CommandError('--url requires --transport http.')
+        names = options['endpoints'].split(',') if options['endpoints'] else SCENARIOS[options['scenario']]
+
+        benchmark.unthrottle()
+        targets = self.targets(names, options)
+
+        if transport == 'asgi':
+            from django.core.asgi import get_asgi_application
+            application = get_asgi_application()
+        else:
+            from django.core.wsgi import get_wsgi_application
+            application = get_wsgi_application()
+
+        if transport == 'http' and not options['url']:
+            with benchmark.serve_wsgi(application) as base_url:
+                results = self.measure(targets, options, base_url)
+        else:
+            results = self.measure(targets, options, options['url'] if transport == 'http' else application)
+
+        report = {'meta': self.meta(options), 'endpoints': results}
+        output = json.dumps(report, indent=2, sort_keys=True) + '\n'
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Baseline written to {options['output']}")
+        else:
+            self.stdout.write(output, ending='')
+
+    def measure(self, targets, options, application):
+        transport, external = options['transport'], bool(options['url'])
+        run = {'wsgi': benchmark.run_wsgi, 'asgi': benchmark.run_asgi, 'http': benchmark.run_http}[transport]
+        results = {}
+        for target in targets:
+            run(application, target, min(options['requests'], 20), 1)  # ısınma
+            if external:
+                before = benchmark.scrape_query_stats(options['url'])
+            metrics.registry.reset()
+            row = run(application, target, options['requests'], options['concurrency'])
+            if external:
+                after = benchmark.scrape_query_stats(options['url'])
+                query_sum, requests = (a - b for a, b in zip(
+                    after.get(target.view, (0.0, 0)), before.get(target.view, (0.0, 0))
+                ))
+                row['queries_per_request'] = round(query_sum / requests, 2) if requests else None
+            else:
+                # ASGI yolunda MetricsMiddleware sorgu saymaz (None)
+                row['queries_per_request'] = benchmark.query_stats(target.view)
+            results[target.name] = row
+            self.stderr.write(f"{target.name:<26}{row['throughput_rps']:>10} rps  p95 {row['p95_ms']} ms")
+        return results
+
+    def targets(self, names, options):
+        unique = options['cache'] == 'miss'
+        prefix = options['prefix']
+        targets = []
+
+        def add(name, url, **kwargs):
+            targets.append(benchmark.Target(name, url, view=resolve(url.split('?')[0]).url_name, **kwargs))
+
+        def bearer(user):
+            return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+        for name in names:
+            if name not in ENDPOINTS:
+                raise CommandError(f'Unknown endpoint {name!r}; choose from {", ".join(ENDPOINTS)}.')
+
+        tutor = User.objects.filter(role='tutor', tutor_profile__subjects__isnull=False).first()
+        if tutor is None:
+            raise CommandError('No tutors with subjects found; run "loadtest seed" first.')
+        subject = Subject.objects.filter(tutors__user=tutor).first()
+        # Dersleri olan bir öğrenci/eğitmen çifti: liste uç noktaları boş sayfa döndürmesin
+        pair = LessonRequest.objects.order_by('-id').values_list('student_id', 'tutor_id').first()
+        student_id, lesson_tutor_id = pair if pair else (None, None)
+
+        for name in names:
+            if name == 'subjects':
+                add(name, reverse('subjects'), unique=unique)
+            elif name == 'tutors':
+                add(name, reverse('tutors'), unique=unique)
+            elif name == 'tutors-cursor':
+                add(name, reverse('tutors') + '?pagination=cursor', unique=unique)
+            elif name == 'tutors-subject':
+                add(name, reverse('tutors') + f'?subject={subject.id}&pagination=cursor', unique=unique)
+            elif name == 'tutors-filters':
+                # Birden çok konu + fiyat aralığı + puan: core.subject_index maskesi üzerinde
+                subject_ids = ','.join(str(pk) for pk in Subject.objects.order_by('pk').values_list('pk', flat=True)[:3])
+                add(name, reverse('tutors') + f'?subject={subject_ids}&min_price=40&max_price=120&min_rating=3.5'
+                    '&pagination=cursor', unique=unique)
+            elif name == 'tutors-search':
+                add(name, reverse('tutors') + f'?search={subject.name[:4].lower()}', unique=unique)
+            elif name == 'tutor-detail':
+                add(name, reverse('tutor-detail', kwargs={'pk': tutor.id}), unique=unique)
+            elif name == 'login':
+                student = User.objects.filter(role='student', username__startswith=f'{prefix}_').first()
+                if student is None:
+                    raise CommandError(f'No {prefix}_* students found; run "loadtest seed" first.')
+                add(name, reverse('login'), method='POST',
+                    body={'username': student.username, 'password': options['password']})
+            else:
+                if student_id is None:
+                    raise CommandError('No lesson requests found; run "loadtest seed" first.')
+                if name == 'lesson-requests-student':
+                    add(name, reverse('lesson-requests'), headers=bearer(self.user(student_id)))
+                elif name == 'lesson-requests-tutor':
+                    add(name, reverse('lesson-requests'), headers=bearer(self.user(lesson_tutor_id)))
+                elif name == 'lesson-request-create':
+                    add(name, reverse('lesson-requests'), method='POST', headers=bearer(self.user(student_id)),
+                        body=self.lesson_body_factory())
+        return targets
+
+    @staticmethod
+    def user(user_id):
+        return User.objects.select_related('tutor_profile', 'student_profile').get(pk=user_id)
+
+    @staticmethod
+    def lesson_body_factory():
+        """Request bodies that never conflict: rotating tutors, each at fresh hours after any existing booking."""
+        links = list(
+            TutorProfile.subjects.through.objects.order_by('tutorprofile__user_id')
+            .values_list('tutorprofile__user_id', 'subject_id')[:50]
+        )
+        tutors = dict(links)
+        latest = LessonRequest.objects.filter(tutor_id__in=tutors).aggregate(end=Max('end_time'))['end']
+        now = datetime.now(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        base = max(now + CREATE_OFFSET, (latest or now) + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        order = list(tutors.items())
+
+        def body(n):
+            tutor_id, subject_id = order[n % len(order)]
+            start = base + timedelta(hours=2 * (n // len(order)))
+            return {'tutor': tutor_id, 'subject': subject_id, 'start_time': start.isoformat(), 'duration_minutes': 60}
+        return body
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            'transport': options['transport'] + (' (external)' if options['url'] else ''),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'cache': options['cache'],
+            'dataset': {
+                'tutors': User.objects.filter(role='tutor').count(),
+                'students': User.objects.filter(role='student').count(),
+                'lesson_requests': LessonRequest.objects.count(),
+            },
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        }
+
+    def compare(self, options):
+        def load(path):
+            try:
+                with open(path) as fh:
+                    return json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read {path}: {exc}')
+
+        old, new = load(options['baseline']), load(options['candidate'])
+        self.stdout.write(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+        self.stdout.write(f"{'endpoint':<26}{'rps':>28}{'p95 ms':>30}{'p99 ms':>30}{'queries':>16}")
+
+        def change(before, after):
+            if before in (None, 0) or after is None:
+                return f'{before} -> {after}'
+            return f'{before} -> {after} ({(after - before) / before * 100:+.0f}%)'
+
+        regressions = []
+        for name in sorted(set(old['endpoints']) | set(new['endpoints'])):
+            a, b = old['endpoints'].get(name), new['endpoints'].get(name)
+            if a is None or b is None:
+                self.stdout.write(f"{name:<26}{'only in ' + ('candidate' if a is None else 'baseline'):>28}")
+                continue
+            self.stdout.write(
+                f"{name:<26}{change(a['throughput_rps'], b['throughput_rps']):>28}"
+                f"{change(a['p95_ms'], b['p95_ms']):>30}{change(a['p99_ms'], b['p99_ms']):>30}"
+                f"{str(a['queries_per_request']) + ' -> ' + str(b['queries_per_request']):>16}"
+            )
+            limit = options['max_regression']
+            if limit is None:
+                continue
+            if a['p95_ms'] and b['p95_ms'] and (b['p95_ms'] - a['p95_ms']) / a['p95_ms'] * 100 > limit:
+                regressions.append(f'{name}: p95 {a["p95_ms"]} -> {b["p95_ms"]} ms')
+            if (a['queries_per_request'] is not None and b['queries_per_request'] is not None
+                    and b['queries_per_request'] > a['queries_per_request']):
+                regressions.append(f'{name}: queries {a["queries_per_request"]} -> {b["queries_per_request"]}')
+            if b['errors'] > a['errors']:
+                regressions.append(f'{name}: errors {a["errors"]} -> {b["errors"]}')
+
+        if regressions:
+            raise CommandError('Regressions:\n' + '\n'.join(regressions))
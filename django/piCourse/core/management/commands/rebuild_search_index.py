@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import TutorSearchDocument
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized tutor search index from scratch'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding tutor search index...')
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {TutorSearchDocument.objects.count()} tutors')
+        )
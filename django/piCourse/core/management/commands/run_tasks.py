@@ -0,0 +1,34 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks queued through core.tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the tasks that are due, then exit')
+        parser.add_argument('--batch-size', type=int, help='Tasks leased per query')
+        parser.add_argument('--poll-interval', type=float, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--worker-id', help='Name recorded on leased tasks (default: host:pid)')
+
+    def handle(self, *args, **options):
+        worker = options['worker_id'] or tasks.default_worker_id()
+        if options['once']:
+            count = tasks.run_pending(worker, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} tasks'))
+            return
+
+        stopping = []
+
+        def stop(signum, frame):
+            # Elindeki parti bitirilir; sonra çıkılır
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f'Worker {worker} waiting for tasks...')
+        tasks.work(worker, options['batch_size'], options['poll_interval'], stop=lambda: bool(stopping))
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} stopped'))
@@ -1,6 +1,9 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from core.models import Subject, TutorProfile, StudentProfile, LessonRequest
+from core import caching, search, seeding, subject_index
 from decimal import Decimal
 from datetime import datetime, timedelta
 import pytz
@@ -8,11 +11,40 @@ import pytz
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = 'Seed database with sample data for development'
+    help = 'Seed database with sample data for development, or a generated dataset of any size'
+
+    def add_arguments(self, parser):
+        # Bu seçeneklerden biri verilirse örnek veri yerine core.seeding ile toplu veri üretilir
+        parser.add_argument('--tutors', type=int, help='Generate this many tutors')
+        parser.add_argument('--students', type=int, help='Generate this many students')
+        parser.add_argument('--lessons', type=int, help='Generate this many lesson requests')
+        parser.add_argument('--subjects', type=int, default=16, help='Subjects for a generated dataset')
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating rows in parallel')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT batch')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of generated users')
+        parser.add_argument('--random-seed', type=int, default=0)
 
     def handle(self, *args, **options):
+        if any(options[name] is not None for name in ('tutors', 'students', 'lessons')):
+            self.seed_volume(options)
+        else:
+            self.seed_sample()
+
+    def seed_volume(self, options):
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users with the prefix {options['prefix']!r} already exist; use another --prefix.")
+        counts = seeding.seed_volume(
+            subjects=options['subjects'], tutors=options['tutors'] or 0, students=options['students'] or 0,
+            lessons=options['lessons'] or 0, batch_size=options['batch_size'], prefix=options['prefix'],
+            random_seed=options['random_seed'], workers=options['workers'], log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Successfully seeded ' + ', '.join(f'{total} {name}' for name, total in counts.items())
+        ))
+
+    def seed_sample(self):
         self.stdout.write('Seeding database...')
-        
+
         # Create Subjects
         subjects_data = [
             'Mathematics',
@@ -21,20 +53,12 @@ class Command(BaseCommand):
             'English',
             'History'
         ]
-        
-        subjects = []
-        for subject_name in subjects_data:
-            subject, created = Subject.objects.get_or_create(name=subject_name)
-            subjects.append(subject)
-            if created:
-                self.stdout.write(f'Created subject: {subject_name}')
-        
+
         # Create Students
         students_data = [
             {
                 'username': 'student1',
                 'email': 'student1@example.com',
-                'password': 'testpass123',
                 'first_name': 'John',
                 'last_name': 'Doe',
                 'grade_level': '10th Grade'
@@ -42,40 +66,17 @@ class Command(BaseCommand):
             {
                 'username': 'student2',
                 'email': 'student2@example.com',
-                'password': 'testpass123',
                 'first_name': 'Jane',
                 'last_name': 'Smith',
                 'grade_level': '11th Grade'
             }
         ]
-        
-        students = []
-        for student_data in students_data:
-            user, created = User.objects.get_or_create(
-                username=student_data['username'],
-                defaults={
-                    'email': student_data['email'],
-                    'first_name': student_data['first_name'],
-                    'last_name': student_data['last_name'],
-                    'role': 'student'
-                }
-            )
-            if created:
-                user.set_password(student_data['password'])
-                user.save()
-                StudentProfile.objects.create(
-                    user=user,
-                    grade_level=student_data['grade_level']
-                )
-                self.stdout.write(f'Created student: {user.username}')
-            students.append(user)
-        
+
         # Create Tutors
         tutors_data = [
             {
                 'username': 'tutor1',
                 'email': 'tutor1@example.com',
-                'password': 'testpass123',
                 'first_name': 'Dr. Alice',
                 'last_name': 'Johnson',
                 'bio': 'Experienced mathematics teacher with 10+ years of experience',
@@ -86,7 +87,6 @@ class Command(BaseCommand):
             {
                 'username': 'tutor2',
                 'email': 'tutor2@example.com',
-                'password': 'testpass123',
                 'first_name': 'Prof. Bob',
                 'last_name': 'Wilson',
                 'bio': 'Chemistry professor specializing in organic chemistry',
@@ -97,7 +97,6 @@ class Command(BaseCommand):
             {
                 'username': 'tutor3',
                 'email': 'tutor3@example.com',
-                'password': 'testpass123',
                 'first_name': 'Ms. Carol',
                 'last_name': 'Brown',
                 'bio': 'English literature teacher with passion for classic novels',
@@ -106,83 +105,77 @@ class Command(BaseCommand):
                 'subjects': ['English', 'History']
             }
         ]
-        
-        tutors = []
-        for tutor_data in tutors_data:
-            user, created = User.objects.get_or_create(
-                username=tutor_data['username'],
-                defaults={
-                    'email': tutor_data['email'],
-                    'first_name': tutor_data['first_name'],
-                    'last_name': tutor_data['last_name'],
-                    'role': 'tutor'
-                }
-            )
-            if created:
-                user.set_password(tutor_data['password'])
-                user.save()
-                
-                profile = TutorProfile.objects.create(
-                    user=user,
-                    bio=tutor_data['bio'],
-                    hourly_rate=tutor_data['hourly_rate'],
-                    rating=tutor_data['rating']
-                )
-                
-                # Add subjects
-                for subject_name in tutor_data['subjects']:
-                    subject = Subject.objects.get(name=subject_name)
-                    profile.subjects.add(subject)
-                
-                self.stdout.write(f'Created tutor: {user.username}')
-            tutors.append(user)
-        
-        # Create Lesson Requests
-        lesson_requests_data = [
-            {
-                'student': students[0],
-                'tutor': tutors[0],
-                'subject': subjects[0],  # Mathematics
-                'start_time': datetime.now(pytz.UTC) + timedelta(days=1, hours=10),
-                'duration_minutes': 60,
-                'status': 'pending'
-            },
-            {
-                'student': students[1],
-                'tutor': tutors[1],
-                'subject': subjects[2],  # Chemistry
-                'start_time': datetime.now(pytz.UTC) + timedelta(days=2, hours=14),
-                'duration_minutes': 90,
-                'status': 'approved'
-            },
-            {
-                'student': students[0],
-                'tutor': tutors[2],
-                'subject': subjects[3],  # English
-                'start_time': datetime.now(pytz.UTC) + timedelta(days=3, hours=16),
-                'duration_minutes': 60,
-                'status': 'rejected'
-            }
-        ]
-        
-        for lr_data in lesson_requests_data:
-            lesson_request, created = LessonRequest.objects.get_or_create(
-                student=lr_data['student'],
-                tutor=lr_data['tutor'],
-                subject=lr_data['subject'],
-                start_time=lr_data['start_time'],
-                defaults={
-                    'duration_minutes': lr_data['duration_minutes'],
-                    'status': lr_data['status']
-                }
-            )
-            if created:
-                self.stdout.write(f'Created lesson request: {lesson_request}')
-        
+
+        # Tüm örnek kullanıcılar aynı parolayı kullanır: hash bir kez hesaplanır
+        password_hash = make_password(seeding.DEFAULT_PASSWORD)
+
+        with transaction.atomic():
+            subjects = dict(Subject.objects.filter(name__in=subjects_data).values_list('name', 'id'))
+            missing = [Subject(name=name) for name in subjects_data if name not in subjects]
+            for subject in Subject.objects.bulk_create(subject_index.assign_bits(missing)):
+                subjects[subject.name] = subject.id
+                self.stdout.write(f'Created subject: {subject.name}')
+
+            # bulk_create sinyal göndermez; profiller aşağıda kullanıcılarla birlikte yazılır
+            existing = set(User.objects.filter(
+                username__in=[data['username'] for data in students_data + tutors_data]
+            ).values_list('username', flat=True))
+            new_students = [data for data in students_data if data['username'] not in existing]
+            new_tutors = [data for data in tutors_data if data['username'] not in existing]
+
+            users = User.objects.bulk_create([
+                User(username=data['username'], email=data['email'], first_name=data['first_name'],
+                     last_name=data['last_name'], role=role, password=password_hash)
+                for role, rows in (('student', new_students), ('tutor', new_tutors))
+                for data in rows
+            ])
+            created = {user.username: user for user in users}
+
+            StudentProfile.objects.bulk_create([
+                StudentProfile(user=created[data['username']], grade_level=data['grade_level'])
+                for data in new_students
+            ])
+            profiles = TutorProfile.objects.bulk_create([
+                TutorProfile(user=created[data['username']], bio=data['bio'],
+                             hourly_rate=data['hourly_rate'], rating=data['rating'])
+                for data in new_tutors
+            ])
+            TutorProfile.subjects.through.objects.bulk_create([
+                TutorProfile.subjects.through(tutorprofile_id=profile.id, subject_id=subjects[name])
+                for profile, data in zip(profiles, new_tutors)
+                for name in data['subjects']
+            ])
+            for user in users:
+                self.stdout.write(f'Created {user.role}: {user.username}')
+
+            # Create Lesson Requests (yalnızca öğrenciler ve eğitmenler ilk kez oluşturulduğunda)
+            lessons = []
+            if len(new_students) == len(students_data) and len(new_tutors) == len(tutors_data):
+                students = [created[data['username']] for data in students_data]
+                tutors = [created[data['username']] for data in tutors_data]
+                now = datetime.now(pytz.UTC)
+                lesson_requests_data = [
+                    (students[0], tutors[0], 'Mathematics', timedelta(days=1, hours=10), 60, 'pending'),
+                    (students[1], tutors[1], 'Chemistry', timedelta(days=2, hours=14), 90, 'accepted'),
+                    (students[0], tutors[2], 'English', timedelta(days=3, hours=16), 60, 'rejected'),
+                ]
+                for student, tutor, subject, offset, duration, status in lesson_requests_data:
+                    lesson = LessonRequest(student=student, tutor=tutor, subject_id=subjects[subject],
+                                           start_time=now + offset, duration_minutes=duration, status=status)
+                    lesson.compute_end_time()
+                    lessons.append(lesson)
+                for lesson in LessonRequest.objects.bulk_create(lessons):
+                    self.stdout.write(f'Created lesson request: {lesson}')
+
+            # Sinyallerin yapacağı konu maskesi, arama indeksi ve katalog önbelleği güncellemesi
+            subject_index.rebuild([profile.id for profile in profiles])
+            search.reindex_tutors([profile.user_id for profile in profiles])
+        caching.bump_version('tutors', 'subjects')
+
         self.stdout.write(
             self.style.SUCCESS('Successfully seeded database!')
         )
-        self.stdout.write(f'Created {len(subjects)} subjects')
-        self.stdout.write(f'Created {len(students)} students')
-        self.stdout.write(f'Created {len(tutors)} tutors')
-        self.stdout.write(f'Created {len(lesson_requests_data)} lesson requests') 
\ No newline at end of file
+        self.stdout.write(f'Created {len(missing)} subjects')
+        self.stdout.write(f'Created {len(new_students)} students')
+        self.stdout.write(f'Created {len(new_tutors)} tutors')
+        self.stdout.write(f'Created {len(lessons)} lesson requests')
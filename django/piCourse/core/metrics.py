@@ -0,0 +1,191 @@
+"""
+In-process request metrics exposed in Prometheus text format.
+
+``MetricsMiddleware`` times every request, counts its queries and DB time
+through ``connection.execute_wrapper`` and records response size and
+throttling (429). Async views run their queries on sync_to_async threads;
+there the count comes from ``context_query_timer``, a wrapper core.signals
+installs on every connection, which adds to the timer of the request whose
+context (copied into the thread by sync_to_async) it runs in. Per-request numbers are collected without locking and
+folded into the shared ``registry`` under a single lock at the end.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # son hücre +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)  # (view, method, status) -> count
+        self.latency = {}  # (view, method) -> Histogram
+        self.queries = {}  # view -> Histogram
+        self.db_seconds = defaultdict(float)
+        self.response_bytes = defaultdict(int)
+        self.throttled = defaultdict(int)
+
+    def record(self, view, method, status, seconds, queries, db_seconds, size):
+        with self.lock:
+            self.requests[(view, method, status)] += 1
+            self.latency.setdefault((view, method), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            if queries is not None:
+                self.queries.setdefault(view, Histogram(QUERY_BUCKETS)).observe(queries)
+            self.db_seconds[view] += db_seconds
+            if size is not None:
+                self.response_bytes[view] += size
+            if status == 429:
+                self.throttled[view] += 1
+
+    def render(self):
+        lines = []
+        with self.lock:
+            _counter(lines, 'picourse_requests_total', 'Requests served.',
+                     ('view', 'method', 'status'), self.requests)
+            _histogram(lines, 'picourse_request_duration_seconds', 'Request latency.',
+                       ('view', 'method'), self.latency)
+            _histogram(lines, 'picourse_db_queries', 'SQL queries per request.', ('view',), self.queries)
+            _counter(lines, 'picourse_db_duration_seconds_total', 'Time spent in SQL.',
+                     ('view',), self.db_seconds)
+            _counter(lines, 'picourse_response_bytes_total', 'Response body bytes.',
+                     ('view',), self.response_bytes)
+            _counter(lines, 'picourse_throttled_total', 'Requests rejected by throttling.',
+                     ('view',), self.throttled)
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _labels(names, key, extra=None):
+    values = key if isinstance(key, tuple) else (key,)
+    pairs = list(zip(names, values)) + (extra or [])
+    return ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for name, value in pairs)
+
+
+def _counter(lines, name, help_text, names, values):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{_labels(names, key)}}} {value}')
+
+
+def _histogram(lines, name, help_text, names, series):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, hist in sorted(series.items()):
+        cumulative = 0
+        for bound, count in zip(list(hist.buckets) + ['+Inf'], hist.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{_labels(names, key, [("le", bound)])}}} {cumulative}')
+        lines.append(f'{name}_sum{{{_labels(names, key)}}} {hist.sum}')
+        lines.append(f'{name}_count{{{_labels(names, key)}}} {hist.count}')
+
+
+class QueryTimer:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+query_timer_var = ContextVar('metrics_query_timer', default=None)
+
+
+def context_query_timer(execute, sql, params, many, context):
+    timer = query_timer_var.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection):
+    if context_query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(context_query_timer)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        # Async view'ların sorguları sync_to_async iş parçacığında, oradaki bağlantıda çalışır;
+        # sayım o iş parçacığına kopyalanan bağlam üzerinden bu isteğin zamanlayıcısına eklenir
+        timer = QueryTimer()
+        token = query_timer_var.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            query_timer_var.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    @staticmethod
+    def record(request, response, elapsed, timer):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, request.method, response.status_code, elapsed,
+            timer.count if timer else None, timer.seconds if timer else 0.0, size,
+        )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; only reachable from METRICS_ALLOWED_IPS."""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
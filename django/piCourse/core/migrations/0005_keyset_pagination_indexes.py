@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_lessonrequest_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lessonrequest',
+            index=models.Index(fields=['tutor', 'created_at', 'id'], name='lr_tutor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonrequest',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='lr_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['rating', 'user'], name='tutorprofile_rating_user_idx'),
+        ),
+    ]
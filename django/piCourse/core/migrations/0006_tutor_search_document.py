@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+FTS_TABLE = 'tutor_search_fts'
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(name, bio, subjects, tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def backfill_documents(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    TutorSearchDocument = apps.get_model('core', 'TutorSearchDocument')
+    use_fts = schema_editor.connection.vendor == 'sqlite'
+
+    tutors = User.objects.filter(role='tutor').select_related('tutor_profile')
+    for user in tutors:
+        profile = getattr(user, 'tutor_profile', None)
+        document = TutorSearchDocument.objects.create(
+            user=user,
+            name=f"{user.first_name} {user.last_name}".strip() or user.username,
+            bio=profile.bio if profile else '',
+            subjects=' '.join(profile.subjects.values_list('name', flat=True)) if profile else '',
+        )
+        if use_fts:
+            schema_editor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, bio, subjects) VALUES (%s, %s, %s, %s)",
+                [document.user_id, document.name, document.bio, document.subjects],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorSearchDocument',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('name', models.CharField(blank=True, max_length=301)),
+                ('bio', models.TextField(blank=True)),
+                ('subjects', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'tutor_search_documents',
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
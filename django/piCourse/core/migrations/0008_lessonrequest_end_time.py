@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:49
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_end_time(apps, schema_editor):
+    LessonRequest = apps.get_model('core', 'LessonRequest')
+    batch = []
+    for lesson in LessonRequest.objects.filter(end_time__isnull=True).only('start_time', 'duration_minutes').iterator():
+        lesson.end_time = lesson.start_time + timedelta(minutes=lesson.duration_minutes)
+        batch.append(lesson)
+        if len(batch) >= 1000:
+            LessonRequest.objects.bulk_update(batch, ['end_time'])
+            batch = []
+    if batch:
+        LessonRequest.objects.bulk_update(batch, ['end_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonrequest',
+            name='end_time',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lessonrequest',
+            index=models.Index(fields=['tutor', 'start_time', 'end_time'], name='lr_tutor_start_end_idx'),
+        ),
+        migrations.RunPython(backfill_end_time, migrations.RunPython.noop),
+    ]
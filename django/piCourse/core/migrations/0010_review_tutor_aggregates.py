@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:26
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_completed_lessons(apps, schema_editor):
+    # Sonrasında sayaç core.reviews tarafından artımlı tutulur
+    LessonRequest = apps.get_model('core', 'LessonRequest')
+    TutorProfile = apps.get_model('core', 'TutorProfile')
+    counts = (
+        LessonRequest.objects.filter(status='completed')
+        .values_list('tutor_id').annotate(total=models.Count('id')).order_by()
+    )
+    for tutor_id, total in counts:
+        TutorProfile.objects.filter(user_id=tutor_id).update(completed_lessons=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'reviews',
+            },
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['rating_count', 'user'], name='tutorprofile_rcount_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(fields=['completed_lessons', 'user'], name='tutorprofile_done_user_idx'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='lesson_request',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review', to='core.lessonrequest'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews_given', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='tutor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews_received', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['tutor', 'created_at', 'id'], name='review_tutor_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(condition=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='review_rating_range'),
+        ),
+        migrations.RunPython(backfill_completed_lessons, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:38
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+SLOTS = 63
+
+
+def backfill_subject_masks(apps, schema_editor):
+    # Sonrasında maskeler core.subject_index tarafından m2m_changed ile tutulur
+    Subject = apps.get_model('core', 'Subject')
+    TutorProfile = apps.get_model('core', 'TutorProfile')
+    Through = TutorProfile.subjects.through
+    for slot, pk in enumerate(Subject.objects.order_by('pk').values_list('pk', flat=True)[:SLOTS]):
+        Subject.objects.filter(pk=pk).update(index_bit=slot)
+    bits = (
+        Through.objects.filter(tutorprofile_id=models.OuterRef('pk'), subject__index_bit__isnull=False)
+        .values('tutorprofile_id')
+        .annotate(mask=models.Sum(models.Value(1, models.BigIntegerField()).bitleftshift(models.F('subject__index_bit'))))
+        .values('mask')
+    )
+    TutorProfile.objects.update(subject_mask=Coalesce(models.Subquery(bits), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_review_tutor_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='index_bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='subject_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_subject_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:13
+
+from django.db import IntegrityError, migrations, models
+
+MAX_LESSON_MINUTES = 480
+
+
+def check_durations(apps, schema_editor):
+    # Sınır dışı satırlar kısıttan önce raporlanır; gerçek süreleri bilinmediğinden kırpılmaz
+    LessonRequest = apps.get_model('core', 'LessonRequest')
+    invalid = LessonRequest.objects.exclude(duration_minutes__gt=0, duration_minutes__lte=MAX_LESSON_MINUTES)
+    ids = list(invalid.order_by('id').values_list('id', flat=True)[:20])
+    if ids:
+        raise IntegrityError(
+            f'{invalid.count()} lesson request(s) have a duration outside 1..{MAX_LESSON_MINUTES} minutes '
+            f'(ids: {", ".join(map(str, ids))}). Correct or split them, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_task_queue'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_durations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lessonrequest',
+            constraint=models.CheckConstraint(condition=models.Q(('duration_minutes__gt', 0), ('duration_minutes__lte', 480)), name='lr_duration_range'),
+        ),
+    ]
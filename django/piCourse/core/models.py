@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -8,11 +11,42 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # TutorListView / TutorDetailView: role='tutor'
+            models.Index(fields=['role'], name='user_role_idx'),
+            # login ve kayıt: email ile arama
+            models.Index(fields=['email'], name='user_email_idx'),
+        ]
+        constraints = [
+            # Login email'i kullanıcıya tekil olarak çözebilsin; boş email (ör. createsuperuser) serbest
+            models.UniqueConstraint(fields=['email'], condition=~models.Q(email=''), name='user_email_unique'),
+        ]
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # core.auth token kullanıcısı: ertelenmiş alanlardan birine ilk erişimde
+        # alan alan sorgu atmak yerine satırın kalanı tek sorguda yüklenir
+        if fields is not None and getattr(self, 'token_claims', None) is not None:
+            deferred = self.get_deferred_fields()
+            if deferred.issuperset(fields):
+                fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+    def create_profile(self):
+        """Create the profile for this user's role, if it has one; the user must already be saved."""
+        if self.role == 'student':
+            return StudentProfile.objects.create(user=self)
+        if self.role == 'tutor':
+            return TutorProfile.objects.create(user=self)
+        return None
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
 class Subject(models.Model):
     name = models.CharField(max_length=100)
+    # TutorProfile.subject_mask içindeki biti (core.subject_index); slotlar dolunca boş kalır
+    index_bit = models.PositiveSmallIntegerField(null=True, unique=True, editable=False)
 
     def __str__(self):
         return self.name
@@ -21,12 +55,68 @@ class TutorProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="tutor_profile")
     bio = models.TextField(blank=True)
     hourly_rate = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    # rating = rating_sum / rating_count; değerlendirme geldikçe core.reviews tarafından
+    # F ifadeleriyle artırılır (ilk değerlendirmeye kadar mevcut değer korunur)
     rating = models.FloatField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False)
     subjects = models.ManyToManyField(Subject, related_name="tutors", blank=True)
+    # Konuların Subject.index_bit bitleri; m2m_changed ile core.subject_index tarafından tutulur
+    subject_mask = models.BigIntegerField(default=0, editable=False)
+
+    # core.reviews ve core.subject_index'in F ifadeleriyle yerinde güncellediği alanlar
+    AGGREGATE_FIELDS = ('rating', 'rating_sum', 'rating_count', 'completed_lessons', 'subject_mask')
+
+    class Meta:
+        indexes = [
+            # TutorListView keyset sıralaması: (-rating, -user_id)
+            models.Index(fields=['rating', 'user'], name='tutorprofile_rating_user_idx'),
+            # ?ordering=rating_count / completed_lessons ve ?min_reviews= filtresi
+            models.Index(fields=['rating_count', 'user'], name='tutorprofile_rcount_user_idx'),
+            models.Index(fields=['completed_lessons', 'user'], name='tutorprofile_done_user_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_aggregates = {
+            name: instance.__dict__[name] for name in cls.AGGREGATE_FIELDS if name in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Yüklendiğinden beri değişmeyen toplamlar yazılmaz: profil düzenlemesi, arada
+        # kaydedilen bir değerlendirmenin artışını eski değerlerle ezmesin
+        loaded = getattr(self, '_loaded_aggregates', None)
+        if loaded and not self._state.adding and kwargs.get('update_fields') is None:
+            untouched = {name for name, value in loaded.items() if getattr(self, name) == value}
+            if untouched:
+                deferred = self.get_deferred_fields()
+                kwargs['update_fields'] = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name not in untouched and f.attname not in deferred
+                ]
+        super().save(*args, **kwargs)
+        self._loaded_aggregates = {name: getattr(self, name) for name in self.AGGREGATE_FIELDS}
 
     def __str__(self):
         return f"Tutor: {self.user.username}"
 
+class TutorSearchDocument(models.Model):
+    """Denormalized tutor search document kept in sync by core.signals."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    name = models.CharField(max_length=301, blank=True)
+    bio = models.TextField(blank=True)
+    subjects = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tutor_search_documents'
+
+    def __str__(self):
+        return f"Search: {self.name}"
+
 class StudentProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="student_profile")
     grade_level = models.CharField(max_length=50, blank=True, null=True)
@@ -35,6 +125,27 @@ class StudentProfile(models.Model):
         return f"Student: {self.user.username}"
 
 
+# Ders süresi üst sınırı; core.scheduling çakışma sorgusunda start_time için alt sınır verir, böylece
+# (tutor, start_time, end_time) indeksi iki taraflı aralık olarak taranır. Daha uzun bir satır çakışmaları
+# gizleyeceği için lr_duration_range kısıtıyla veritabanında da zorunlu tutulur.
+MAX_LESSON_MINUTES = 8 * 60
+
+
+class LessonRequestQuerySet(models.QuerySet):
+    def with_names(self):
+        """
+        Join tutor, student and subject in the same query, loading only the
+        columns LessonRequestSerializer's *_name fields read.
+        """
+        return self.select_related('tutor', 'student', 'subject').only(
+            'id', 'tutor', 'student', 'subject', 'start_time', 'duration_minutes',
+            'status', 'note', 'created_at', 'updated_at',
+            'tutor__first_name', 'tutor__last_name',
+            'student__first_name', 'student__last_name',
+            'subject__name',
+        )
+
+
 class LessonRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -48,13 +159,110 @@ class LessonRequest(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     start_time = models.DateTimeField()
     duration_minutes = models.IntegerField()
+    # start_time + duration_minutes; çakışma sorguları için save() içinde hesaplanır
+    end_time = models.DateTimeField(null=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     note = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LessonRequestQuerySet.as_manager()
+
     class Meta:
         db_table = 'lesson_requests'
+        indexes = [
+            # LessonRequestListCreateView keyset sıralaması: (-created_at, -id)
+            models.Index(fields=['tutor', 'created_at', 'id'], name='lr_tutor_created_idx'),
+            models.Index(fields=['student', 'created_at', 'id'], name='lr_student_created_idx'),
+            # ?status= filtresi
+            models.Index(fields=['tutor', 'status', 'created_at'], name='lr_tutor_status_created_idx'),
+            models.Index(fields=['student', 'status', 'created_at'], name='lr_student_status_created_idx'),
+            # core.scheduling çakışma ve müsaitlik sorguları
+            models.Index(fields=['tutor', 'start_time', 'end_time'], name='lr_tutor_start_end_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(duration_minutes__gt=0, duration_minutes__lte=MAX_LESSON_MINUTES),
+                name='lr_duration_range',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # core.signals tamamlanan ders sayacı için: kayıttan önceki eğitmen ve durum
+        instance._loaded_completion = (instance.__dict__.get('tutor_id'), instance.__dict__.get('status'))
+        return instance
+
+    def compute_end_time(self):
+        if self.start_time is not None and self.duration_minutes is not None:
+            self.end_time = self.start_time + timedelta(minutes=self.duration_minutes)
+        return self.end_time
+
+    def save(self, *args, **kwargs):
+        self.compute_end_time()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'start_time', 'duration_minutes'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'end_time'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.student} - {self.tutor} - {self.subject} - {self.start_time}"
+
+
+class Review(models.Model):
+    """
+    A student's rating of one completed lesson. Reviews are not edited once
+    created (core.signals folds them into the tutor's running totals on
+    create and delete only); delete and re-create to change a rating.
+    """
+    lesson_request = models.OneToOneField(LessonRequest, on_delete=models.CASCADE, related_name='review')
+    tutor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews_received')
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews_given')
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'reviews'
+        indexes = [
+            # TutorReviewListView keyset sıralaması: (-created_at, -id)
+            models.Index(fields=['tutor', 'created_at', 'id'], name='review_tutor_created_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(rating__gte=1, rating__lte=5), name='review_rating_range'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} -> {self.tutor}: {self.rating}"
+
+
+class Task(models.Model):
+    """A queued call of a core.tasks task; deleted once it succeeds."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # queued: en erken çalışma zamanı (geri çekilme dahil); running: kiranın bittiği an,
+    # sonrasında çökmüş bir işçinin görevi başka işçi tarafından yeniden alınır
+    run_at = models.DateTimeField()
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tasks'
+        indexes = [
+            # core.tasks.claim: status IN (queued, running) AND run_at <= now ORDER BY run_at
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.student} - {self.tutor} - {self.subject} - {self.start_time}"
\ No newline at end of file
+        return f"{self.name} ({self.status})"
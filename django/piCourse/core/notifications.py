@@ -0,0 +1,56 @@
+"""
+E-mail notifications of lesson request events, sent from the task queue.
+
+A new request is mailed to its tutor, a status change to its student.
+core.signals reports single saves and core.bulk the bulk endpoints through
+``lesson_events``, which queues one task per batch (core.tasks); the mails
+go out from the worker after the write commits, so the request never waits
+on SMTP.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from . import tasks
+from .models import LessonRequest
+
+
+def lesson_events(events):
+    """Queue notifications for ``(lesson_request_id, previous_status)`` pairs; None: newly created."""
+    if events:
+        send_lesson_emails.enqueue(events=[[lesson_id, previous] for lesson_id, previous in events])
+
+
+def _message(lesson, previous_status):
+    when = lesson.start_time.strftime('%Y-%m-%d %H:%M %Z')
+    if previous_status is None:
+        recipient = lesson.tutor
+        subject = f'New lesson request: {lesson.subject.name}'
+        body = (f'{lesson.student.get_full_name() or lesson.student.username} requested a '
+                f'{lesson.duration_minutes}-minute {lesson.subject.name} lesson on {when}.')
+    else:
+        recipient = lesson.student
+        subject = f'Lesson request {lesson.status}: {lesson.subject.name}'
+        body = (f'Your {lesson.subject.name} lesson on {when} with '
+                f'{lesson.tutor.get_full_name() or lesson.tutor.username} is now {lesson.status}.')
+    if not recipient.email:
+        return None
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient.email])
+
+
+@tasks.task()
+def send_lesson_emails(events):
+    lessons = LessonRequest.objects.select_related('tutor', 'student', 'subject').in_bulk(
+        [lesson_id for lesson_id, _ in events]
+    )
+    messages = []
+    for lesson_id, previous_status in events:
+        lesson = lessons.get(lesson_id)
+        # Silinmiş talep ya da arada tekrar değişip eski duruma dönen talep için mail yok
+        if lesson is None or lesson.status == previous_status:
+            continue
+        message = _message(lesson, previous_status)
+        if message is not None:
+            messages.append(message)
+    if messages:
+        # Tek SMTP bağlantısı
+        get_connection().send_messages(messages)
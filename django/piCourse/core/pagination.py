@@ -0,0 +1,276 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+async def apaginate_limit_offset(paginator, queryset, request):
+    """LimitOffsetPagination.paginate_queryset with acount() and async iteration."""
+    paginator.request = request
+    paginator.limit = paginator.get_limit(request)
+    if paginator.limit is None:
+        return None
+    paginator.count = await queryset.acount()
+    paginator.offset = paginator.get_offset(request)
+    if paginator.count > paginator.limit and paginator.template is not None:
+        paginator.display_page_controls = True
+    if paginator.count == 0 or paginator.offset > paginator.count:
+        return []
+    return [obj async for obj in queryset[paginator.offset:paginator.offset + paginator.limit]]
+
+
+def keyset_ordering(queryset, default):
+    """
+    The keyset of ``queryset``: its effective ordering (``?ordering=``,
+    search relevance, ...) followed, unless it already ends with a unique
+    field, by the unique last field of ``default``; ``default`` itself when
+    the queryset is unordered. None when the ordering contains expressions,
+    which a cursor cannot carry.
+    """
+    if not default:
+        return None
+    ordering = list(queryset.query.order_by)
+    if not ordering:
+        return tuple(default)
+    if not all(isinstance(field, str) and field.lstrip('-') != '?' for field in ordering):
+        return None
+    try:
+        unique = ordering_field(queryset, ordering[-1].lstrip('-')).unique
+    except FieldDoesNotExist:
+        unique = False
+    tiebreak = default[-1]
+    if not unique and tiebreak.lstrip('-') not in {field.lstrip('-') for field in ordering}:
+        ordering.append(tiebreak)
+    return tuple(ordering)
+
+
+def ordering_field(queryset, name):
+    """Model field (or annotation output field) an ordering path ends at."""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    model, field = queryset.model, None
+    for part in name.split('__'):
+        if model is None:
+            raise FieldDoesNotExist(name)
+        field = model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+class CursorValueEncoder(json.JSONEncoder):
+    """DjangoJSONEncoder datetime'ı milisaniyeye kırpar; keyset için tam hassasiyet gerekir."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return str(o)
+        return super().default(o)
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset by default, keyset (cursor) pagination on request.
+
+    Clients opt in with ``?pagination=cursor`` and then follow the ``next`` /
+    ``previous`` links, which carry an opaque ``cursor`` parameter. The view
+    declares a stable compound ordering in ``keyset_ordering`` (last field
+    must be unique), so every page is a single indexed range scan and no
+    ``COUNT(*)`` is issued. When a filter has ordered the queryset (e.g.
+    ``?ordering=``), pages follow that ordering with the view's last field
+    as the tiebreak; the cursor records the ordering it was issued for.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    mode_cursor = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    invalid_ordering_message = 'This ordering cannot be paginated with a cursor; drop pagination=cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.prepare_keyset(queryset, request, view)
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.finish_keyset(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for core.async_views, on the async ORM."""
+        page_queryset = self.prepare_keyset(queryset, request, view)
+        if not self.use_keyset:
+            return await apaginate_limit_offset(self, queryset, request)
+        if page_queryset is None:
+            return None
+        return self.finish_keyset([obj async for obj in page_queryset])
+
+    def prepare_keyset(self, queryset, request, view):
+        """Decide the mode and, in keyset mode, build the page query (limit + 1 rows)."""
+        default = getattr(view, 'keyset_ordering', None)
+        self.use_keyset = bool(default) and (
+            request.query_params.get(self.mode_query_param) == self.mode_cursor
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.use_keyset:
+            return None
+        self.keyset_ordering = keyset_ordering(queryset, default)
+        if self.keyset_ordering is None:
+            raise ValidationError({self.mode_query_param: [self.invalid_ordering_message]})
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+
+        self.cursor_values, self.reverse = self.decode_cursor(request)
+        if self.cursor_values is not None:
+            self.cursor_values = self.coerce_cursor(queryset, self.cursor_values)
+        ordering = self.keyset_ordering
+        if self.reverse:
+            ordering = [self._flip(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor_values is not None:
+            queryset = queryset.filter(self._after(ordering, self.cursor_values))
+        return queryset[:self.limit + 1]
+
+    def finish_keyset(self, results):
+        values = self.cursor_values
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if self.reverse:
+            results.reverse()
+
+        # İleri yönde "sonraki" sayfa ancak fazladan satır geldiyse vardır;
+        # geri yönde ise geldiğimiz sayfa her zaman "sonraki" olarak kalır.
+        self.has_next = has_more if not self.reverse else values is not None
+        self.has_previous = values is not None if not self.reverse else has_more
+        self.first_position = self._position(results[0]) if results else None
+        self.last_position = self._position(results[-1]) if results else None
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_keyset:
+            return super().get_next_link()
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_keyset:
+            return super().get_previous_link()
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['description'] = (
+            'Omitted when ?pagination=cursor is used.'
+        )
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        if getattr(view, 'keyset_ordering', None):
+            parameters += [
+                {
+                    'name': self.mode_query_param,
+                    'required': False,
+                    'in': 'query',
+                    'description': 'Set to "cursor" to switch to keyset pagination.',
+                    'schema': {'type': 'string', 'enum': [self.mode_cursor]},
+                },
+                {
+                    'name': self.cursor_query_param,
+                    'required': False,
+                    'in': 'query',
+                    'description': 'Opaque cursor taken from the next/previous link.',
+                    'schema': {'type': 'string'},
+                },
+            ]
+        return parameters
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'v': position, 'r': int(reverse), 'o': self.keyset_ordering}, cls=CursorValueEncoder)
+        token = b64encode(payload.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(b64decode(token.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            reverse = bool(payload.get('r'))
+            ordering = payload.get('o', self.keyset_ordering)
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.keyset_ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Başka bir sıralama için verilmiş imleç bu sayfalarda geçersiz
+        if not isinstance(ordering, list) or tuple(ordering) != tuple(self.keyset_ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def coerce_cursor(self, queryset, values):
+        """Cursor values as the Python values of their ordering fields; a forged cursor is a 404."""
+        coerced = []
+        for field, value in zip(self.keyset_ordering, values):
+            try:
+                value = ordering_field(queryset, field.lstrip('-')).to_python(value)
+            except (DjangoValidationError, FieldDoesNotExist, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            # Sıralama alanları NOT NULL; None ile aralık koşulu kurulamaz
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            coerced.append(value)
+        return coerced
+
+    def _position(self, instance):
+        if isinstance(instance, dict):
+            # core.fastpath: .values() satırı, sıralama yolları anahtar olarak projekte edilir
+            return [instance[field.lstrip('-')] for field in self.keyset_ordering]
+        position = []
+        for field in self.keyset_ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(ordering, values):
+        """(a, b) > (x, y) koşulunu a > x OR (a = x AND b > y) olarak kurar."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
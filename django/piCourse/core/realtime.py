@@ -0,0 +1,375 @@
+"""
+Lesson request events pushed to clients over WebSocket.
+
+``/ws/lesson-requests/`` is served by piCourse/asgi.py next to the Django
+application. It takes the REST API's SimpleJWT access tokens, in an
+``Authorization: Bearer`` header or a ``?token=`` query parameter for
+clients that cannot set headers; without a valid token the handshake is
+refused. The tutor and the student of a lesson request then receive one
+JSON text message per event:
+
+    {"type": "lesson_request.created" | "lesson_request.updated",
+     "previous_status": null | "pending" | ...,
+     "lesson_request": {...}}
+
+``lesson_request`` has the list endpoint's representation, so clients
+update the row in place instead of re-fetching ``/api/lesson-requests/``.
+``{"type": "resync"}`` means events were dropped for a slow client and the
+list should be reloaded once. ``{"type": "ping"}`` is answered with
+``{"type": "pong"}``. The socket closes with code 4401 when the token
+expires; reconnect with a refreshed one.
+
+core.signals and core.bulk report writes through ``lesson_events``, which
+publishes after commit. Every process keeps a ``Hub`` of its own sockets;
+the broker (settings.REALTIME['BROKER']) carries events to the hubs:
+
+* ``LocalBroker`` - hands events to this process's hub directly; enough
+  for a single ASGI process, and costs nothing while no socket is open.
+* ``SQLiteBroker`` - appends events to a SQLite file shared by the
+  processes on the host, each of which polls it; a local stand-in for a
+  pub/sub server when several workers serve sockets.
+"""
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from . import fastpath, sparse
+from .auth import ClaimsJWTAuthentication, token_user
+from .models import LessonRequest
+from .renderers import ORJSONRenderer
+from .serializers import LessonRequestSerializer
+
+logger = logging.getLogger(__name__)
+
+PATH = '/ws/lesson-requests/'
+TOKEN_EXPIRED = 4401
+
+DEFAULTS = {
+    'BROKER': 'core.realtime.LocalBroker',
+    # SQLiteBroker: None ise varsayılan SQLite veritabanının yanındaki "<NAME>-realtime" dosyası
+    'LOCATION': None,
+    # Bağlantı başına bekleyen en fazla mesaj; aşılırsa istemciye "resync" gider
+    'QUEUE_SIZE': 100,
+    'POLL_INTERVAL': 0.2,
+}
+
+_hub = None
+_broker = None
+_lock = threading.Lock()
+
+
+def get_realtime_settings():
+    return {**DEFAULTS, **getattr(settings, 'REALTIME', {})}
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _lock:
+            if _hub is None:
+                _hub = Hub(get_realtime_settings()['QUEUE_SIZE'])
+    return _hub
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _lock:
+            if _broker is None:
+                config = get_realtime_settings()
+                _broker = import_string(config['BROKER'])(config['LOCATION'])
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_realtime(setting, **kwargs):
+    global _hub, _broker
+    if setting == 'REALTIME':
+        _hub = _broker = None
+
+
+def _encode(message):
+    return ORJSONRenderer().render(message).decode()
+
+
+RESYNC = _encode({'type': 'resync'})
+PONG = _encode({'type': 'pong'})
+
+
+class Subscription:
+    """One socket's queue of encoded messages, fed from any thread."""
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def deliver(self, message):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(message)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # Olay döngüsü kapanmış: bağlantı zaten bitti
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Yavaş istemci: bekleyen olaylar atılır, istemci listeyi bir kez yeniden yükler
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class Hub:
+    """In-process fan-out: open sockets by user id."""
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self.lock:
+            self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self.lock:
+            self.subscribers[user_id].discard(subscription)
+            if not self.subscribers[user_id]:
+                del self.subscribers[user_id]
+
+    def __bool__(self):
+        return bool(self.subscribers)
+
+    def publish(self, user_ids, message):
+        with self.lock:
+            targets = [subscription for user_id in user_ids for subscription in self.subscribers.get(user_id, ())]
+        for subscription in targets:
+            subscription.deliver(message)
+
+
+class BaseBroker:
+    def publish(self, user_ids, message):
+        """Deliver the encoded ``message`` to the sockets of ``user_ids`` in every process."""
+        raise NotImplementedError
+
+    def has_listeners(self):
+        """False only when no socket anywhere could receive an event (publishing is then skipped)."""
+        return True
+
+    def start(self, hub):
+        """Called when this process opens a socket."""
+
+    def stop(self, hub):
+        """Called when this process closes its last socket."""
+
+
+class LocalBroker(BaseBroker):
+    def __init__(self, location=None):
+        pass
+
+    def publish(self, user_ids, message):
+        get_hub().publish(user_ids, message)
+
+    def has_listeners(self):
+        return bool(get_hub())
+
+
+class SQLiteBroker(BaseBroker):
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS events ('
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, recipients TEXT NOT NULL, message TEXT NOT NULL)'
+    )
+    # Tüm işlemlerin okuduğu olaylar bir süre sonra silinir
+    RETENTION = 60
+    PRUNE_PROBABILITY = 0.01
+
+    def __init__(self, location=None):
+        self.location = location or self.default_location()
+        self.conn = None
+        self.conn_lock = threading.Lock()
+        self.poller = None
+
+    @staticmethod
+    def default_location():
+        connection = connections['default']
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            return str(settings.BASE_DIR / 'realtime.sqlite3')
+        return f"{connection.settings_dict['NAME']}-realtime"
+
+    def execute(self, sql, params=()):
+        with self.conn_lock:
+            if self.conn is None:
+                self.conn = sqlite3.connect(self.location, timeout=5, isolation_level=None, check_same_thread=False)
+                self.conn.execute('PRAGMA journal_mode=WAL')
+                self.conn.execute(self.SCHEMA)
+            return self.conn.execute(sql, params).fetchall()
+
+    def publish(self, user_ids, message):
+        now = time.time()
+        self.execute('INSERT INTO events (created, recipients, message) VALUES (?, ?, ?)',
+                     (now, json.dumps(sorted(user_ids)), message))
+        if random.random() < self.PRUNE_PROBABILITY:
+            self.execute('DELETE FROM events WHERE created < ?', (now - self.RETENTION,))
+
+    def start(self, hub):
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.get_running_loop().create_task(self.poll(hub))
+
+    def stop(self, hub):
+        if self.poller is not None and not hub:
+            self.poller.cancel()
+            self.poller = None
+
+    async def poll(self, hub):
+        rows = await asyncio.to_thread(self.execute, 'SELECT COALESCE(MAX(id), 0) FROM events')
+        last = rows[0][0]
+        interval = get_realtime_settings()['POLL_INTERVAL']
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                rows = await asyncio.to_thread(
+                    self.execute, 'SELECT id, recipients, message FROM events WHERE id > ? ORDER BY id', (last,))
+            except sqlite3.Error:
+                logger.warning('realtime.poll_failed', exc_info=True)
+                continue
+            for last, recipients, message in rows:
+                hub.publish(json.loads(recipients), message)
+
+
+def lesson_events(events):
+    """Push ``(lesson_request_id, previous_status)`` events (None: created) once the transaction commits."""
+    if events:
+        transaction.on_commit(partial(publish_lesson_events, list(events)))
+
+
+def publish_lesson_events(events):
+    broker = get_broker()
+    if not broker.has_listeners():
+        return
+    names = sparse.selected_fields(LessonRequestSerializer, None)
+    builder = fastpath.get_row_builder(LessonRequestSerializer, names)
+    rows = builder.project(LessonRequest.objects.filter(id__in=[lesson_id for lesson_id, _ in events]))
+    lessons = {row['id']: row for row in builder.render(list(rows))}
+    for lesson_id, previous_status in events:
+        lesson = lessons.get(lesson_id)
+        if lesson is None:
+            continue
+        message = _encode({
+            'type': 'lesson_request.created' if previous_status is None else 'lesson_request.updated',
+            'previous_status': previous_status,
+            'lesson_request': lesson,
+        })
+        try:
+            broker.publish({lesson['tutor'], lesson['student']}, message)
+        except Exception:
+            # Yayın hatası yazma isteğini bozmaz; istemci yeniden bağlanınca listeyi yükler
+            logger.warning('realtime.publish_failed', exc_info=True, extra={'lesson_request_id': lesson_id})
+
+
+def _raw_token(scope):
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization':
+            parts = value.decode('latin1').split()
+            if len(parts) == 2 and parts[0] == 'Bearer':
+                return parts[1]
+    tokens = parse_qs(scope.get('query_string', b'').decode()).get('token')
+    return tokens[0] if tokens else None
+
+
+async def authenticate(scope):
+    """``(user_id, expires_at)`` for the socket's access token, or None."""
+    raw = _raw_token(scope)
+    if raw is None:
+        return None
+    authentication = ClaimsJWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw)
+        if authentication.has_claims(token):
+            user = token_user(token)
+        else:
+            user = await sync_to_async(authentication.get_user)(token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    return user.pk, token['exp']
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for ``websocket`` scopes."""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    identity = await authenticate(scope) if scope['path'] == PATH else None
+    if identity is None:
+        # Kabulden önce kapatmak el sıkışmayı HTTP 403 ile reddeder
+        await send({'type': 'websocket.close'})
+        return
+
+    user_id, expires_at = identity
+    hub, broker = get_hub(), get_broker()
+    subscription = hub.subscribe(user_id)
+    broker.start(hub)
+    try:
+        await send({'type': 'websocket.accept'})
+        await _serve(receive, send, subscription, expires_at)
+    finally:
+        hub.unsubscribe(user_id, subscription)
+        broker.stop(hub)
+
+
+async def _serve(receive, send, subscription, expires_at):
+    receiving = asyncio.ensure_future(receive())
+    delivering = asyncio.ensure_future(subscription.queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {receiving, delivering}, timeout=max(0, expires_at - time.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                await send({'type': 'websocket.close', 'code': TOKEN_EXPIRED})
+                return
+            if receiving in done:
+                message = receiving.result()
+                if message['type'] == 'websocket.disconnect':
+                    return
+                if _is_ping(message.get('text')):
+                    await send({'type': 'websocket.send', 'text': PONG})
+                receiving = asyncio.ensure_future(receive())
+            if delivering in done:
+                await send({'type': 'websocket.send', 'text': delivering.result()})
+                delivering = asyncio.ensure_future(subscription.queue.get())
+    finally:
+        receiving.cancel()
+        delivering.cancel()
+
+
+def _is_ping(text):
+    try:
+        return json.loads(text or 'null') == {'type': 'ping'}
+    except ValueError:
+        return False
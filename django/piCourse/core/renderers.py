@@ -0,0 +1,155 @@
+"""
+orjson-backed JSON renderer and parser for the REST API.
+
+``ORJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` with
+the default ``UNICODE_JSON``/``COMPACT_JSON`` settings: datetimes, dates,
+times and UUIDs are encoded natively by orjson in the format DRF's encoder
+uses, and everything else orjson does not know (Decimal, timedelta, lazy
+strings, querysets) goes through DRF's encoder as ``default``. The few
+outputs where orjson and the stdlib differ are rendered by DRF instead:
+
+- floats the stdlib writes in exponent form (below 1e-4 or from 1e16 up),
+  found with one scan of the output;
+- integers wider than 64 bits and non-string dict keys, which orjson
+  rejects;
+- pretty printing (``Accept: application/json; indent=4``, the browsable
+  API) and non-default JSON settings.
+
+Non-finite floats are the one difference: orjson writes them as ``null``
+where DRF's strict mode raises.
+
+``ORJSONParser`` parses request bodies with orjson and hands anything it
+rejects, and numbers too long for orjson's 64-bit integers, to DRF's
+parser, so results and error messages stay the same. Without orjson
+installed both classes behave exactly like their DRF parents.
+
+``NDJSONRenderer`` and ``CSVRenderer`` serve the export endpoints: besides
+``render`` they encode an iterable of row chunks lazily (``render_rows``)
+for a StreamingHttpResponse.
+"""
+import csv
+import io
+
+from django.conf import settings
+from rest_framework import parsers, renderers
+
+try:
+    import orjson
+except ImportError:  # isteğe bağlı bağımlılık: DRF'in json tabanlı sınıflarına düşülür
+    orjson = None
+
+# Stdlib'in üslü yazdığı float'lar orjson çıktısında "<rakam>e" ya da "0.0000" olarak görünür.
+# Rakamlar '0'a, 'e' kendisine, diğer her bayt boşluğa çevrilip tek bir alt dizi aranır (regex'ten
+# birkaç kat hızlı); metin içindeki eşleşmeler yalnızca yavaş yola düşürür.
+_DIGITS_AND_E = bytes(0x30 if 0x30 <= byte <= 0x39 else byte if byte == 0x65 else 0x20 for byte in range(256))
+_LONG_NUMBER = b'0' * 19
+_LINE_SEPARATORS = (b'\xe2\x80\xa8', b'\xe2\x80\xa9')
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer with orjson encoding; byte-identical output."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'0e' in ret.translate(_DIGITS_AND_E) or b'0.0000' in ret:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer ile aynı: U+2028/U+2029 JavaScript uyumu için kaçışlanır
+        if _LINE_SEPARATORS[0] in ret or _LINE_SEPARATORS[1] in ret:
+            ret = ret.replace(_LINE_SEPARATORS[0], b'\\u2028').replace(_LINE_SEPARATORS[1], b'\\u2029')
+        return ret
+
+
+class ORJSONParser(parsers.JSONParser):
+    """JSONParser with orjson decoding."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        # orjson 64 bite sığmayan tamsayıları float'a çevirir: 19+ basamaklı sayılar DRF'e bırakılır
+        if _LONG_NUMBER in body.translate(_DIGITS_AND_E):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Hata mesajları DRF'inkiyle aynı kalsın
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class _Echo:
+    """File-like object for csv.writer that returns the written line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return '; '.join(str(item) for item in value)
+    return value
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """One JSON document per line (``application/x-ndjson``)."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.render_rows([data if isinstance(data, list) else [data]]))
+
+    def render_rows(self, chunks, columns=None):
+        """Encode each chunk (a list of dicts) as one bytestring of lines."""
+        dumps = ORJSONRenderer().render
+        for chunk in chunks:
+            yield b''.join(dumps(row) + b'\n' for row in chunk)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    CSV with a header row. ``columns`` name the fields to write; a dotted
+    name (``review.rating``) reads a key of a nested dict.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(self.render_rows([rows], list(rows[0]) if rows else []))
+
+    def render_rows(self, chunks, columns=None):
+        writer = csv.writer(_Echo())
+        paths = [column.split('.') for column in columns]
+        yield writer.writerow(columns).encode(self.charset)
+        for chunk in chunks:
+            lines = []
+            for row in chunk:
+                values = []
+                for path in paths:
+                    value = row.get(path[0])
+                    for key in path[1:]:
+                        value = value.get(key) if value is not None else None
+                    values.append(_csv_value(value))
+                lines.append(writer.writerow(values))
+            yield ''.join(lines).encode(self.charset)
@@ -0,0 +1,83 @@
+"""
+Running tutor totals for reviews and completed lessons.
+
+``TutorProfile.rating_sum``/``rating_count``/``completed_lessons`` are
+counters: every change is applied as one ``UPDATE ... SET x = x + n`` with
+F expressions, so concurrent reviews never lose an increment and nothing
+re-aggregates the reviews or lesson requests tables. ``rating`` is derived
+from the new sum and count in the same statement, which keeps it a plain
+indexed column for TutorListView's ordering and ``min_rating`` filter.
+
+core.signals calls these for Review create/delete and LessonRequest
+save/delete; callers that bypass signals (bulk_update, queryset.update)
+must call ``record_completed`` themselves. ``recompute_totals`` rebuilds
+the counters from the reviews and lesson requests tables; it is a
+background task (core.tasks), queued from the TutorProfile admin.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from . import caching, tasks
+from .models import LessonRequest, Review, TutorProfile
+
+COMPLETED = 'completed'
+
+
+def _rating(rating_sum, rating_count):
+    # Son değerlendirme silinirse 0/0 yerine 0
+    return Coalesce(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), 0.0)
+
+
+def apply_rating(tutor_id, rating, count=1):
+    """Add (or with ``count=-1`` remove) one rating of ``rating`` stars."""
+    rating_sum = F('rating_sum') + rating * count
+    rating_count = F('rating_count') + count
+    TutorProfile.objects.filter(user_id=tutor_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=_rating(rating_sum, rating_count),
+    )
+    # Önbellek sürümü yazma commit edildikten sonra değişir
+    transaction.on_commit(lambda: caching.bump_version('tutors'))
+
+
+def completed_deltas(changes):
+    """
+    Net change of completed lessons per tutor for ``(tutor_before,
+    status_before, tutor_after, status_after)`` transitions; ``None``
+    entries stand for a missing row (creation or deletion).
+    """
+    deltas = Counter()
+    for tutor_before, status_before, tutor_after, status_after in changes:
+        if status_before == COMPLETED:
+            deltas[tutor_before] -= 1
+        if status_after == COMPLETED:
+            deltas[tutor_after] += 1
+    return {tutor_id: delta for tutor_id, delta in deltas.items() if delta}
+
+
+def record_completed(changes):
+    deltas = completed_deltas(changes)
+    for tutor_id, delta in deltas.items():
+        TutorProfile.objects.filter(user_id=tutor_id).update(completed_lessons=F('completed_lessons') + delta)
+    if deltas:
+        transaction.on_commit(lambda: caching.bump_version('tutors'))
+
+
+@tasks.task()
+def recompute_totals(tutor_ids=None):
+    """Re-aggregate the totals of ``tutor_ids`` (every tutor when None) from the source tables."""
+    profiles = TutorProfile.objects.all() if tutor_ids is None else TutorProfile.objects.filter(user_id__in=tutor_ids)
+    ratings = Review.objects.filter(tutor_id=OuterRef('user_id')).values('tutor_id')
+    completed = LessonRequest.objects.filter(tutor_id=OuterRef('user_id'), status=COMPLETED).values('tutor_id')
+    profiles.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+        completed_lessons=Coalesce(Subquery(completed.annotate(total=Count('id')).values('total')), 0),
+    )
+    # Değerlendirmesi olmayan eğitmenin (seed/admin ile verilmiş) puanı korunur
+    profiles.filter(rating_count__gt=0).update(rating=_rating(F('rating_sum'), F('rating_count')))
+    transaction.on_commit(lambda: caching.bump_version('tutors'))
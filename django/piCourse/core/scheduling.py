@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import locking
+from .models import MAX_LESSON_MINUTES, LessonRequest, User
+
+# Reddedilen talepler takvimde yer tutmaz
+BLOCKING_STATUSES = ('pending', 'accepted', 'completed')
+
+MAX_AVAILABILITY_DAYS = 31
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Tutor already has a lesson in this time slot.'
+    default_code = 'booking_conflict'
+
+
+def lock_tutor(tutor_id):
+    """
+    Serialize bookings per tutor for the rest of the transaction.
+
+    Backends with SELECT ... FOR UPDATE lock the tutor's row. SQLite has no
+    row locks; there the database write lock is taken (core.locking), so
+    call this before the transaction reads anything.
+    """
+    lock_tutors([tutor_id])
+
+
+def lock_tutors(tutor_ids):
+    """lock_tutor for several tutors, in id order so concurrent callers cannot deadlock."""
+    if not connection.features.has_select_for_update:
+        # Veritabanı kilidi tüm eğitmenleri kapsar; bir kez alınması yeterli
+        locking.write_lock(connection)
+        return
+    for tutor_id in sorted(tutor_ids):
+        list(User.objects.select_for_update().filter(pk=tutor_id).values_list('pk', flat=True))
+
+
+def bookings_between(tutor_id, start, end):
+    """Blocking lessons of the tutor that intersect [start, end), as one range scan."""
+    return LessonRequest.objects.filter(
+        tutor_id=tutor_id,
+        start_time__gt=start - timedelta(minutes=MAX_LESSON_MINUTES),
+        start_time__lt=end,
+        end_time__gt=start,
+        status__in=BLOCKING_STATUSES,
+    )
+
+
+def ensure_free(tutor_id, start, end, exclude_id=None):
+    """Raise BookingConflict if the tutor already has a blocking lesson in [start, end)."""
+    conflicts = bookings_between(tutor_id, start, end)
+    if exclude_id is not None:
+        conflicts = conflicts.exclude(pk=exclude_id)
+    if conflicts.exists():
+        raise BookingConflict()
+
+
+def free_slots(tutor_id, start, end, min_minutes=0):
+    """
+    Free intervals of the tutor inside [start, end).
+
+    Bookings are read once, sorted by start_time, and swept in a single pass:
+    overlapping bookings are merged on the fly and every gap at least
+    ``min_minutes`` long is emitted.
+    """
+    bookings = (
+        bookings_between(tutor_id, start, end)
+        .order_by('start_time')
+        .values_list('start_time', 'end_time')
+    )
+    min_gap = timedelta(minutes=min_minutes)
+    slots = []
+    cursor = start
+    for booked_start, booked_end in bookings.iterator():
+        if booked_start - cursor >= min_gap and booked_start > cursor:
+            slots.append({'start': cursor, 'end': booked_start})
+        cursor = max(cursor, booked_end)
+    if end - cursor >= min_gap and end > cursor:
+        slots.append({'start': cursor, 'end': end})
+    return slots
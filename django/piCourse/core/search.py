@@ -0,0 +1,235 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import CharField, FloatField, OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import TutorSearchDocument, User
+
+FTS_TABLE = 'tutor_search_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+DEFAULTS = {
+    'BACKEND': None,  # None: SQLite'ta FTS5, diğer veritabanlarında DatabaseSearchBackend
+}
+
+
+class BaseSearchBackend:
+    """Interface every tutor search backend implements."""
+
+    def index(self, document):
+        raise NotImplementedError
+
+    def index_many(self, documents):
+        for document in documents:
+            self.index(document)
+
+    def remove(self, user_id):
+        raise NotImplementedError
+
+    def search(self, query, limit):
+        """Return tutor ids matching ``query``, best match first."""
+        raise NotImplementedError
+
+    def filter(self, queryset, query, rank=False):
+        """
+        Narrow a User ``queryset`` to the tutors matching ``query`` inside the
+        database, so counting and pagination see the whole match set; with
+        ``rank``, annotate ``search_rank`` (lower is a better match).
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Portable fallback: matches every term as a substring of the single
+    denormalized document table, so no join fan-out, but still a scan.
+    """
+
+    def index(self, document):
+        pass
+
+    def remove(self, user_id):
+        pass
+
+    def search(self, query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        return list(self.documents(terms).order_by('name').values_list('user_id', flat=True)[:limit])
+
+    def filter(self, queryset, query, rank=False):
+        documents = self.documents(tokenize(query))
+        queryset = queryset.filter(id__in=documents.values('user_id'))
+        if not rank:
+            return queryset
+        return queryset.annotate(
+            search_rank=Subquery(documents.filter(user_id=OuterRef('id')).values('name'), output_field=CharField()),
+        )
+
+    @staticmethod
+    def documents(terms):
+        qs = TutorSearchDocument.objects.all()
+        for term in terms:
+            qs = qs.filter(
+                Q(name__icontains=term) | Q(subjects__icontains=term) | Q(bio__icontains=term)
+            )
+        return qs
+
+    def clear(self):
+        pass
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    SQLite FTS5 index keyed by ``rowid = user_id``. Every query term is
+    matched as a prefix and results are ranked with bm25, weighting name
+    above subjects above bio.
+    """
+    weights = (10.0, 1.0, 5.0)  # name, bio, subjects
+
+    def index(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document.user_id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, bio, subjects) VALUES (%s, %s, %s, %s)',
+                [document.user_id, document.name, document.bio, document.subjects],
+            )
+
+    def index_many(self, documents):
+        rows = [(d.user_id, d.name, d.bio, d.subjects) for d in documents]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [row[:1] for row in rows])
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, name, bio, subjects) VALUES (%s, %s, %s, %s)', rows)
+
+    def remove(self, user_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [user_id])
+
+    @property
+    def rank(self):
+        return 'bm25({}, {}, {}, {})'.format(FTS_TABLE, *self.weights)
+
+    @staticmethod
+    def match(terms):
+        return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+    def search(self, query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY {self.rank} LIMIT %s',
+                [self.match(terms), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def filter(self, queryset, query, rank=False):
+        match = self.match(tokenize(query))
+        queryset = queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+        if not rank:
+            return queryset
+        # Kullanıcı tablosu dış sorgunun kök tablosudur; takma adı tablo adıdır
+        user_id = '{}.{}'.format(*map(connection.ops.quote_name, (queryset.model._meta.db_table, 'id')))
+        # Skorlar tek FTS taramasında hesaplanıp materyalize edilir (SQLite 3.35+); satır başına MATCH
+        # ya da FTS tablosuyla JOIN, istatistiksiz planlayıcıda binlerce eşleşmede saniyeler sürer
+        return queryset.annotate(search_rank=RawSQL(
+            f'WITH ranks AS MATERIALIZED (SELECT rowid AS id, {self.rank} AS rank FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s) SELECT rank FROM ranks WHERE ranks.id = {user_id}',
+            [match], output_field=FloatField(),
+        ))
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query or '')
+
+
+def get_search_settings():
+    return {**DEFAULTS, **getattr(settings, 'TUTOR_SEARCH', {})}
+
+
+def get_backend():
+    path = get_search_settings()['BACKEND']
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTS5Backend()
+    return DatabaseSearchBackend()
+
+
+def build_document(user):
+    profile = getattr(user, 'tutor_profile', None)
+    document = TutorSearchDocument(user=user)
+    document.name = f"{user.first_name} {user.last_name}".strip() or user.username
+    if profile is not None:
+        document.bio = profile.bio
+        document.subjects = ' '.join(profile.subjects.values_list('name', flat=True))
+    return document
+
+
+def reindex_tutors(user_ids):
+    """Rebuild the search document of the given tutors (non-tutors are dropped)."""
+    backend = get_backend()
+    user_ids = set(user_ids)
+    tutors = User.objects.filter(id__in=user_ids, role='tutor').select_related('tutor_profile')
+    for user in tutors:
+        document = build_document(user)
+        document.save()
+        backend.index(document)
+        user_ids.discard(user.id)
+    for user_id in user_ids:
+        remove_tutor(user_id)
+
+
+def remove_tutor(user_id):
+    deleted, _ = TutorSearchDocument.objects.filter(user_id=user_id).delete()
+    if deleted:
+        get_backend().remove(user_id)
+
+
+def rebuild_index():
+    backend = get_backend()
+    backend.clear()
+    TutorSearchDocument.objects.all().delete()
+    ids = User.objects.filter(role='tutor').values_list('id', flat=True)
+    reindex_tutors(list(ids))
+
+
+class TutorSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for SearchFilter on TutorListView. Resolves ``?search=``
+    through the search backend inside the query, so ``count`` and every page
+    cover all matches, and, unless an explicit ``?ordering=`` is given, orders
+    by relevance (``search_rank``, which cursor pagination can page through).
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not tokenize(query):
+            return queryset
+
+        if request.query_params.get(self.ordering_param):
+            return get_backend().filter(queryset, query)
+        return get_backend().filter(queryset, query, rank=True).order_by('search_rank', '-id')
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Prefix search over tutor name, bio and subjects.',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,378 @@
+"""
+Synthetic datasets at load-testing scale.
+
+``seed_volume`` writes subjects, tutors (with profiles, subject masks,
+subjects and search documents), students and lesson requests straight
+into their tables with batched multi-row INSERTs. Primary keys are reserved up front,
+so every batch can be generated on its own: with ``workers > 1`` row
+generation fans out over a process pool and the parent process only
+writes. All users share one precomputed password hash and no per-row
+signals run; the state the signals would maintain (profiles, search
+index, completed-lesson counters, catalogue cache versions) is written
+here in bulk instead. Lesson requests are loaded with the table's
+secondary indexes dropped and rebuilt once at the end, which is far
+cheaper than maintaining eight B-trees row by row.
+
+Every batch has its own random seed, so the same arguments produce the
+same dataset whatever the worker count, and benchmark baselines taken on
+it stay comparable.
+"""
+import functools
+import multiprocessing
+import random
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Index, Max
+
+from . import caching, search, subject_index
+from .models import LessonRequest, StudentProfile, Subject, TutorProfile, TutorSearchDocument, User
+
+DEFAULT_PASSWORD = 'testpass123'
+
+FIRST_NAMES = (
+    'Ada', 'Alan', 'Ayşe', 'Barış', 'Can', 'Deniz', 'Ece', 'Elif', 'Emre', 'Grace', 'Hasan', 'Irmak',
+    'John', 'Jane', 'Kerem', 'Leyla', 'Linus', 'Mehmet', 'Merve', 'Nora', 'Oğuz', 'Selin', 'Tuna', 'Zeynep',
+)
+LAST_NAMES = (
+    'Aksoy', 'Brown', 'Demir', 'Doğan', 'Erdem', 'Johnson', 'Kaya', 'Lovelace', 'Öztürk', 'Smith',
+    'Şahin', 'Turing', 'Wilson', 'Yıldız', 'Yılmaz',
+)
+SUBJECT_NAMES = (
+    'Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'History', 'Geography', 'Literature',
+    'Music', 'Art', 'Philosophy', 'Economics', 'Programming', 'Statistics', 'German', 'French',
+)
+BIOS = (
+    'Experienced {subject} teacher with {years}+ years of experience',
+    '{subject} tutor focusing on exam preparation',
+    'University lecturer in {subject}, patient and structured lessons',
+    'Former olympiad student, teaches {subject} with practice problems',
+)
+GRADE_LEVELS = ('9th Grade', '10th Grade', '11th Grade', '12th Grade', 'University')
+
+# Oluşturma senaryosunun kullandığı gelecekteki aralıkla çakışmasın diye
+# tohum dersleri bugünün ±LESSON_SPAN_DAYS çevresine dağıtılır
+LESSON_SPAN_DAYS = 180
+
+# Havuz süreçlerine fork ile aktarılan, tohumlama boyunca sabit girdiler
+_state = {}
+
+
+class Table:
+    """Column order and database-ready values for raw INSERTs into ``model``'s table."""
+
+    def __init__(self, model, with_pk=True):
+        self.model = model
+        self.fields = [f for f in model._meta.concrete_fields if with_pk or not f.primary_key]
+        self.defaults = {f.attname: f.get_default() for f in self.fields}
+        self.converters = None
+
+    def compile(self):
+        # Field.get_db_prep_save değer başına bağlantı vekilinden geçer ve satır üretimine hâkim olur;
+        # dönüşüm gereken tipler için backend adaptörü bir kez seçilir, diğerleri olduğu gibi bağlanır
+        ops = connections['default'].ops
+        converters = []
+        for f in self.fields:
+            internal_type = f.get_internal_type()
+            if internal_type == 'DateTimeField':
+                # Üretilen zamanlar saat hassasiyetinde; az sayıda farklı değer tekrar tekrar dönüştürülmez
+                converters.append(functools.lru_cache(maxsize=65536)(ops.adapt_datetimefield_value))
+            elif internal_type == 'DecimalField':
+                converters.append(
+                    lambda value, f=f: ops.adapt_decimalfield_value(value, f.max_digits, f.decimal_places)
+                )
+            else:
+                converters.append(None)
+        self.converters = list(zip([f.attname for f in self.fields], converters))
+
+    def row(self, values):
+        if self.converters is None:
+            self.compile()
+        defaults = self.defaults
+        return tuple(
+            (convert(values.get(name, defaults[name])) if convert else values.get(name, defaults[name]))
+            for name, convert in self.converters
+        )
+
+    def insert(self, rows):
+        if not rows:
+            return
+        qn = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            qn(self.model._meta.db_table),
+            ', '.join(qn(f.column) for f in self.fields),
+            ', '.join(['%s'] * len(self.fields)),
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+USERS = Table(User)
+TUTOR_PROFILES = Table(TutorProfile)
+TUTOR_SUBJECTS = Table(TutorProfile.subjects.through, with_pk=False)
+SEARCH_DOCUMENTS = Table(TutorSearchDocument)
+STUDENT_PROFILES = Table(StudentProfile)
+LESSON_REQUESTS = Table(LessonRequest)
+
+
+def _batches(total, size):
+    for index, start in enumerate(range(0, total, size)):
+        yield index, start, min(size, total - start)
+
+
+def _next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def _map(func, tasks, workers):
+    """``map`` over a fork-started process pool, in task order; serial when workers <= 1 or fork is unavailable."""
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        yield from map(func, tasks)
+        return
+    # Alt süreçler veritabanına dokunmaz; açık bağlantı fork ile paylaşılmasın
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        yield from pool.imap(func, tasks)
+
+
+def _tune_connection():
+    # Yeniden üretilebilir veri: SQLite'ta her toplu işlemde fsync beklenmez, indeks
+    # sayfaları için büyük bir önbellek kullanılır (yalnızca bu bağlantı için)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+            cursor.execute('PRAGMA cache_size = -262144')
+
+
+def _secondary_indexes(model):
+    """Non-unique indexes on ``model``'s table as they exist in the database, as ``Index`` objects."""
+    names = {f.column: f.name for f in model._meta.concrete_fields}
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    indexes = []
+    for name, info in constraints.items():
+        if not info['index'] or info['unique'] or info['primary_key'] or not info['columns']:
+            continue
+        if not all(column in names for column in info['columns']):
+            continue  # ifade indeksleri olduğu gibi kalır
+        orders = info.get('orders') or ['ASC'] * len(info['columns'])
+        indexes.append(Index(
+            fields=[('-' if order == 'DESC' else '') + names[column] for column, order in zip(info['columns'], orders)],
+            name=name,
+        ))
+    return indexes
+
+
+@contextmanager
+def _deferred_indexes(model):
+    """Drop ``model``'s secondary indexes for a bulk load and recreate them, under their own names, afterwards."""
+    indexes = _secondary_indexes(model)
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(model, index)
+
+
+def _rng(kind, index):
+    return random.Random(f"{_state['random_seed']}:{kind}:{index}")
+
+
+def _user(rng, user_id, username, role):
+    """The user's row and display name."""
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    row = USERS.row({
+        'id': user_id,
+        'username': username,
+        'email': f'{username}@example.com',
+        'first_name': first_name,
+        'last_name': last_name,
+        'role': role,
+        'password': _state['password_hash'],
+        'date_joined': _state['now'],
+    })
+    return row, f'{first_name} {last_name}'
+
+
+def _tutor_batch(task):
+    index, start, size = task
+    rng = _rng('tutors', index)
+    subject_ids, subject_names, subject_bits = _state['subject_ids'], _state['subject_names'], _state['subject_bits']
+    users, profiles, links, documents, chosen_subjects = [], [], [], [], []
+    for n in range(start, start + size):
+        user_id = _state['user_base'] + n
+        username = f"{_state['prefix']}_tutor_{n}"
+        row, name = _user(rng, user_id, username, 'tutor')
+        users.append(row)
+        chosen = rng.sample(subject_ids, k=min(len(subject_ids), rng.randint(1, 3)))
+        chosen_subjects.append(chosen)
+        count = rng.randint(0, 40)
+        rating_sum = sum(rng.randint(3, 5) for _ in range(count))
+        profile_id = _state['tutor_profile_base'] + n
+        bio = rng.choice(BIOS).format(subject=subject_names[chosen[0]], years=rng.randint(2, 20))
+        profiles.append(TUTOR_PROFILES.row({
+            'id': profile_id,
+            'user_id': user_id,
+            'bio': bio,
+            'hourly_rate': Decimal(rng.randrange(2000, 15000)) / 100,
+            'rating_sum': rating_sum,
+            'rating_count': count,
+            'rating': rating_sum / count if count else 0.0,
+            'subject_mask': subject_index.bits_of(subject_bits[s] for s in chosen if s in subject_bits),
+        }))
+        links += [TUTOR_SUBJECTS.row({'tutorprofile_id': profile_id, 'subject_id': s}) for s in chosen]
+        documents.append((user_id, name, bio, ' '.join(subject_names[s] for s in chosen)))
+    return users, profiles, links, documents, chosen_subjects
+
+
+def _student_batch(task):
+    index, start, size = task
+    rng = _rng('students', index)
+    users, profiles = [], []
+    for m in range(start, start + size):
+        user_id = _state['user_base'] + _state['tutors'] + m
+        users.append(_user(rng, user_id, f"{_state['prefix']}_student_{m}", 'student')[0])
+        profiles.append(STUDENT_PROFILES.row({
+            'id': _state['student_profile_base'] + m,
+            'user_id': user_id,
+            'grade_level': rng.choice(GRADE_LEVELS),
+        }))
+    return users, profiles
+
+
+def _lesson_batch(task):
+    index, start, size = task
+    rng = _rng('lessons', index)
+    now = _state['now']
+    tutors, students = _state['tutors'], _state['students']
+    tutor_subjects, user_base = _state['tutor_subjects'], _state['user_base']
+    rows, completed = [], Counter()
+    for k in range(start, start + size):
+        n = rng.randrange(tutors)
+        start_time = now + timedelta(hours=rng.randint(-24 * LESSON_SPAN_DAYS, 24 * LESSON_SPAN_DAYS))
+        if start_time < now:
+            status = rng.choices(('completed', 'rejected'), weights=(4, 1))[0]
+        else:
+            status = rng.choice(('pending', 'accepted', 'rejected'))
+        duration = rng.choice((45, 60, 90))
+        rows.append(LESSON_REQUESTS.row({
+            'id': _state['lesson_base'] + k,
+            'tutor_id': user_base + n,
+            'student_id': user_base + tutors + rng.randrange(students),
+            'subject_id': rng.choice(tutor_subjects[n]),
+            'start_time': start_time,
+            'duration_minutes': duration,
+            'end_time': start_time + timedelta(minutes=duration),
+            'status': status,
+            'created_at': now,
+            'updated_at': now,
+        }))
+        if status == 'completed':
+            completed[user_base + n] += 1
+    return rows, completed
+
+
+def seed_volume(subjects=16, tutors=1000, students=1000, lessons=10000, batch_size=5000,
+                password=DEFAULT_PASSWORD, prefix='load', random_seed=0, workers=1, log=None):
+    """
+    Create the given number of rows and return the counts. Usernames are
+    ``<prefix>_tutor_<n>`` / ``<prefix>_student_<n>``; callers should check
+    the prefix is unused first. Nothing else may write to these tables
+    while it runs, since primary keys are assigned here.
+    """
+    log = log or (lambda message: None)
+    if not tutors or not students:
+        lessons = 0
+
+    subject_objs = Subject.objects.bulk_create(subject_index.assign_bits([
+        Subject(name=SUBJECT_NAMES[i % len(SUBJECT_NAMES)] + ('' if i < len(SUBJECT_NAMES) else f' {i}'))
+        for i in range(subjects)
+    ]))
+    log(f'{len(subject_objs)} subjects')
+    if not subject_objs:
+        tutors = lessons = 0
+
+    _state.clear()
+    _state.update(
+        random_seed=random_seed,
+        prefix=prefix,
+        # Tek bir hash hesaplanır, tüm kullanıcılar paylaşır
+        password_hash=make_password(password),
+        now=datetime.now(dt_timezone.utc).replace(minute=0, second=0, microsecond=0),
+        subject_ids=[subject.id for subject in subject_objs],
+        subject_names={subject.id: subject.name for subject in subject_objs},
+        subject_bits={subject.id: subject.index_bit for subject in subject_objs if subject.index_bit is not None},
+        tutors=tutors,
+        students=students,
+        user_base=_next_id(User),
+        tutor_profile_base=_next_id(TutorProfile),
+        student_profile_base=_next_id(StudentProfile),
+        lesson_base=_next_id(LessonRequest),
+    )
+
+    tutor_subjects = []
+    backend = search.get_backend()
+    for users, profiles, links, documents, chosen in _map(_tutor_batch, _batches(tutors, batch_size), workers):
+        _tune_connection()
+        with transaction.atomic():
+            USERS.insert(users)
+            TUTOR_PROFILES.insert(profiles)
+            TUTOR_SUBJECTS.insert(links)
+            SEARCH_DOCUMENTS.insert([
+                SEARCH_DOCUMENTS.row({'user_id': user_id, 'name': name, 'bio': bio, 'subjects': names,
+                                      'updated_at': _state['now']})
+                for user_id, name, bio, names in documents
+            ])
+            backend.index_many([
+                TutorSearchDocument(user_id=user_id, name=name, bio=bio, subjects=names)
+                for user_id, name, bio, names in documents
+            ])
+        tutor_subjects += chosen
+        log(f'{len(tutor_subjects)}/{tutors} tutors')
+
+    created = 0
+    for users, profiles in _map(_student_batch, _batches(students, batch_size), workers):
+        _tune_connection()
+        with transaction.atomic():
+            USERS.insert(users)
+            STUDENT_PROFILES.insert(profiles)
+        created += len(users)
+        log(f'{created}/{students} students')
+
+    _state['tutor_subjects'] = tutor_subjects
+    completed, created = Counter(), 0
+    with _deferred_indexes(LessonRequest) if lessons > batch_size else nullcontext():
+        for rows, batch_completed in _map(_lesson_batch, _batches(lessons, batch_size), workers):
+            _tune_connection()
+            with transaction.atomic():
+                LESSON_REQUESTS.insert(rows)
+            completed.update(batch_completed)
+            created += len(rows)
+            log(f'{created}/{lessons} lesson requests')
+
+    # core.reviews sayacı: aynı toplamı alan eğitmenler tek UPDATE ile yazılır
+    by_total = {}
+    for tutor_id, total in completed.items():
+        by_total.setdefault(total, []).append(tutor_id)
+    with transaction.atomic():
+        for total, ids in by_total.items():
+            for _, start, size in _batches(len(ids), batch_size):
+                TutorProfile.objects.filter(user_id__in=ids[start:start + size]).update(completed_lessons=total)
+
+        # Birincil anahtarlar elle verildi; dizisi olan veritabanlarında (PostgreSQL) diziler ileri alınır
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, TutorProfile, StudentProfile, LessonRequest]):
+                cursor.execute(sql)
+
+    _state.clear()
+    caching.bump_version('tutors', 'subjects')
+    return {'subjects': len(subject_objs), 'tutors': tutors, 'students': students, 'lesson_requests': lessons}
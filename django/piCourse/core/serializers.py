@@ -1,6 +1,13 @@
+from datetime import timedelta
+
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.utils import model_meta
 from django.contrib.auth import get_user_model
-from .models import TutorProfile, StudentProfile, Subject, LessonRequest
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .models import TutorProfile, StudentProfile, Subject, LessonRequest, Review
+from . import scheduling
+from .sparse import SparseFieldsMixin
 
 User = get_user_model()
 
@@ -32,7 +39,11 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             role=role,
         )
         user.set_password(password)
-        user.save()
+        # Profil kullanıcıyla birlikte ya oluşturulur ya hiç; post_save sinyali ikinci kez oluşturmaz
+        user.defer_profile = True
+        with transaction.atomic():
+            user.save()
+            user.create_profile()
         return user
 
 class LoginRequestSerializer(serializers.Serializer):
@@ -43,12 +54,34 @@ class TokenPairSerializer(serializers.Serializer):
     access = serializers.CharField()
     refresh = serializers.CharField()
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Subject
         fields = ['id', 'name']
 
-class TutorProfileSerializer(serializers.ModelSerializer):
+class ChangedFieldsUpdateMixin:
+    """
+    ``update`` that saves only the fields whose values actually changed,
+    with ``update_fields``, and skips the UPDATE when none did.
+    """
+
+    def update(self, instance, validated_data):
+        serializers.raise_errors_on_nested_writes('update', self, validated_data)
+        relations = model_meta.get_field_info(instance).relations
+        changed, many_to_many = [], {}
+        for attr, value in validated_data.items():
+            if attr in relations and relations[attr].to_many:
+                many_to_many[attr] = value
+            elif getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                changed.append(attr)
+        if changed:
+            instance.save(update_fields=changed)
+        for attr, value in many_to_many.items():
+            getattr(instance, attr).set(value)
+        return instance
+
+class TutorProfileSerializer(ChangedFieldsUpdateMixin, serializers.ModelSerializer):
     subjects = SubjectSerializer(many=True, read_only=False)
     hourly_rate = serializers.DecimalField(
         max_digits=8,
@@ -56,43 +89,151 @@ class TutorProfileSerializer(serializers.ModelSerializer):
         default=0.00,
         allow_null=False
     )
-    rating = serializers.FloatField(default=0.0, allow_null=False)
+    # Değerlendirmelerden türetilir (core.reviews); profil düzenlemesiyle değiştirilemez
+    rating = serializers.FloatField(read_only=True)
     bio = serializers.CharField(default='', allow_blank=True, allow_null=False)
 
     class Meta:
         model = TutorProfile
-        fields = ['bio', 'hourly_rate', 'rating', 'subjects']
+        fields = ['bio', 'hourly_rate', 'rating', 'rating_count', 'completed_lessons', 'subjects']
+        read_only_fields = ['rating_count', 'completed_lessons']
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(ChangedFieldsUpdateMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentProfile
         fields = ['grade_level']
 
-class TutorListSerializer(serializers.ModelSerializer):
+class TutorListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
     subjects = SubjectSerializer(source='tutor_profile.subjects', many=True, read_only=True)
     hourly_rate = serializers.DecimalField(source='tutor_profile.hourly_rate', max_digits=8, decimal_places=2)
     rating = serializers.FloatField(source='tutor_profile.rating')
+    rating_count = serializers.IntegerField(source='tutor_profile.rating_count')
+    completed_lessons = serializers.IntegerField(source='tutor_profile.completed_lessons')
     bio = serializers.CharField(source='tutor_profile.bio')
 
     class Meta:
         model = User
-        fields = ['id', 'name', 'subjects', 'hourly_rate', 'rating', 'bio']
+        fields = ['id', 'name', 'subjects', 'hourly_rate', 'rating', 'rating_count', 'completed_lessons', 'bio']
+        # ?fields= ile seçilen alanların okuduğu sütunlar ve ön yüklemeler (core.sparse)
+        field_sources = {
+            'name': ('first_name', 'last_name', 'username'),
+            'subjects': ('tutor_profile__id',),
+            'hourly_rate': ('tutor_profile__hourly_rate',),
+            'rating': ('tutor_profile__rating',),
+            'rating_count': ('tutor_profile__rating_count',),
+            'completed_lessons': ('tutor_profile__completed_lessons',),
+            'bio': ('tutor_profile__bio',),
+        }
+        field_prefetches = {'subjects': ('tutor_profile__subjects',)}
+
+    # *_from_values: get_* ile core.fastpath'in .values() satırları için ortak uygulama
+    @staticmethod
+    def name_from_values(first_name, last_name, username):
+        return f"{first_name} {last_name}".strip() or username
 
     def get_name(self, obj):
-        return f"{obj.first_name} {obj.last_name}".strip() or obj.username
+        return self.name_from_values(obj.first_name, obj.last_name, obj.username)
 
 class TutorDetailSerializer(TutorListSerializer):
     pass
 
 
-class LessonRequestSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    student_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Review
+        fields = ['id', 'lesson_request', 'tutor', 'student', 'student_name', 'rating', 'comment', 'created_at']
+        read_only_fields = ['id', 'lesson_request', 'tutor', 'student', 'student_name', 'created_at']
+        field_sources = {'student_name': ('student__username', 'student__first_name', 'student__last_name')}
+
+
+    def get_student_name(self, obj) -> str:
+        return f"{obj.student.first_name} {obj.student.last_name}".strip() or obj.student.username
+
+
+class LessonReviewSerializer(serializers.ModelSerializer):
+    """The review embedded in a lesson request with ``?expand=review``."""
+
+    class Meta:
+        model = Review
+        fields = ['id', 'rating', 'comment', 'created_at']
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    min_minutes = serializers.IntegerField(min_value=0, max_value=scheduling.MAX_LESSON_MINUTES, default=30)
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': 'end must be after start'})
+        if attrs['end'] - attrs['start'] > timedelta(days=scheduling.MAX_AVAILABILITY_DAYS):
+            raise serializers.ValidationError(
+                {'end': f'Range cannot exceed {scheduling.MAX_AVAILABILITY_DAYS} days'}
+            )
+        return attrs
+
+
+class LessonExportQuerySerializer(serializers.Serializer):
+    role = serializers.ChoiceField(choices=['student', 'tutor'], required=False)
+    status = serializers.CharField(
+        required=False, help_text='Comma separated statuses: pending, accepted, rejected, completed.',
+    )
+    start = serializers.DateTimeField(required=False, help_text='Lessons starting at or after.')
+    end = serializers.DateTimeField(required=False, help_text='Lessons starting before.')
+
+    def validate_status(self, value):
+        statuses = [part.strip() for part in value.split(',') if part.strip()]
+        allowed = {choice for choice, _ in LessonRequest.STATUS_CHOICES}
+        unknown = [item for item in statuses if item not in allowed]
+        if unknown:
+            raise serializers.ValidationError(f'Unknown status: {", ".join(unknown)}')
+        return statuses
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': 'end must be after start'})
+        return attrs
+
+
+class TimeSlotSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+
+class TutorAvailabilitySerializer(serializers.Serializer):
+    tutor = serializers.IntegerField()
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    slots = TimeSlotSerializer(many=True)
+
+
+class DeferredPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Accepts a primary key without fetching the row; the owning serializer
+    resolves it (see LessonRequestSerializer.validate).
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.queryset.model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class LessonRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tutor_name = serializers.SerializerMethodField()
     student_name = serializers.SerializerMethodField()
     subject_name = serializers.SerializerMethodField()
+    # Yalnızca ?expand=review ile; değerlendirilmemiş derslerde null
+    review = LessonReviewSerializer(read_only=True, allow_null=True)
 
     # Açıkça subject alanını tanımlayın
-    subject = serializers.PrimaryKeyRelatedField(
+    subject = DeferredPrimaryKeyRelatedField(
         queryset=Subject.objects.all(),
         required=True,
         error_messages={
@@ -102,7 +243,7 @@ class LessonRequestSerializer(serializers.ModelSerializer):
     )
 
     # Açıkça tutor alanını tanımlayın
-    tutor = serializers.PrimaryKeyRelatedField(
+    tutor = DeferredPrimaryKeyRelatedField(
         queryset=User.objects.filter(role='tutor'),
         required=True,
         error_messages={
@@ -116,32 +257,101 @@ class LessonRequestSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'tutor', 'student', 'subject', 'start_time',
             'duration_minutes', 'status', 'note', 'created_at',
-            'tutor_name', 'student_name', 'subject_name'
+            'tutor_name', 'student_name', 'subject_name', 'end_time', 'review',
         ]
-        read_only_fields = ['id', 'created_at', 'tutor_name', 'student_name', 'subject_name']
+        read_only_fields = [
+            'id', 'student', 'created_at', 'tutor_name', 'student_name', 'subject_name', 'end_time',
+        ]
+        expandable_fields = ['end_time', 'review']
+        field_sources = {
+            'tutor_name': ('tutor__first_name', 'tutor__last_name'),
+            'student_name': ('student__first_name', 'student__last_name'),
+            'subject_name': ('subject__name',),
+            'review': ('review__id', 'review__rating', 'review__comment', 'review__created_at'),
+        }
+
+    @staticmethod
+    def tutor_name_from_values(first_name, last_name):
+        return f"{first_name} {last_name}"
+
+    student_name_from_values = tutor_name_from_values
+
+    @staticmethod
+    def subject_name_from_values(name):
+        return name
 
     def get_tutor_name(self, obj):
-        return f"{obj.tutor.first_name} {obj.tutor.last_name}" if obj.tutor else ""
+        return self.tutor_name_from_values(obj.tutor.first_name, obj.tutor.last_name) if obj.tutor else ""
 
-    def get_student_name(self, obj):
-        return f"{obj.student.first_name} {obj.student.last_name}" if obj.student else ""
+    def get_student_name(self, obj) -> str:
+        return self.student_name_from_values(obj.student.first_name, obj.student.last_name) if obj.student else ""
 
     def get_subject_name(self, obj):
-        return obj.subject.name if obj.subject else ""
+        return self.subject_name_from_values(obj.subject.name) if obj.subject else ""
 
-    def validate_tutor(self, value):
-        if value.role != 'tutor':
-            raise serializers.ValidationError("Selected user is not a tutor")
+    def validate_duration_minutes(self, value):
+        if not 0 < value <= scheduling.MAX_LESSON_MINUTES:
+            raise serializers.ValidationError(
+                f"Duration must be between 1 and {scheduling.MAX_LESSON_MINUTES} minutes"
+            )
         return value
 
-    def validate_subject(self, value):
-        # Tutor bu konuyu öğretiyor mu kontrol et
-        tutor_id = self.initial_data.get('tutor')
-        if tutor_id:
-            try:
-                tutor = User.objects.get(id=tutor_id, role='tutor')
-                if hasattr(tutor, 'tutor_profile') and value not in tutor.tutor_profile.subjects.all():
-                    raise serializers.ValidationError("Tutor does not teach this subject")
-            except User.DoesNotExist:
-                pass
-        return value
\ No newline at end of file
+    def create(self, validated_data):
+        tutor = validated_data['tutor']
+        start = validated_data['start_time']
+        end = start + timedelta(minutes=validated_data['duration_minutes'])
+        with transaction.atomic():
+            scheduling.lock_tutor(tutor.id)
+            scheduling.ensure_free(tutor.id, start, end)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        was_blocking = instance.status in scheduling.BLOCKING_STATUSES
+        new_status = validated_data.get('status', instance.status)
+        moved = {'tutor', 'start_time', 'duration_minutes'} & validated_data.keys()
+        if new_status not in scheduling.BLOCKING_STATUSES or (was_blocking and not moved):
+            return super().update(instance, validated_data)
+
+        # Reddedilmiş bir talep yeniden açılıyor ya da zamanı değişiyor: takvimi kontrol et
+        tutor = validated_data.get('tutor', instance.tutor)
+        start = validated_data.get('start_time', instance.start_time)
+        end = start + timedelta(minutes=validated_data.get('duration_minutes', instance.duration_minutes))
+        with transaction.atomic():
+            scheduling.lock_tutor(tutor.id)
+            scheduling.ensure_free(tutor.id, start, end, exclude_id=instance.id)
+            return super().update(instance, validated_data)
+
+    def validate(self, attrs):
+        if 'tutor' not in attrs and 'subject' not in attrs:
+            return attrs
+
+        tutor_id = attrs.get('tutor', getattr(self.instance, 'tutor_id', None))
+        subject_id = attrs.get('subject', getattr(self.instance, 'subject_id', None))
+        attrs['tutor'], attrs['subject'] = self.resolve_tutor_subject(tutor_id, subject_id)
+        return attrs
+
+    def resolve_tutor_subject(self, tutor_id, subject_id):
+        """
+        Tutor varlığı, rolü ve konuyu öğretip öğretmediği TutorProfile.subjects
+        ara tablosu üzerinden tek bir indeksli sorguyla doğrulanır; eşleşen satır
+        yanıtta kullanılacak tutor ve subject nesnelerini de getirir.
+        """
+        link = (
+            TutorProfile.subjects.through.objects
+            .select_related('tutorprofile__user', 'subject')
+            .filter(
+                tutorprofile__user_id=tutor_id,
+                tutorprofile__user__role='tutor',
+                subject_id=subject_id,
+            )
+            .first()
+        )
+        if link is not None:
+            return link.tutorprofile.user, link.subject
+
+        # Hata yolu: hangi alanın hatalı olduğunu bulmak için ek sorgular
+        if not User.objects.filter(id=tutor_id, role='tutor').exists():
+            raise serializers.ValidationError({'tutor': self.fields['tutor'].error_messages['does_not_exist']})
+        if not Subject.objects.filter(id=subject_id).exists():
+            raise serializers.ValidationError({'subject': self.fields['subject'].error_messages['does_not_exist']})
+        raise serializers.ValidationError({'subject': "Tutor does not teach this subject"})
@@ -1,23 +1,155 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import StudentProfile, TutorProfile
+from .models import LessonRequest, Review, TutorProfile, Subject
+from . import caching, metrics, notifications, realtime, reviews, search, subject_index
 
 User = get_user_model()
 
+# Eğitmen kataloğunu (arama dokümanı, önbellek) etkileyen User alanları;
+# last_login gibi güncellemeler yeniden indeksleme/önbellek temizliği tetiklemez
+CATALOGUE_USER_FIELDS = {'first_name', 'last_name', 'username', 'role'}
+
+@receiver(connection_created)
+def track_async_queries(sender, connection, **kwargs):
+    """Async view sorgularının sayımı (core.metrics); her iş parçacığının bağlantısına bir kez eklenir"""
+    metrics.install_query_timer(connection)
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
-    """Create user profile when user is created"""
-    if created:
-        if instance.role == 'student':
-            StudentProfile.objects.create(user=instance)
-        elif instance.role == 'tutor':
-            TutorProfile.objects.create(user=instance)
+    """Create the profile of users created outside registration (create_user, admin)"""
+    # Profil yalnızca oluşturulurken yazılır; sonraki User kayıtları profile dokunmaz.
+    # UserRegistrationSerializer profili aynı transaction'da kendisi oluşturur.
+    if created and not getattr(instance, 'defer_profile', False):
+        instance.create_profile()
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the tutor search document in sync with name/role changes"""
+    # Yeni eğitmenler TutorProfile oluşturulurken indekslenir
+    if created or (update_fields and not CATALOGUE_USER_FIELDS.intersection(update_fields)):
+        return
+    if instance.role == 'tutor':
+        search.reindex_tutors([instance.id])
+    else:
+        search.remove_tutor(instance.id)
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    search.get_backend().remove(instance.id)
+
+@receiver(post_save, sender=TutorProfile)
+def index_tutor_profile(sender, instance, **kwargs):
+    search.reindex_tutors([instance.user_id])
+
+@receiver(m2m_changed, sender=TutorProfile.subjects.through)
+def index_tutor_subjects(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.reindex_tutors([instance.user_id])
+    elif pk_set:
+        user_ids = TutorProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)
+        search.reindex_tutors(list(user_ids))
+
+@receiver(m2m_changed, sender=TutorProfile.subjects.through)
+def collect_cleared_subject_tutors(sender, instance, action, reverse, **kwargs):
+    """subject.tutors.clear() post_clear'da pk_set vermez; etkilenen eğitmenleri önceden topla"""
+    if reverse and action == 'pre_clear':
+        instance._search_cleared_tutors = list(instance.tutors.values_list('user_id', flat=True))
+    elif reverse and action == 'post_clear':
+        search.reindex_tutors(getattr(instance, '_search_cleared_tutors', []))
+
+@receiver(m2m_changed, sender=TutorProfile.subjects.through)
+def update_subject_masks(sender, instance, action, reverse, pk_set, **kwargs):
+    """TutorProfile.subject_mask; ileri yönde pk_set konu, ters yönde profil id'leridir"""
+    if action == 'post_add':
+        subject_index.add_subjects(pk_set if reverse else [instance.pk], [instance.pk] if reverse else pk_set)
+    elif action == 'post_remove':
+        subject_index.remove_subjects(pk_set if reverse else [instance.pk], [instance.pk] if reverse else pk_set)
+    elif action == 'post_clear':
+        if reverse:
+            subject_index.remove_subjects(None, [instance.pk])
+        else:
+            subject_index.rebuild([instance.pk])
+
+@receiver(pre_save, sender=Subject)
+def assign_subject_bit(sender, instance, **kwargs):
+    if instance._state.adding:
+        subject_index.assign_bits([instance])
+
+@receiver(post_delete, sender=Subject)
+def clear_subject_bit(sender, instance, **kwargs):
+    """Silinen konunun biti, slot yeni bir konuya verilmeden önce maskelerden düşülür"""
+    if instance.index_bit is not None:
+        subject_index.clear_bits(TutorProfile.objects.all(), 1 << instance.index_bit)
+
+@receiver(post_save, sender=Subject)
+def index_subject_tutors(sender, instance, created, **kwargs):
+    if not created:
+        user_ids = instance.tutors.values_list('user_id', flat=True)
+        search.reindex_tutors(list(user_ids))
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_subjects(sender, **kwargs):
+    # Sürüm commit'ten önce değişirse eş zamanlı bir okuma eski satırları yeni sürümle önbelleğe alabilir
+    transaction.on_commit(lambda: caching.bump_version('subjects'))
+
+@receiver(post_save, sender=TutorProfile)
+@receiver(post_delete, sender=TutorProfile)
+@receiver(m2m_changed, sender=TutorProfile.subjects.through)
+def invalidate_tutors(sender, **kwargs):
+    transaction.on_commit(lambda: caching.bump_version('tutors'))
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save user profile when user is saved"""
-    if hasattr(instance, 'student_profile'):
-        instance.student_profile.save()
-    elif hasattr(instance, 'tutor_profile'):
-        instance.tutor_profile.save() 
\ No newline at end of file
+@receiver(post_delete, sender=User)
+def invalidate_tutor_users(sender, instance, update_fields=None, **kwargs):
+    """Öğrenci kayıtları ve last_login güncellemeleri katalog önbelleğini bozmaz"""
+    if update_fields and not CATALOGUE_USER_FIELDS.intersection(update_fields):
+        return
+    if instance.role == 'tutor':
+        transaction.on_commit(lambda: caching.bump_version('tutors'))
+
+
+@receiver(post_save, sender=Review)
+def add_review_rating(sender, instance, created, **kwargs):
+    if created:
+        reviews.apply_rating(instance.tutor_id, instance.rating)
+
+@receiver(post_delete, sender=Review)
+def remove_review_rating(sender, instance, **kwargs):
+    reviews.apply_rating(instance.tutor_id, instance.rating, count=-1)
+
+@receiver(post_save, sender=LessonRequest)
+def notify_lesson_change(sender, instance, created, update_fields=None, **kwargs):
+    """Yeni talep ve durum değişikliği: e-posta (core.notifications) ve WebSocket (core.realtime), commit sonrası"""
+    # count_completed_lesson'dan önce kayıtlı olmalı: _loaded_completion'ı o günceller
+    if created:
+        events = [(instance.pk, None)]
+    elif update_fields is None or 'status' in update_fields:
+        previous = getattr(instance, '_loaded_completion', (None, None))[1]
+        if previous is None or previous == instance.status:
+            return
+        events = [(instance.pk, previous)]
+    else:
+        return
+    notifications.lesson_events(events)
+    realtime.lesson_events(events)
+
+@receiver(post_save, sender=LessonRequest)
+def count_completed_lesson(sender, instance, created, update_fields=None, **kwargs):
+    """Tamamlanan ders sayacı; bulk_update yolu core.bulk içinde ayrıca sayılır"""
+    if update_fields is not None and not {'status', 'tutor', 'tutor_id'}.intersection(update_fields):
+        return
+    before = (None, None) if created else getattr(instance, '_loaded_completion', (None, None))
+    after = (instance.tutor_id, instance.status)
+    reviews.record_completed([(*before, *after)])
+    instance._loaded_completion = after
+
+@receiver(post_delete, sender=LessonRequest)
+def uncount_completed_lesson(sender, instance, **kwargs):
+    reviews.record_completed([(instance.tutor_id, instance.status, None, None)])
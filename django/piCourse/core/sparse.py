@@ -0,0 +1,151 @@
+"""
+Sparse fieldsets for the core serializers: ``?fields=`` and ``?expand=``.
+
+``?fields=id,name,rating`` limits each object in a GET response to the
+listed fields; ``?expand=review`` adds optional fields a serializer does
+not render by default (``Meta.expandable_fields``). Without either
+parameter responses are unchanged.
+
+Serializers opt in with ``SparseFieldsMixin`` and describe what each field
+reads from the model: ``Meta.field_sources`` maps a field to the ORM paths
+it needs (fields missing from it read the model field of the same name)
+and ``Meta.field_prefetches`` to the relations it prefetches.
+``SparseFieldsFilter`` uses that to prune the view's queryset, so a field
+left out of the response is not selected, joined or prefetched either.
+"""
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def is_requested(request):
+    return FIELDS_PARAM in request.query_params or EXPAND_PARAM in request.query_params
+
+
+def selected_fields(serializer_class, request):
+    """
+    Field names the request asks ``serializer_class`` to render, or None
+    when all of its fields apply. Unknown names are a 400.
+    """
+    meta = serializer_class.Meta
+    expandable = tuple(getattr(meta, 'expandable_fields', ()))
+    default = [name for name in meta.fields if name not in expandable]
+    if request is None or request.method != 'GET':
+        return default if expandable else None
+
+    fields, expand = _names(request.query_params.get(FIELDS_PARAM)), _names(request.query_params.get(EXPAND_PARAM))
+    errors = {}
+    unknown = [name for name in fields if name not in meta.fields]
+    if unknown:
+        errors[FIELDS_PARAM] = f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(meta.fields)}."
+    unknown = [name for name in expand if name not in expandable]
+    if unknown:
+        choices = ', '.join(expandable) or 'none'
+        errors[EXPAND_PARAM] = f"Unknown fields: {', '.join(unknown)}. Choose from: {choices}."
+    if errors:
+        raise ValidationError(errors)
+
+    if not fields and not expand:
+        return default if expandable else None
+    selected = fields or default
+    return [name for name in meta.fields if name in selected or name in expand]
+
+
+class SparseFieldsMixin:
+    # Docstring yok: drf-spectacular bileşen açıklamasını MRO'daki ilk docstring'den alır.
+    # Yalnızca en üstteki serializer (ya da many=True listesinin elemanı) alanları budar.
+
+    def get_fields(self):
+        fields = super().get_fields()
+        root = self.root
+        # İç içe serializer'lar (ör. eğitmen konuları) istek parametrelerinden etkilenmez
+        if root is not self and not (isinstance(root, ListSerializer) and root.child is self):
+            return fields
+        if 'sparse_fields' in self.context:
+            selected = self.context['sparse_fields']  # core.fastpath: seçim önceden yapıldı
+        else:
+            selected = selected_fields(type(self), self.context.get('request'))
+        if selected is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in selected}
+
+
+def prune_queryset(queryset, serializer_class, names, keep=()):
+    """
+    Restrict ``queryset`` to the columns, joins and prefetches the fields
+    ``names`` of ``serializer_class`` read, plus the ORM paths in ``keep``.
+    """
+    meta = serializer_class.Meta
+    sources = getattr(meta, 'field_sources', {})
+    prefetches = getattr(meta, 'field_prefetches', {})
+
+    paths = [queryset.model._meta.pk.name, *keep]
+    lookups = []
+    for name in names:
+        paths += sources.get(name, (name,))
+        lookups += prefetches.get(name, ())
+
+    relations = set()
+    for path in paths:
+        parts = path.split(LOOKUP_SEP)
+        for depth in range(1, len(parts)):
+            relations.add(LOOKUP_SEP.join(parts[:depth]))
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset.only(*paths)
+
+
+class SparseFieldsFilter(BaseFilterBackend):
+    """
+    Prunes list querysets to the fields ``?fields=`` / ``?expand=`` select.
+    List it last in ``filter_backends``; keyset pagination columns
+    (``view.keyset_ordering``) are always loaded.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        serializer_class = view.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsMixin):
+            return queryset
+        if not is_requested(request):
+            return queryset
+        names = selected_fields(serializer_class, request)
+        if names is None:
+            return queryset
+        keep = [field.lstrip('-') for field in getattr(view, 'keyset_ordering', None) or ()]
+        return prune_queryset(queryset, serializer_class, names, keep)
+
+    def get_schema_operation_parameters(self, view):
+        serializer_class = view.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsMixin):
+            return []
+        expandable = ', '.join(getattr(serializer_class.Meta, 'expandable_fields', ()))
+        parameters = [
+            {
+                'name': FIELDS_PARAM,
+                'required': False,
+                'in': 'query',
+                'description': 'Comma separated fields to return; all default fields when omitted.',
+                'schema': {'type': 'string'},
+            },
+        ]
+        if expandable:
+            parameters.append({
+                'name': EXPAND_PARAM,
+                'required': False,
+                'in': 'query',
+                'description': f'Comma separated optional fields to add to the response: {expandable}.',
+                'schema': {'type': 'string'},
+            })
+        return parameters
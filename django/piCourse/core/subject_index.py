@@ -0,0 +1,155 @@
+"""
+Per-tutor subject bitmask for catalogue filtering.
+
+Each subject takes one of ``SLOTS`` bits (``Subject.index_bit``) and
+``TutorProfile.subject_mask`` holds the bits of the subjects the tutor
+teaches. "Teaches any of / all of these subjects" is then a bitwise test on
+the profile row TutorListView already reads: no join on the subjects
+table, no duplicate rows and no DISTINCT, so it combines freely with the
+price and rating filters and the keyset ordering.
+
+core.signals keeps the masks in step with ``m2m_changed`` through
+``UPDATE ... SET subject_mask = subject_mask | bits`` (or ``& ~bits``)
+statements, like the counters in core.reviews. Writers that bypass the
+signals (bulk_create on the through table) call ``rebuild``. Subjects
+created once every slot is taken get no bit; filters on them fall back to
+an EXISTS subquery on the through table.
+"""
+import operator
+from functools import reduce
+
+from django.db.models import BigIntegerField, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import Exact, GreaterThan
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Subject, TutorProfile
+
+# BigIntegerField'in işaret biti kullanılmaz
+SLOTS = 63
+
+
+def bits_of(slots):
+    mask = 0
+    for slot in slots:
+        mask |= 1 << slot
+    return mask
+
+
+def assign_bits(subjects):
+    """Give the unsaved or unindexed ``subjects`` the lowest free slots (in memory; callers save)."""
+    pending = [subject for subject in subjects if subject.index_bit is None]
+    if not pending:
+        return subjects
+    used = set(Subject.objects.filter(index_bit__isnull=False).values_list('index_bit', flat=True))
+    free = (slot for slot in range(SLOTS) if slot not in used)
+    for subject, slot in zip(pending, free):
+        subject.index_bit = slot
+    return subjects
+
+
+def _subject_bits(subject_ids):
+    return bits_of(Subject.objects.filter(pk__in=subject_ids, index_bit__isnull=False).values_list('index_bit', flat=True))
+
+
+def add_subjects(profile_ids, subject_ids):
+    bits = _subject_bits(subject_ids)
+    if bits:
+        TutorProfile.objects.filter(pk__in=profile_ids).update(subject_mask=F('subject_mask').bitor(bits))
+
+
+def remove_subjects(profile_ids, subject_ids):
+    bits = _subject_bits(subject_ids)
+    if bits:
+        profiles = TutorProfile.objects.all() if profile_ids is None else TutorProfile.objects.filter(pk__in=profile_ids)
+        clear_bits(profiles, bits)
+
+
+def clear_bits(profiles, bits):
+    """Drop ``bits`` from the masks of ``profiles`` (a TutorProfile queryset)."""
+    profiles.filter(GreaterThan(F('subject_mask').bitand(bits), 0)).update(
+        subject_mask=F('subject_mask').bitand(~bits),
+    )
+
+
+def rebuild(profile_ids=None):
+    """Recompute the masks of ``profile_ids`` (all profiles when None) from the through table."""
+    through = TutorProfile.subjects.through
+    bits = (
+        through.objects.filter(tutorprofile_id=OuterRef('pk'), subject__index_bit__isnull=False)
+        .values('tutorprofile_id')
+        .annotate(mask=Sum(Value(1, BigIntegerField()).bitleftshift(F('subject__index_bit'))))
+        .values('mask')
+    )
+    profiles = TutorProfile.objects.all() if profile_ids is None else TutorProfile.objects.filter(pk__in=profile_ids)
+    profiles.update(subject_mask=Coalesce(Subquery(bits), 0))
+
+
+def filter_tutors(queryset, subject_ids, match_all=False, profile='tutor_profile'):
+    """
+    Tutors of ``queryset`` teaching any (or with ``match_all`` every) one
+    of ``subject_ids``; ``profile`` is the path to their TutorProfile.
+    """
+    slots = dict(Subject.objects.filter(pk__in=subject_ids).values_list('pk', 'index_bit'))
+    if not slots or (match_all and len(slots) < len(set(subject_ids))):
+        return queryset.none()
+
+    bits = bits_of(slot for slot in slots.values() if slot is not None)
+    unindexed = [pk for pk, slot in slots.items() if slot is None]
+    tested = F(f'{profile}__subject_mask').bitand(bits)
+    teaches = TutorProfile.subjects.through.objects.filter(tutorprofile_id=OuterRef(f'{profile}__id'))
+    conditions = []
+    if bits:
+        conditions.append(Exact(tested, bits) if match_all else GreaterThan(tested, 0))
+    if match_all:
+        conditions += [Exists(teaches.filter(subject_id=pk)) for pk in unindexed]
+    elif unindexed:
+        conditions.append(Exists(teaches.filter(subject_id__in=unindexed)))
+    return queryset.filter(reduce(operator.and_ if match_all else operator.or_, map(Q, conditions)))
+
+
+def _ids(value):
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+class SubjectIndexFilter(BaseFilterBackend):
+    """
+    Subject filters of TutorListView on ``TutorProfile.subject_mask``:
+    ``?subject=1,2`` matches tutors teaching any of the subjects,
+    ``?subject_all=1,2`` those teaching all of them.
+    ``?tutor_profile__subjects=`` is kept as an alias of ``?subject=``.
+    """
+    any_params = ('subject', 'tutor_profile__subjects')
+    all_param = 'subject_all'
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        try:
+            any_ids = [pk for param in self.any_params for pk in _ids(params.get(param, ''))]
+            all_ids = _ids(params.get(self.all_param, ''))
+        except ValueError:
+            raise ValidationError({'error': 'subject and subject_all must be comma separated subject ids'})
+        if any_ids:
+            queryset = filter_tutors(queryset, any_ids)
+        if all_ids:
+            queryset = filter_tutors(queryset, all_ids, match_all=True)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': 'subject',
+                'required': False,
+                'in': 'query',
+                'description': 'Comma separated subject ids; tutors teaching any of them.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.all_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Comma separated subject ids; tutors teaching all of them.',
+                'schema': {'type': 'string'},
+            },
+        ]
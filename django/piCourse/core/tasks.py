@@ -0,0 +1,185 @@
+"""
+Database-backed background tasks.
+
+Side effects that need not finish before the response (e-mails,
+re-aggregations) are functions registered with ``@task`` and queued with
+``<task>.enqueue(**kwargs)``. Enqueueing goes through
+``transaction.on_commit``: the row (core.models.Task) is written once the
+transaction that asked for it commits, so no worker sees work for a
+rolled-back change, and the request pays one INSERT however much the task
+does.
+
+``python manage.py run_tasks`` runs a worker. It leases due tasks in
+batches for ``LEASE`` seconds, runs them, deletes the ones that succeed and
+reschedules failures with exponential backoff until ``max_attempts``, after
+which the row stays ``failed`` with its traceback. A task whose worker died
+is picked up again when its lease ends: tasks run at least once and must be
+idempotent.
+
+``settings.TASKS``: ``EAGER`` runs tasks in-process right after commit
+instead of queueing them (development without a worker).
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import locking
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'EAGER': False,
+    'MAX_ATTEMPTS': 5,
+    # n. başarısız denemeden sonra BACKOFF * 2**(n-1) saniye beklenir, en çok MAX_BACKOFF
+    'BACKOFF': 10,
+    'MAX_BACKOFF': 3600,
+    'LEASE': 300,
+    'BATCH_SIZE': 20,
+    'POLL_INTERVAL': 1.0,
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+registry = {}
+
+
+def get_task_settings():
+    return {**DEFAULTS, **getattr(settings, 'TASKS', {})}
+
+
+class TaskFunction:
+    """A registered task: call it to run inline, ``enqueue`` it to run in a worker."""
+
+    def __init__(self, func, name, max_attempts=None):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *, delay=0, using=None, **kwargs):
+        """Queue a call with JSON-serializable ``kwargs`` for after the current transaction commits."""
+        transaction.on_commit(partial(self._push, kwargs, delay), using=using)
+
+    def _push(self, kwargs, delay):
+        options = get_task_settings()
+        if options['EAGER']:
+            try:
+                self.func(**kwargs)
+            except Exception:
+                logger.exception('task.failed', extra={'task': self.name})
+            return
+        Task.objects.create(
+            name=self.name,
+            payload=kwargs,
+            max_attempts=self.max_attempts or options['MAX_ATTEMPTS'],
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(name=None, max_attempts=None):
+    """Register the decorated function as a task, by default under its dotted path."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        registry[task_name] = TaskFunction(func, task_name, max_attempts)
+        return registry[task_name]
+    return decorator
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def backoff(attempts):
+    options = get_task_settings()
+    return min(options['BACKOFF'] * 2 ** (attempts - 1), options['MAX_BACKOFF'])
+
+
+def claim(worker, batch_size=None):
+    """Lease up to ``batch_size`` due tasks (queued, or running with an expired lease) to ``worker``."""
+    options = get_task_settings()
+    now = timezone.now()
+    with transaction.atomic():
+        # SQLite'ta yazma kilidi okumadan önce alınır; diğer veritabanlarında SKIP LOCKED
+        locking.write_lock(connection)
+        due = Task.objects.select_for_update(skip_locked=True).filter(
+            status__in=ACTIVE_STATUSES, run_at__lte=now,
+        ).order_by('run_at', 'id')
+        ids = list(due.values_list('id', flat=True)[:batch_size or options['BATCH_SIZE']])
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids).update(
+            status='running', worker=worker, attempts=F('attempts') + 1,
+            run_at=now + timedelta(seconds=options['LEASE']),
+        )
+    return list(Task.objects.filter(id__in=ids, worker=worker).order_by('id'))
+
+
+def run(job, worker):
+    """Run a claimed task; True when it succeeded."""
+    # Kirası dolmuş görevin sahibi değişmişse satıra yalnızca yeni sahibi dokunur
+    leased = Task.objects.filter(pk=job.pk, worker=worker, attempts=job.attempts)
+    if job.attempts > job.max_attempts:
+        leased.update(status='failed', last_error='Lease expired on the last attempt')
+        return False
+
+    started = time.perf_counter()
+    try:
+        func = registry.get(job.name)
+        if func is None:
+            raise LookupError(f'Unknown task {job.name!r}')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            leased.update(status='failed', last_error=error)
+            logger.exception('task.failed', extra={'task': job.name, 'task_id': job.pk, 'attempts': job.attempts})
+        else:
+            delay = backoff(job.attempts)
+            leased.update(status='queued', last_error=error, run_at=timezone.now() + timedelta(seconds=delay))
+            logger.warning('task.retry', extra={
+                'task': job.name, 'task_id': job.pk, 'attempts': job.attempts, 'retry_in_s': delay,
+            })
+        return False
+    leased.delete()
+    logger.info('task.done', extra={
+        'task': job.name, 'task_id': job.pk, 'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+    })
+    return True
+
+
+def run_pending(worker=None, batch_size=None):
+    """Run due tasks until none is left; returns how many ran."""
+    worker = worker or default_worker_id()
+    count = 0
+    while batch := claim(worker, batch_size):
+        for job in batch:
+            run(job, worker)
+        count += len(batch)
+    return count
+
+
+def work(worker=None, batch_size=None, poll_interval=None, stop=lambda: False):
+    """Worker loop: run due tasks, poll every ``poll_interval`` seconds when idle, until ``stop()``."""
+    worker = worker or default_worker_id()
+    poll_interval = poll_interval or get_task_settings()['POLL_INTERVAL']
+    while not stop():
+        close_old_connections()
+        batch = claim(worker, batch_size)
+        if not batch:
+            time.sleep(poll_interval)
+            continue
+        for job in batch:
+            run(job, worker)
@@ -1,16 +1,85 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from base64 import b64encode
+from contextlib import contextmanager, redirect_stdout
+
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models.functions import Lower
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 from rest_framework.test import APITestCase
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from decimal import Decimal
 from datetime import datetime, timedelta
+import orjson
 import pytz
+import re
+import unittest
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models import User, Subject, TutorProfile, StudentProfile, LessonRequest, Review, Task, TutorSearchDocument
+from . import (
+    async_views, auth, caching, export, locking, log, metrics, pagination, realtime, reviews, scheduling, search,
+    subject_index, tasks, throttling, views,
+)
+from .auth import PBKDF2PasswordHasher, RefreshToken as ClaimsRefreshToken
+from .renderers import ORJSONParser, ORJSONRenderer
+from .serializers import TutorListSerializer, UserRegistrationSerializer
+
+
+class ThrottleResetMixin:
+    """
+    core.throttling keeps its counters in its own store (an in-memory SQLite
+    database under tests), which outlives the test transaction and is not
+    reset by cache.clear(); empty it before every test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        throttling.get_store().clear()
 
-from .models import User, Subject, TutorProfile, StudentProfile, LessonRequest
 
-class UserModelTest(TestCase):
+class QueryBudgetMixin:
+    """assertQueryBudget(n): fail if the block runs more than n SQL queries."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(ctx.captured_queries, start=1)
+            )
+            self.fail(f'{executed} queries executed, budget is {budget}:\n{queries}')
+
+class UserModelTest(QueryBudgetMixin, ThrottleResetMixin, TestCase):
     def setUp(self):
+        super().setUp()
         self.student = User.objects.create_user(
             username='teststudent',
             email='student@test.com',
@@ -35,8 +104,31 @@ class UserModelTest(TestCase):
         self.assertTrue(hasattr(self.student, 'student_profile'))
         self.assertTrue(hasattr(self.tutor, 'tutor_profile'))
 
-class AuthenticationAPITest(APITestCase):
+    def test_user_save_does_not_write_profile(self):
+        student = User.objects.get(pk=self.student.pk)
+        with self.assertQueryBudget(1):
+            student.last_login = datetime.now(pytz.UTC)
+            student.save(update_fields=['last_login'])
+        # Tam kayıtta arama indeksi temizlenir, ama profil tablosuna dokunulmaz
+        with self.assertQueryBudget(2) as ctx:
+            student.first_name = 'Ada'
+            student.save()
+        self.assertFalse([query for query in ctx.captured_queries if 'profile' in query['sql']])
+
+    def test_registration_creates_user_and_profile_atomically(self):
+        serializer = UserRegistrationSerializer(data={'email': 'new@test.com', 'password': 'x', 'role': 'tutor'})
+        self.assertTrue(serializer.is_valid())
+        with mock.patch.object(TutorProfile.objects, 'create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+        self.assertFalse(User.objects.filter(email='new@test.com').exists())
+
+        user = serializer.save()
+        self.assertEqual(TutorProfile.objects.filter(user=user).count(), 1)
+
+class AuthenticationAPITest(ThrottleResetMixin, APITestCase):
     def setUp(self):
+        super().setUp()
         self.register_url = reverse('register')
         self.login_url = reverse('login')
         self.me_url = reverse('me')
@@ -90,8 +182,9 @@ class AuthenticationAPITest(APITestCase):
         response = self.client.get(self.me_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
-class RoleBasedPermissionsTest(APITestCase):
+class RoleBasedPermissionsTest(ThrottleResetMixin, APITestCase):
     def setUp(self):
+        super().setUp()
         self.student = User.objects.create_user(
             username='student',
             email='student@test.com',
@@ -183,8 +276,10 @@ class RoleBasedPermissionsTest(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
-class SubjectAPITest(APITestCase):
+class SubjectAPITest(ThrottleResetMixin, APITestCase):
     def setUp(self):
+        super().setUp()
+        cache.clear()
         self.subject_url = reverse('subjects')
         self.subject = Subject.objects.create(name='Physics')
 
@@ -194,8 +289,9 @@ class SubjectAPITest(APITestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['name'], 'Physics')
 
-class TutorAPITest(APITestCase):
+class TutorAPITest(ThrottleResetMixin, APITestCase):
     def setUp(self):
+        super().setUp()
         self.tutor_list_url = reverse('tutors')
         self.tutor = User.objects.create_user(
             username='testtutor',
@@ -243,3 +339,2123 @@ class TutorAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['results'][0]['rating'], 4.7)
         self.assertEqual(response.data['results'][1]['rating'], 4.2)
+
+
+class KeysetPaginationTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tutor_list_url = reverse('tutors')
+        self.lesson_request_url = reverse('lesson-requests')
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.student = User.objects.create_user(
+            username='student',
+            email='student@test.com',
+            password='testpass123',
+            role='student'
+        )
+        self.tutors = []
+        for i, rating in enumerate([4.5, 4.9, 4.5, 3.0, 4.5]):
+            tutor = User.objects.create_user(
+                username=f'tutor{i}',
+                email=f'tutor{i}@test.com',
+                password='testpass123',
+                role='tutor'
+            )
+            tutor.tutor_profile.rating = rating
+            tutor.tutor_profile.save()
+            self.tutors.append(tutor)
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_tutor_cursor_pages_follow_rating_then_id(self):
+        ids = self._walk(f'{self.tutor_list_url}?pagination=cursor&limit=2')
+        expected = [
+            tutor.id for tutor in sorted(
+                self.tutors, key=lambda t: (t.tutor_profile.rating, t.id), reverse=True
+            )
+        ]
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_same_page(self):
+        first = self.client.get(f'{self.tutor_list_url}?pagination=cursor&limit=2')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [row['id'] for row in back.data['results']],
+            [row['id'] for row in first.data['results']]
+        )
+
+    def test_default_mode_is_limit_offset(self):
+        response = self.client.get(self.tutor_list_url)
+        self.assertEqual(response.data['count'], 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{self.tutor_list_url}?cursor=bm90LWpzb24=')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def _cursor(self, values):
+        return b64encode(json.dumps({'v': values, 'r': 0}).encode()).decode()
+
+    def test_forged_cursor_is_not_found(self):
+        token = RefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        for url, values in ((self.tutor_list_url, ['x', 3]), (self.tutor_list_url, [{'a': 1}, 3]),
+                            (self.tutor_list_url, [4.5, 'zz']), (self.tutor_list_url, [None, 3]),
+                            (self.lesson_request_url, ['not-a-date', 3])):
+            response = self.client.get(url, {'cursor': self._cursor(values)})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, values)
+            self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+    def test_cursor_pages_follow_ordering_param(self):
+        counts = {tutor.id: count for tutor, count in zip(self.tutors, [2, 0, 1, 0, 3])}
+        for tutor_id, count in counts.items():
+            TutorProfile.objects.filter(user_id=tutor_id).update(rating_count=count)
+        url = f'{self.tutor_list_url}?pagination=cursor&limit=2&ordering=tutor_profile__rating_count'
+        expected = sorted(counts, key=lambda tutor_id: (counts[tutor_id], -tutor_id))
+        self.assertEqual(self._walk(url), expected)
+
+        # Başka sıralamanın imleci reddedilir
+        second = self.client.get(url).data['next']
+        response = self.client.get(second.replace('tutor_profile__rating_count', '-tutor_profile__completed_lessons'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_rejects_expression_ordering(self):
+        self.assertIsNone(pagination.keyset_ordering(User.objects.order_by(Lower('username')), ('-id',)))
+        ranked = User.objects.annotate(search_rank=Lower('username')).order_by('search_rank', '-id')
+        # Benzersiz alanla biten sıralamaya ayrıca eşitlik bozucu eklenmez
+        self.assertEqual(pagination.keyset_ordering(ranked, ('-id',)), ('search_rank', '-id'))
+
+    def test_lesson_request_cursor_pages(self):
+        for i in range(3):
+            LessonRequest.objects.create(
+                student=self.student,
+                tutor=self.tutors[0],
+                subject=self.subject,
+                start_time=datetime.now(pytz.UTC) + timedelta(days=i + 1),
+                duration_minutes=60
+            )
+        token = RefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        ids = self._walk(f'{self.lesson_request_url}?pagination=cursor&limit=2')
+        expected = list(
+            LessonRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+
+class TutorSearchTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tutor_list_url = reverse('tutors')
+        self.physics = Subject.objects.create(name='Physics')
+        self.alice = User.objects.create_user(
+            username='alice',
+            email='alice@test.com',
+            password='testpass123',
+            role='tutor',
+            first_name='Alice',
+            last_name='Johnson'
+        )
+        self.alice.tutor_profile.bio = 'Organic chemistry specialist'
+        self.alice.tutor_profile.save()
+        self.bob = User.objects.create_user(
+            username='bob',
+            email='bob@test.com',
+            password='testpass123',
+            role='tutor',
+            first_name='Bob',
+            last_name='Alison'
+        )
+        self.bob.tutor_profile.subjects.add(self.physics)
+
+    def _search(self, query):
+        response = self.client.get(self.tutor_list_url, {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_prefix_match_on_name_and_bio(self):
+        self.assertCountEqual(self._search('ali'), [self.alice.id, self.bob.id])
+        self.assertEqual(self._search('chem'), [self.alice.id])
+
+    def test_name_match_ranks_above_bio_match(self):
+        self.alice.tutor_profile.bio = 'Former student of Bob'
+        self.alice.tutor_profile.save()
+        self.assertEqual(self._search('bob'), [self.bob.id, self.alice.id])
+
+    def test_every_match_is_counted_and_paged(self):
+        for i in range(12):
+            tutor = User.objects.create_user(username=f'physicist{i}', email=f'physicist{i}@test.com',
+                                             password='testpass123', role='tutor', first_name='Physicist')
+            tutor.tutor_profile.subjects.add(self.physics)
+        for backend in (None, 'core.search.DatabaseSearchBackend'):
+            with self.subTest(backend=backend), override_settings(TUTOR_SEARCH={'BACKEND': backend}):
+                cache.clear()
+                first = self.client.get(self.tutor_list_url, {'search': 'phys', 'limit': 5})
+                self.assertEqual(first.data['count'], 13)
+                offset_ids = [row['id'] for row in first.data['results']]
+                url = first.data['next']
+                while url:
+                    response = self.client.get(url)
+                    offset_ids += [row['id'] for row in response.data['results']]
+                    url = response.data['next']
+                self.assertCountEqual(offset_ids, [self.bob.id, *User.objects.filter(
+                    username__startswith='physicist').values_list('id', flat=True)])
+
+                # İmleç sayfaları da alaka sırasını izler
+                cursor_ids = []
+                url = f'{self.tutor_list_url}?search=phys&limit=5&pagination=cursor'
+                while url:
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    cursor_ids += [row['id'] for row in response.data['results']]
+                    url = response.data['next']
+                self.assertEqual(cursor_ids, offset_ids)
+
+    def test_subject_changes_are_indexed(self):
+        self.assertEqual(self._search('phys'), [self.bob.id])
+        self.physics.name = 'Astrophysics'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics.save()
+        self.assertEqual(self._search('astro'), [self.bob.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.tutor_profile.subjects.remove(self.physics)
+        self.assertEqual(self._search('astro'), [])
+
+    def test_name_change_and_delete_are_indexed(self):
+        self.bob.first_name = 'Robert'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.save()
+        self.assertEqual(self._search('robert'), [self.bob.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.delete()
+        self.assertEqual(self._search('robert'), [])
+
+    def test_students_are_not_indexed(self):
+        User.objects.create_user(
+            username='alina',
+            email='alina@test.com',
+            password='testpass123',
+            role='student'
+        )
+        self.assertEqual(self._search('alina'), [])
+
+
+class SubjectIndexTest(QueryBudgetMixin, ThrottleResetMixin, APITestCase):
+    """Subject filters on TutorProfile.subject_mask (core.subject_index)."""
+
+    def setUp(self):
+        super().setUp()
+        self.math, self.physics, self.chemistry = (
+            Subject.objects.create(name=name) for name in ('Mathematics', 'Physics', 'Chemistry')
+        )
+        self.tutors = {}
+        for name, rate, rating, subjects in (
+            ('both', '50', 4.5, [self.math, self.physics]),
+            ('math', '90', 3.0, [self.math]),
+            ('chem', '30', 4.8, [self.chemistry]),
+        ):
+            user = User.objects.create_user(
+                username=f'index{name}', email=f'index{name}@test.com', password='testpass123', role='tutor')
+            user.tutor_profile.hourly_rate = Decimal(rate)
+            user.tutor_profile.rating = rating
+            user.tutor_profile.save()
+            user.tutor_profile.subjects.add(*subjects)
+            self.tutors[name] = user
+
+    def _ids(self, **params):
+        response = self.client.get(reverse('tutors'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def _mask(self, name):
+        return TutorProfile.objects.get(user=self.tutors[name]).subject_mask
+
+    def _expected_mask(self, name):
+        return sum(1 << s.index_bit for s in Subject.objects.filter(tutors__user=self.tutors[name]))
+
+    def test_any_and_all_of_subjects(self):
+        both, math, chem = (self.tutors[name].id for name in ('both', 'math', 'chem'))
+        self.assertEqual(self._ids(subject=f'{self.math.id},{self.physics.id}'), [both, math])
+        self.assertEqual(self._ids(subject=f'{self.physics.id},{self.chemistry.id}'), [chem, both])
+        self.assertEqual(self._ids(subject_all=f'{self.math.id},{self.physics.id}'), [both])
+        self.assertEqual(self._ids(subject_all=f'{self.math.id},{self.chemistry.id}'), [])
+        self.assertEqual(self._ids(subject=self.math.id, subject_all=self.physics.id), [both])
+        self.assertEqual(self._ids(tutor_profile__subjects=self.physics.id), [both])
+        self.assertEqual(self._ids(subject='999'), [])
+        response = self.client.get(reverse('tutors'), {'subject': 'math'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_combines_with_price_and_rating_without_join(self):
+        both, math = self.tutors['both'].id, self.tutors['math'].id
+        # konu bitleri, sayım, sayfa, sayfanın konuları
+        with self.assertQueryBudget(4) as queries:
+            ids = self._ids(subject=f'{self.math.id},{self.physics.id}', min_price='40', max_price='60')
+        page = queries.captured_queries[2]['sql']
+        self.assertEqual(ids, [both])
+        self.assertIn('subject_mask', page)
+        self.assertNotIn('DISTINCT', page)
+        self.assertNotIn('core_tutorprofile_subjects', page)
+        self.assertEqual(self._ids(subject=self.math.id, min_rating=4), [both])
+        self.assertEqual(self._ids(subject=self.math.id, max_price='100', ordering='tutor_profile__rating'), [math, both])
+        response = self.client.get(reverse('tutors'), {'min_price': 'cheap'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_masks_follow_subject_changes(self):
+        profile = self.tutors['math'].tutor_profile
+        profile.subjects.add(self.chemistry)
+        profile.subjects.remove(self.math)
+        self.assertEqual(self._mask('math'), self._expected_mask('math'))
+        # Yüklendiğinden beri değişmeyen maske profil kaydıyla ezilmez
+        profile.bio = 'Chemistry now'
+        profile.save()
+        self.assertEqual(self._mask('math'), 1 << self.chemistry.index_bit)
+
+        self.physics.tutors.add(self.tutors['chem'].tutor_profile)
+        self.math.tutors.remove(self.tutors['both'].tutor_profile)
+        for name in self.tutors:
+            self.assertEqual(self._mask(name), self._expected_mask(name))
+        self.chemistry.tutors.clear()
+        self.tutors['both'].tutor_profile.subjects.clear()
+        for name in self.tutors:
+            self.assertEqual(self._mask(name), self._expected_mask(name))
+
+    def test_deleted_subject_slot_is_cleared_and_reused(self):
+        slot = self.physics.index_bit
+        self.physics.delete()
+        self.assertEqual(self._mask('both'), 1 << self.math.index_bit)
+        history = Subject.objects.create(name='History')
+        self.assertEqual(history.index_bit, slot)
+        self.assertEqual(self._ids(subject=history.id), [])
+
+    def test_subjects_without_slot_fall_back_to_exists(self):
+        with mock.patch('core.subject_index.SLOTS', 3):
+            extra = Subject.objects.create(name='History')
+        self.assertIsNone(extra.index_bit)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutors['math'].tutor_profile.subjects.add(extra)
+        both, math = self.tutors['both'].id, self.tutors['math'].id
+        self.assertEqual(self._ids(subject=extra.id), [math])
+        self.assertEqual(self._ids(subject=f'{extra.id},{self.physics.id}'), [both, math])
+        self.assertEqual(self._ids(subject_all=f'{extra.id},{self.math.id}'), [math])
+        self.assertEqual(self._ids(subject_all=f'{extra.id},{self.physics.id}'), [])
+
+    def test_rebuild_matches_signals(self):
+        expected = dict(TutorProfile.objects.values_list('pk', 'subject_mask'))
+        TutorProfile.objects.update(subject_mask=0)
+        subject_index.rebuild()
+        self.assertEqual(dict(TutorProfile.objects.values_list('pk', 'subject_mask')), expected)
+
+
+class CatalogueCacheTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.subject_url = reverse('subjects')
+        self.subject = Subject.objects.create(name='Physics')
+        self.tutor = User.objects.create_user(
+            username='cachetutor',
+            email='cachetutor@test.com',
+            password='testpass123',
+            role='tutor'
+        )
+        self.tutor_detail_url = reverse('tutor-detail', kwargs={'pk': self.tutor.id})
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.subject_url)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(self.subject_url)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_write_invalidates_cached_payload(self):
+        first = self.client.get(self.subject_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='Biology')
+        second = self.client.get(self.subject_url)
+        self.assertEqual(len(second.data['results']), 2)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_request_returns_304(self):
+        first = self.client.get(self.tutor_detail_url)
+        response = self.client.get(self.tutor_detail_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.tutor_detail_url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_profile_and_subject_changes_invalidate_tutor_detail(self):
+        first = self.client.get(self.tutor_detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutor.tutor_profile.subjects.add(self.subject)
+        second = self.client.get(self.tutor_detail_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['subjects'], [{'id': self.subject.id, 'name': 'Physics'}])
+        self.subject.name = 'Astrophysics'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.save()
+        third = self.client.get(self.tutor_detail_url)
+        self.assertEqual(third.data['subjects'][0]['name'], 'Astrophysics')
+
+    def test_version_changes_after_commit(self):
+        before = caching.get_versions(['subjects', 'tutors'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            Subject.objects.create(name='Biology')
+            self.tutor.tutor_profile.subjects.add(self.subject)
+            reviews.apply_rating(self.tutor.id, 5)
+            # Commit'ten önce okuyan istek eski satırları eski sürümle önbelleğe alır
+            self.assertEqual(caching.get_versions(['subjects', 'tutors']), before)
+        for callback in callbacks:
+            callback()
+        after = caching.get_versions(['subjects', 'tutors'])
+        self.assertTrue(all(new > old for new, old in zip(after, before)))
+
+    def test_missing_tutor_is_not_cached(self):
+        url = reverse('tutor-detail', kwargs={'pk': self.tutor.id + 100})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryBudgetTest(QueryBudgetMixin, ThrottleResetMixin, APITestCase):
+    """Query budgets for every route in core/urls.py."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.student = User.objects.create_user(
+            username='budgetstudent',
+            email='budgetstudent@test.com',
+            password='testpass123',
+            role='student'
+        )
+        self.tutors = []
+        for i in range(3):
+            tutor = User.objects.create_user(
+                username=f'budgettutor{i}',
+                email=f'budgettutor{i}@test.com',
+                password='testpass123',
+                role='tutor'
+            )
+            tutor.tutor_profile.subjects.add(self.subject)
+            self.tutors.append(tutor)
+        self.tutor = self.tutors[0]
+        self.lesson_requests = [
+            LessonRequest.objects.create(
+                student=self.student,
+                tutor=tutor,
+                subject=self.subject,
+                start_time=datetime.now(pytz.UTC) + timedelta(days=i + 1),
+                duration_minutes=60
+            )
+            for i, tutor in enumerate(self.tutors * 4)
+        ]
+
+    def _authenticate(self, user):
+        # Login'in verdiği claim'li token: kimlik doğrulama sorgu atmaz
+        token = ClaimsRefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def test_register(self):
+        data = {'email': 'fresh@test.com', 'password': 'testpass123', 'role': 'tutor'}
+        with self.assertQueryBudget(11):
+            response = self.client.post(reverse('register'), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_login(self):
+        data = {'username': 'budgetstudent', 'password': 'testpass123'}
+        with self.assertQueryBudget(1):
+            response = self.client.post(reverse('login'), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_me_get(self):
+        self._authenticate(self.tutor)
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_me_patch(self):
+        self._authenticate(self.tutor)
+        data = {'first_name': 'Ada', 'profile': {'bio': 'Updated'}}
+        with self.assertQueryBudget(13):
+            response = self.client.patch(reverse('me'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_subjects(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('subjects'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tutor_list(self):
+        with self.assertQueryBudget(3):
+            response = self.client.get(reverse('tutors'))
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_tutor_detail(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('tutor-detail', kwargs={'pk': self.tutor.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_lesson_request_list(self):
+        self._authenticate(self.student)
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('lesson-requests'))
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_lesson_request_create(self):
+        self._authenticate(self.student)
+        data = {
+            'tutor': self.tutor.id,
+            'subject': self.subject.id,
+            'start_time': (datetime.now(pytz.UTC) + timedelta(days=30)).isoformat(),
+            'duration_minutes': 60
+        }
+        # doğrulama, yazma kilidi, çakışma kontrolü, INSERT + atomic() savepoint çifti, yanıttaki student_name
+        # için kullanıcı satırı
+        with self.assertQueryBudget(7):
+            response = self.client.post(reverse('lesson-requests'), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_tutor_availability(self):
+        url = reverse('tutor-availability', kwargs={'pk': self.tutor.id})
+        start = datetime.now(pytz.UTC)
+        params = {'start': start.isoformat(), 'end': (start + timedelta(days=14)).isoformat()}
+        with self.assertQueryBudget(2):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_lesson_request_update(self):
+        self._authenticate(self.tutor)
+        url = reverse('lesson-request-update', kwargs={'pk': self.lesson_requests[0].id})
+        with self.assertQueryBudget(2):
+            response = self.client.patch(url, {'status': 'accepted'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_lesson_request_review(self):
+        lesson = self.lesson_requests[0]
+        LessonRequest.objects.filter(pk=lesson.pk).update(status='completed')
+        self._authenticate(self.student)
+        url = reverse('lesson-request-review', kwargs={'pk': lesson.id})
+        # talep, INSERT + savepoint çifti, eğitmen toplamları, yanıttaki student_name için kullanıcı satırı
+        with self.assertQueryBudget(6):
+            response = self.client.post(url, {'rating': 5})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_tutor_reviews(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('tutor-reviews', kwargs={'pk': self.tutor.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LessonRequestCreateValidationTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.lesson_request_url = reverse('lesson-requests')
+        self.math = Subject.objects.create(name='Mathematics')
+        self.art = Subject.objects.create(name='Art')
+        self.student = User.objects.create_user(
+            username='student',
+            email='student@test.com',
+            password='testpass123',
+            role='student'
+        )
+        self.tutor = User.objects.create_user(
+            username='tutor',
+            email='tutor@test.com',
+            password='testpass123',
+            role='tutor',
+            first_name='Grace',
+            last_name='Hopper'
+        )
+        self.tutor.tutor_profile.subjects.add(self.math)
+        token = RefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def _post(self, tutor, subject):
+        return self.client.post(self.lesson_request_url, {
+            'tutor': tutor,
+            'subject': subject,
+            'start_time': (datetime.now(pytz.UTC) + timedelta(days=1)).isoformat(),
+            'duration_minutes': 60
+        })
+
+    def test_create_uses_resolved_tutor_and_subject(self):
+        response = self._post(self.tutor.id, self.math.id)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['student'], self.student.id)
+        self.assertEqual(response.data['tutor_name'], 'Grace Hopper')
+        self.assertEqual(response.data['subject_name'], 'Mathematics')
+
+    def test_subject_not_taught(self):
+        response = self._post(self.tutor.id, self.art.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('subject', response.data)
+
+    def test_unknown_or_non_tutor(self):
+        for tutor_id in (self.tutor.id + 100, self.student.id, 'abc'):
+            response = self._post(tutor_id, self.math.id)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('tutor', response.data)
+
+    def test_unknown_subject(self):
+        response = self._post(self.tutor.id, self.art.id + 100)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('subject', response.data)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+class SparseFieldsTest(QueryBudgetMixin, ThrottleResetMixin, APITestCase):
+    """?fields= / ?expand= prune both the payload and the query."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.student = User.objects.create_user(
+            username='sparsestudent', email='sparsestudent@test.com', password='testpass123', role='student')
+        self.tutor = User.objects.create_user(
+            username='sparsetutor', email='sparsetutor@test.com', password='testpass123', role='tutor',
+            first_name='Ada', last_name='Lovelace')
+        self.tutor.tutor_profile.subjects.add(self.subject)
+        start = datetime.now(pytz.UTC) + timedelta(days=1)
+        self.lessons = [
+            LessonRequest.objects.create(student=self.student, tutor=self.tutor, subject=self.subject,
+                                         start_time=start + timedelta(hours=2 * i), duration_minutes=60,
+                                         status='completed' if i == 0 else 'pending')
+            for i in range(3)
+        ]
+        Review.objects.create(lesson_request=self.lessons[0], tutor=self.tutor, student=self.student, rating=5)
+        token = ClaimsRefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def test_tutor_list_fields(self):
+        with self.assertQueryBudget(2) as ctx:
+            response = self.client.get(reverse('tutors'), {'fields': 'id,name,rating'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.tutor.id, 'name': 'Ada Lovelace', 'rating': 5.0}])
+        page_sql = ctx.captured_queries[-1]['sql']
+        self.assertNotIn('"bio"', page_sql)
+        self.assertNotIn('"password"', page_sql)
+
+    def test_default_response_is_unchanged(self):
+        tutor = self.client.get(reverse('tutors')).data['results'][0]
+        self.assertEqual(list(tutor), ['id', 'name', 'subjects', 'hourly_rate', 'rating', 'rating_count',
+                                       'completed_lessons', 'bio'])
+        lesson = self.client.get(reverse('lesson-requests')).data['results'][0]
+        self.assertNotIn('review', lesson)
+        self.assertNotIn('end_time', lesson)
+        self.assertIn('tutor_name', lesson)
+
+    def test_lesson_request_fields_skip_joins(self):
+        with self.assertQueryBudget(2) as ctx:
+            response = self.client.get(reverse('lesson-requests'), {'fields': 'id,status,start_time'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'status', 'start_time'})
+        self.assertNotIn('JOIN', ctx.captured_queries[-1]['sql'])
+
+    def test_lesson_request_expand(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse('lesson-requests'), {
+                'fields': 'id,subject_name', 'expand': 'review,end_time', 'pagination': 'cursor',
+            })
+        results = {row['id']: row for row in response.data['results']}
+        reviewed = results[self.lessons[0].id]
+        self.assertEqual(reviewed['review']['rating'], 5)
+        self.assertEqual(reviewed['subject_name'], 'Mathematics')
+        self.assertIsNotNone(reviewed['end_time'])
+        self.assertIsNone(results[self.lessons[1].id]['review'])
+
+    def test_keyset_pages_with_fields(self):
+        response = self.client.get(reverse('lesson-requests'), {'fields': 'id', 'pagination': 'cursor', 'limit': 2})
+        second = self.client.get(response.data['next'])
+        ids = [row['id'] for row in response.data['results'] + second.data['results']]
+        self.assertEqual(sorted(ids), sorted(lesson.id for lesson in self.lessons))
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('tutors'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+        response = self.client.get(reverse('lesson-requests'), {'expand': 'tutor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_ignore_sparse_params(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.tutor).access_token}')
+        url = reverse('lesson-request-update', kwargs={'pk': self.lessons[1].id}) + '?fields=id'
+        response = self.client.patch(url, {'status': 'accepted'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'accepted')
+
+
+class FastPathTest(ThrottleResetMixin, APITestCase):
+    """core.fastpath list pages are byte-identical to the serializer output, sync and async."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        math, physics = Subject.objects.create(name='Mathematics'), Subject.objects.create(name='Physics')
+        self.student = User.objects.create_user(
+            username='faststudent', email='faststudent@test.com', password='testpass123', role='student',
+            first_name='Grace')
+        tutors = []
+        for i, (first_name, rate) in enumerate((('Ada', '45.50'), ('', '120'), ('Alan', '0'))):
+            tutor = User.objects.create_user(
+                username=f'fasttutor{i}', email=f'fasttutor{i}@test.com', password='testpass123', role='tutor',
+                first_name=first_name)
+            tutor.tutor_profile.hourly_rate = Decimal(rate)
+            tutor.tutor_profile.bio = f'Bio {i}'
+            tutor.tutor_profile.save()
+            tutor.tutor_profile.subjects.add(*([physics, math] if i == 0 else [math]))
+            tutors.append(tutor)
+        start = datetime.now(pytz.UTC).replace(microsecond=123456) + timedelta(days=1)
+        for i in range(5):
+            lesson = LessonRequest.objects.create(
+                student=self.student, tutor=tutors[i % 3], subject=math if i % 3 else physics,
+                start_time=start + timedelta(hours=3 * i), duration_minutes=45 + i,
+                status='completed' if i < 2 else 'pending', note='Bring notes' if i == 1 else None)
+            if i == 0:
+                Review.objects.create(lesson_request=lesson, tutor=lesson.tutor, student=self.student, rating=4,
+                                      comment='Good')
+        token = ClaimsRefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        self.headers = {'Authorization': f'Bearer {token.access_token}'}
+
+    def assertSameAsSerializer(self, name, params):
+        cache.clear()
+        fast = self.client.get(reverse(name), params)
+        cache.clear()
+        with mock.patch('core.fastpath.get_row_builder', return_value=None):
+            slow = self.client.get(reverse(name), params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_tutor_list_matches_serializer(self):
+        for params in ({}, {'ordering': 'tutor_profile__hourly_rate'}, {'pagination': 'cursor', 'limit': 2},
+                       {'fields': 'name,subjects'}, {'search': 'ada'}):
+            self.assertSameAsSerializer('tutors', params)
+
+    def test_lesson_request_list_matches_serializer(self):
+        for params in ({}, {'status': 'completed'}, {'expand': 'review,end_time'},
+                       {'fields': 'id,start_time,tutor_name', 'pagination': 'cursor', 'limit': 2}):
+            self.assertSameAsSerializer('lesson-requests', params)
+
+    def test_cursor_pages_follow(self):
+        first = self.assertSameAsSerializer('lesson-requests', {'pagination': 'cursor', 'limit': 3})
+        second = self.client.get(first.data['next'])
+        self.assertEqual(len(first.data['results']) + len(second.data['results']), 5)
+
+    def test_async_list_matches_serializer(self):
+        view = async_views.TutorListView.as_view()
+        for params in ({}, {'fields': 'id,subjects,hourly_rate'}):
+            expected = self.assertSameAsSerializer('tutors', params)
+            cache.clear()
+            request = AsyncRequestFactory().get(reverse('tutors'), params)
+            self.assertEqual(async_to_sync(view)(request).content, expected.content)
+
+    def test_list_skips_serializer(self):
+        with mock.patch.object(TutorListSerializer, 'to_representation', side_effect=AssertionError('serialized')):
+            response = self.client.get(reverse('tutors'))
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class ORJSONRendererTest(ThrottleResetMixin, APITestCase):
+    """core.renderers produces DRF's JSON bytes and parses like DRF."""
+
+    def assertSameBytes(self, data, accepted_media_type=None):
+        expected = JSONRenderer().render(data, accepted_media_type)
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type), expected)
+
+    def test_render_matches_json_renderer(self):
+        utc = datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=pytz.UTC)
+        payload = {
+            'decimal': Decimal('45.50'),
+            'datetimes': [utc, utc.astimezone(pytz.timezone('Europe/Istanbul')), utc.replace(tzinfo=None)],
+            'date': utc.date(),
+            'time': utc.time(),
+            'duration': timedelta(minutes=90),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Geçersiz'),
+            'text': 'Ders \u2028 notu \u2029 "alıntı" \\ \x1f 😀',
+            'floats': [0.1, 4.5, 0.0, -2.25, 123456789.123],
+            'nested': {'ids': (1, 2), 'empty': [], 'none': None, 'flags': [True, False]},
+        }
+        self.assertSameBytes(payload)
+        self.assertSameBytes(payload, 'application/json; indent=4')
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_outputs_orjson_writes_differently_fall_back(self):
+        for value in (1e-05, 1e16, 12345678901234567890.0, 2 ** 70, {1: 'a'}, {'set': {3}}):
+            self.assertSameBytes(value)
+        with mock.patch('core.renderers.orjson.dumps', wraps=orjson.dumps) as dumps:
+            self.assertSameBytes({'rating': 4.5})
+        dumps.assert_called_once()
+
+    def test_api_responses_match_json_renderer(self):
+        subject = Subject.objects.create(name='Mathematics')
+        tutor = User.objects.create_user(
+            username='orjsontutor', email='orjsontutor@test.com', password='testpass123', role='tutor',
+            first_name='Ayşe')
+        tutor.tutor_profile.hourly_rate = Decimal('45.50')
+        tutor.tutor_profile.save()
+        tutor.tutor_profile.subjects.add(subject)
+        for name in ('tutors', 'subjects'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_parser_matches_json_parser(self):
+        for body in (b'{"tutor": 1, "note": "\u00e7ok iyi", "rate": 45.5, "big": 123456789012345678901234}',
+                     '{"not": "ascii ğüş"}'.encode(), b'[]'):
+            self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        for body in (b'{"broken": ', b'{"nan": NaN}'):
+            with self.assertRaises(ParseError) as expected:
+                JSONParser().parse(io.BytesIO(body))
+            with self.assertRaises(ParseError) as raised:
+                ORJSONParser().parse(io.BytesIO(body))
+            self.assertEqual(str(raised.exception), str(expected.exception))
+
+
+class LessonExportTest(ThrottleResetMixin, APITestCase):
+    """/api/lesson-requests/export/ and the admin actions stream the API representation in chunks."""
+
+    def setUp(self):
+        super().setUp()
+        math = Subject.objects.create(name='Mathematics')
+        self.student = User.objects.create_user(
+            username='exportstudent', email='exportstudent@test.com', password='testpass123', role='student',
+            first_name='Grace')
+        self.tutor = User.objects.create_user(
+            username='exporttutor', email='exporttutor@test.com', password='testpass123', role='tutor',
+            first_name='Ada', last_name='Lovelace')
+        other = User.objects.create_user(
+            username='exportother', email='exportother@test.com', password='testpass123', role='tutor')
+        self.start = datetime(2026, 3, 1, 9, tzinfo=pytz.UTC)
+        for i in range(5):
+            lesson = LessonRequest.objects.create(
+                student=self.student, tutor=self.tutor, subject=math, start_time=self.start + timedelta(days=i),
+                duration_minutes=60, status='completed' if i < 2 else 'pending',
+                note='Virgül, "tırnak"' if i == 1 else None)
+            if i == 0:
+                Review.objects.create(lesson_request=lesson, tutor=self.tutor, student=self.student, rating=5,
+                                      comment='Harika')
+        LessonRequest.objects.create(student=self.student, tutor=other, subject=math,
+                                     start_time=self.start, duration_minutes=30)
+        self.authenticate(self.tutor)
+
+    def authenticate(self, user):
+        token = ClaimsRefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def export(self, params=None, **extra):
+        response = self.client.get(reverse('lesson-requests-export'), params or {}, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_rows_match_api(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="lesson-requests-[\d-]+\.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        api = self.client.get(reverse('lesson-requests'), {'expand': 'review,end_time'}).json()
+        self.assertEqual(rows, sorted(api['results'], key=lambda row: row['start_time']))
+        self.assertEqual(rows[0]['review']['rating'], 5)
+
+    def test_csv_flattens_nested_fields(self):
+        response, body = self.export({'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        header, *rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(header, export.columns())
+        self.assertIn('review.rating', header)
+        self.assertEqual(len(rows), 5)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual((row['review.rating'], row['review.comment'], row['note']), ('5', 'Harika', ''))
+        self.assertEqual(dict(zip(header, rows[1]))['note'], 'Virgül, "tırnak"')
+        self.assertEqual(self.export(HTTP_ACCEPT='text/csv')[1], body)
+
+    def test_status_and_date_filters(self):
+        def ids(params):
+            return [json.loads(line)['start_time'][:10] for line in self.export(params)[1].splitlines()]
+
+        self.assertEqual(ids({'status': 'completed'}), ['2026-03-01', '2026-03-02'])
+        self.assertEqual(len(ids({'status': 'pending,completed'})), 5)
+        self.assertEqual(ids({'start': '2026-03-02T00:00:00Z', 'end': '2026-03-04T09:00:00Z'}),
+                         ['2026-03-02', '2026-03-03'])
+        self.authenticate(self.student)
+        self.assertEqual(len(ids({})), 6)
+        self.assertEqual(ids({'role': 'tutor'}), [])
+
+    def test_invalid_params_rejected(self):
+        url = reverse('lesson-requests-export')
+        for params in ({'status': 'done'}, {'start': '2026-03-02T00:00:00Z', 'end': '2026-03-01T00:00:00Z'},
+                       {'role': 'admin'}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.credentials()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rows_are_read_in_chunks(self):
+        queryset = export.lesson_history(self.tutor)
+        with mock.patch.object(type(queryset), 'iterator', autospec=True,
+                               side_effect=lambda qs, chunk_size: iter(list(qs))) as iterator:
+            chunks = list(export.chunks(queryset, chunk_size=2))
+        self.assertEqual(iterator.call_args.kwargs, {'chunk_size': 2})
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    def test_asgi_sends_each_chunk_as_it_is_rendered(self):
+        from piCourse.asgi import application
+
+        rendered, sent = [], []
+        original = export.chunks
+
+        def chunks(queryset, names, chunk_size):
+            for chunk in original(queryset, names, 2):
+                rendered.append(len(chunk))
+                yield chunk
+
+        requests = [{'type': 'http.request', 'body': b''}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and message.get('body'):
+                sent.append((len(rendered), message['body']))
+
+        token = ClaimsRefreshToken.for_user(self.tutor).access_token
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': reverse('lesson-requests-export'), 'query_string': b'',
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        }
+        with mock.patch.object(export, 'chunks', chunks):
+            async_to_sync(application)(scope, receive, send)
+        # Senkron iteratör önce listeye toplanırdı: her parça gönderilmeden tüm chunk'lar okunmuş olurdu
+        self.assertEqual([count for count, _ in sent], [1, 2, 3])
+        self.assertEqual(len(b''.join(body for _, body in sent).splitlines()), 5)
+
+    def test_admin_actions_stream_selection(self):
+        admin = User.objects.create_superuser(username='exportadmin', email='exportadmin@test.com',
+                                              password='testpass123')
+        self.client.force_login(admin)
+        url = reverse('admin:core_lessonrequest_changelist')
+        selected = LessonRequest.objects.filter(tutor=self.tutor, status='completed').values_list('pk', flat=True)
+        response = self.client.post(url, {'action': 'export_as_csv', '_selected_action': list(selected)})
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+        response = self.client.post(url, {'action': 'export_as_ndjson', '_selected_action': list(selected)})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 2)
+
+
+class QueryPlanTest(ThrottleResetMixin, APITestCase):
+    """Hot queries must be index searches, never full table scans."""
+    # "SCAN tablo" indeks kullanmayan tam tarama; "SCAN tablo USING INDEX" sıralı indeks taramasıdır
+    full_scan = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)')
+
+    def setUp(self):
+        super().setUp()
+        self.factory = APIRequestFactory()
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.student = User.objects.create_user(
+            username='planstudent',
+            email='planstudent@test.com',
+            password='testpass123',
+            role='student'
+        )
+        self.tutor = User.objects.create_user(
+            username='plantutor',
+            email='plantutor@test.com',
+            password='testpass123',
+            role='tutor'
+        )
+
+    def view_queryset(self, view_class, user=None, params=None, **kwargs):
+        request = self.factory.get('/', params or {})
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = view_class(kwargs=kwargs, format_kwarg=None)
+        view.request = view.initialize_request(request)
+        return view.filter_queryset(view.get_queryset())
+
+    def assertIndexed(self, queryset):
+        plan = queryset.explain()
+        scans = self.full_scan.findall(plan)
+        self.assertFalse(scans, f'Full table scan on {scans}:\n{plan}')
+
+    def test_lesson_requests_for_student(self):
+        self.assertIndexed(self.view_queryset(views.LessonRequestListCreateView, self.student))
+
+    def test_lesson_requests_for_tutor_by_status(self):
+        qs = self.view_queryset(views.LessonRequestListCreateView, self.tutor, {'status': 'pending'})
+        self.assertIndexed(qs)
+
+    def test_lesson_requests_keyset_page(self):
+        qs = self.view_queryset(views.LessonRequestListCreateView, self.student)
+        self.assertIndexed(qs.order_by('-created_at', '-id')[:10])
+
+    def test_tutor_list(self):
+        self.assertIndexed(self.view_queryset(views.TutorListView)[:10])
+
+    def test_tutor_list_by_subject(self):
+        qs = self.view_queryset(views.TutorListView, params={'subject': self.subject.id})
+        self.assertIndexed(qs[:10])
+
+    def test_tutor_list_by_min_rating(self):
+        qs = self.view_queryset(views.TutorListView, params={'min_rating': 4})
+        self.assertIndexed(qs[:10])
+
+    def test_tutor_list_by_review_count(self):
+        qs = self.view_queryset(views.TutorListView, params={'ordering': '-tutor_profile__rating_count'})
+        self.assertIndexed(qs[:10])
+
+    def test_tutor_detail(self):
+        self.assertIndexed(views.TutorDetailView().get_queryset().filter(pk=self.tutor.id))
+
+    def test_tutor_reviews(self):
+        qs = self.view_queryset(views.TutorReviewListView, pk=self.tutor.id)
+        self.assertIndexed(qs[:10])
+
+    def test_login_email_lookup(self):
+        self.assertIndexed(User.objects.filter(email='planstudent@test.com'))
+
+    def test_booking_overlap_lookup(self):
+        start = datetime.now(pytz.UTC)
+        self.assertIndexed(scheduling.bookings_between(self.tutor.id, start, start + timedelta(hours=1)))
+
+    def test_lesson_request_validation_lookup(self):
+        qs = TutorProfile.subjects.through.objects.filter(
+            tutorprofile__user_id=self.tutor.id,
+            tutorprofile__user__role='tutor',
+            subject_id=self.subject.id,
+        )
+        self.assertIndexed(qs)
+
+
+class BookingTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.lesson_request_url = reverse('lesson-requests')
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.students = [
+            User.objects.create_user(
+                username=f'bookstudent{i}',
+                email=f'bookstudent{i}@test.com',
+                password='testpass123',
+                role='student'
+            )
+            for i in range(2)
+        ]
+        self.tutor = User.objects.create_user(
+            username='booktutor',
+            email='booktutor@test.com',
+            password='testpass123',
+            role='tutor'
+        )
+        self.tutor.tutor_profile.subjects.add(self.subject)
+        self.day = datetime(2030, 1, 7, tzinfo=pytz.UTC)
+
+    def _book(self, student, hour, minutes=60):
+        token = RefreshToken.for_user(student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        return self.client.post(self.lesson_request_url, {
+            'tutor': self.tutor.id,
+            'subject': self.subject.id,
+            'start_time': (self.day + timedelta(hours=hour)).isoformat(),
+            'duration_minutes': minutes
+        })
+
+    def test_end_time_is_computed(self):
+        response = self._book(self.students[0], 10, 90)
+        lesson = LessonRequest.objects.get(pk=response.data['id'])
+        self.assertEqual(lesson.end_time, self.day + timedelta(hours=11, minutes=30))
+
+    def test_overlapping_booking_is_rejected(self):
+        self.assertEqual(self._book(self.students[0], 10, 90).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._book(self.students[1], 11).status_code, status.HTTP_409_CONFLICT)
+        # Bitişik slot çakışma sayılmaz
+        self.assertEqual(self._book(self.students[1], 11.5).status_code, status.HTTP_201_CREATED)
+
+    def test_rejected_lesson_frees_the_slot(self):
+        first = self._book(self.students[0], 10)
+        LessonRequest.objects.filter(pk=first.data['id']).update(status='rejected')
+        second = self._book(self.students[1], 10)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+
+        # Reddedilen talep geri kabul edilemez; slot artık dolu
+        token = RefreshToken.for_user(self.tutor)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        url = reverse('lesson-request-update', kwargs={'pk': first.data['id']})
+        response = self.client.patch(url, {'status': 'accepted'})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_booking_takes_write_lock_before_conflict_check(self):
+        # Kilit yalnızca bu yolda alınır; diğer atomic blokları DEFERRED başlar
+        self.assertNotIn('transaction_mode', connection.settings_dict.get('OPTIONS', {}))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._book(self.students[0], 10).status_code, status.HTTP_201_CREATED)
+        sql = [query['sql'] for query in ctx.captured_queries]
+        lock = next(i for i, s in enumerate(sql) if s.endswith('WHERE 0'))
+        check = next(i for i, s in enumerate(sql) if s.startswith('SELECT') and LessonRequest._meta.db_table in s)
+        self.assertLess(lock, check)
+
+    def test_write_lock_serializes_writers_but_not_readers(self):
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        path = os.path.join(tempfile.mkdtemp(), 'lock.sqlite3')
+        wrappers = [
+            DatabaseWrapper({**connection.settings_dict, 'NAME': path, 'OPTIONS': {'timeout': 0.05}}, alias=f'lock{i}')
+            for i in range(2)
+        ]
+        writer, other = wrappers
+        try:
+            with writer.cursor() as cursor:
+                cursor.execute('CREATE TABLE django_migrations (id integer PRIMARY KEY)')
+                cursor.execute('BEGIN')
+            locking.write_lock(writer)
+            with other.cursor() as cursor:
+                # Okuyan işlem beklemez; kilidi isteyen ikinci yazar bekler
+                cursor.execute('BEGIN')
+                cursor.execute('SELECT COUNT(*) FROM django_migrations')
+                with self.assertRaisesMessage(OperationalError, 'locked'):
+                    locking.write_lock(other)
+                cursor.execute('ROLLBACK')
+            with writer.cursor() as cursor:
+                cursor.execute('COMMIT')
+            with other.cursor() as cursor:
+                cursor.execute('BEGIN')
+                locking.write_lock(other)
+                cursor.execute('COMMIT')
+        finally:
+            for wrapper in wrappers:
+                wrapper.close()
+
+    def test_invalid_duration(self):
+        self.assertEqual(self._book(self.students[0], 10, 0).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_duration_bound_is_enforced_by_the_database(self):
+        # Çakışma taraması MAX_LESSON_MINUTES'a dayanır; API dışı yazmalar da sınırı aşamaz
+        lesson = LessonRequest.objects.get(pk=self._book(self.students[0], 10).data['id'])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LessonRequest.objects.filter(pk=lesson.pk).update(duration_minutes=scheduling.MAX_LESSON_MINUTES + 1)
+
+        # Kısıttan önce kaydedilmiş uzun satırlar migration'ı durdurur
+        from django.apps import apps
+        from importlib import import_module
+        migration = import_module('core.migrations.0013_lessonrequest_duration_range')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA ignore_check_constraints = ON')
+            try:
+                LessonRequest.objects.filter(pk=lesson.pk).update(duration_minutes=600)
+            finally:
+                cursor.execute('PRAGMA ignore_check_constraints = OFF')
+        with self.assertRaisesMessage(IntegrityError, f'ids: {lesson.pk}'):
+            migration.check_durations(apps, None)
+        LessonRequest.objects.filter(pk=lesson.pk).update(duration_minutes=60)
+        migration.check_durations(apps, None)
+
+    def test_availability_returns_gaps_between_bookings(self):
+        self._book(self.students[0], 10, 60)
+        self._book(self.students[1], 13, 30)
+        url = reverse('tutor-availability', kwargs={'pk': self.tutor.id})
+        response = self.client.get(url, {
+            'start': (self.day + timedelta(hours=9)).isoformat(),
+            'end': (self.day + timedelta(hours=14)).isoformat(),
+            'min_minutes': 45,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = [(slot['start'][11:16], slot['end'][11:16]) for slot in response.data['slots']]
+        # 13:30-14:00 aralığı min_minutes'tan kısa olduğu için dönmez
+        self.assertEqual(slots, [('09:00', '10:00'), ('11:00', '13:00')])
+
+    def test_availability_validates_range(self):
+        url = reverse('tutor-availability', kwargs={'pk': self.tutor.id})
+        response = self.client.get(url, {
+            'start': self.day.isoformat(),
+            'end': (self.day + timedelta(days=60)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('tutor-availability', kwargs={'pk': self.students[0].id}), {
+            'start': self.day.isoformat(),
+            'end': (self.day + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkLessonRequestTest(QueryBudgetMixin, ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.bulk_url = reverse('lesson-requests-bulk')
+        self.bulk_status_url = reverse('lesson-requests-bulk-status')
+        self.math = Subject.objects.create(name='Mathematics')
+        self.art = Subject.objects.create(name='Art')
+        self.student = User.objects.create_user(
+            username='bulkstudent',
+            email='bulkstudent@test.com',
+            password='testpass123',
+            role='student'
+        )
+        self.tutors = []
+        for i in range(2):
+            tutor = User.objects.create_user(
+                username=f'bulktutor{i}',
+                email=f'bulktutor{i}@test.com',
+                password='testpass123',
+                role='tutor'
+            )
+            tutor.tutor_profile.subjects.add(self.math)
+            self.tutors.append(tutor)
+        self.day = datetime(2030, 1, 7, tzinfo=pytz.UTC)
+
+    def _authenticate(self, user):
+        token = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def _item(self, tutor, hour, subject=None):
+        return {
+            'tutor': tutor.id,
+            'subject': (subject or self.math).id,
+            'start_time': (self.day + timedelta(hours=hour)).isoformat(),
+            'duration_minutes': 60
+        }
+
+    def test_bulk_create_reports_per_item_results(self):
+        self._authenticate(self.student)
+        items = [
+            self._item(self.tutors[0], 9),
+            self._item(self.tutors[0], 9.5),  # aynı toplu istekteki satırla çakışır
+            self._item(self.tutors[1], 9),
+            self._item(self.tutors[1], 12, subject=self.art),
+            {'tutor': self.tutors[0].id},
+        ]
+        response = self.client.post(self.bulk_url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['ok'] for result in results], [True, False, True, False, False])
+        self.assertIn('start_time', results[1]['errors'])
+        self.assertIn('subject', results[3]['errors'])
+        self.assertEqual(LessonRequest.objects.count(), 2)
+        lesson = LessonRequest.objects.get(pk=results[0]['id'])
+        self.assertEqual(lesson.student, self.student)
+        self.assertEqual(lesson.end_time, self.day + timedelta(hours=10))
+
+    def test_bulk_create_query_count_is_constant(self):
+        self._authenticate(self.student)
+        items = [self._item(self.tutors[i % 2], 9 + i) for i in range(20)]
+        # Yazma kilidi dahil (core.locking); eğitmen sayısından bağımsız
+        with self.assertQueryBudget(7):
+            response = self.client.post(self.bulk_url, items, format='json')
+        self.assertTrue(all(result['ok'] for result in response.data['results']))
+
+    def test_bulk_status_transitions(self):
+        tutor = self.tutors[0]
+        lessons = [
+            LessonRequest.objects.create(
+                student=self.student, tutor=tutor, subject=self.math,
+                start_time=self.day + timedelta(hours=hour), duration_minutes=60
+            )
+            for hour in range(9, 14)
+        ]
+        other = LessonRequest.objects.create(
+            student=self.student, tutor=self.tutors[1], subject=self.math,
+            start_time=self.day, duration_minutes=60
+        )
+        self._authenticate(tutor)
+        items = [{'id': lesson.id, 'status': 'accepted'} for lesson in lessons]
+        items += [{'id': other.id, 'status': 'accepted'}, {'id': lessons[0].id, 'status': 'rejected'}]
+        with self.assertQueryBudget(6):
+            response = self.client.patch(self.bulk_status_url, items, format='json')
+        results = response.data['results']
+        self.assertEqual([result['ok'] for result in results], [True] * 5 + [False, False])
+        self.assertEqual(
+            set(LessonRequest.objects.filter(tutor=tutor).values_list('status', flat=True)), {'accepted'}
+        )
+        self.assertEqual(LessonRequest.objects.get(pk=other.id).status, 'pending')
+
+    def test_bulk_status_reopen_checks_calendar(self):
+        tutor = self.tutors[0]
+        rejected = LessonRequest.objects.create(
+            student=self.student, tutor=tutor, subject=self.math,
+            start_time=self.day, duration_minutes=60, status='rejected'
+        )
+        booked = LessonRequest.objects.create(
+            student=self.student, tutor=tutor, subject=self.math,
+            start_time=self.day, duration_minutes=60, status='accepted'
+        )
+        self._authenticate(tutor)
+        response = self.client.patch(self.bulk_status_url, [{'id': rejected.id, 'status': 'accepted'}], format='json')
+        self.assertFalse(response.data['results'][0]['ok'])
+
+        # Aynı toplu istekte dolu slot serbest bırakılırsa yeniden açma başarılı olur
+        items = [{'id': booked.id, 'status': 'rejected'}, {'id': rejected.id, 'status': 'accepted'}]
+        response = self.client.patch(self.bulk_status_url, items, format='json')
+        self.assertEqual([result['ok'] for result in response.data['results']], [True, True])
+
+    def test_bulk_endpoints_check_role_and_payload(self):
+        self._authenticate(self.tutors[0])
+        response = self.client.post(self.bulk_url, [self._item(self.tutors[0], 9)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.patch(self.bulk_status_url, {'id': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StructuredLoggingTest(ThrottleResetMixin, APITestCase):
+    def _record(self, level=logging.INFO, **extra):
+        record = logging.LogRecord('core.views', level, __file__, 1, 'lesson_request.created', (), None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_request_id_is_echoed_or_generated(self):
+        response = self.client.get(reverse('subjects'), HTTP_X_REQUEST_ID='abc123')
+        self.assertEqual(response['X-Request-ID'], 'abc123')
+        response = self.client.get(reverse('subjects'))
+        self.assertEqual(len(response['X-Request-ID']), 32)
+
+    def test_json_formatter_includes_context_and_extras(self):
+        token = log.request_id_var.set('req-1')
+        try:
+            record = self._record(user_id=7)
+            self.assertTrue(log.RequestContextFilter().filter(record))
+        finally:
+            log.request_id_var.reset(token)
+        payload = json.loads(log.JsonFormatter().format(record))
+        self.assertEqual(payload['msg'], 'lesson_request.created')
+        self.assertEqual(payload['request_id'], 'req-1')
+        self.assertEqual(payload['user_id'], 7)
+
+    def test_unsampled_requests_keep_only_warnings(self):
+        log_filter = log.RequestContextFilter(always_level='WARNING')
+        token = log.sampled_var.set(False)
+        try:
+            self.assertFalse(log_filter.filter(self._record(logging.INFO)))
+            self.assertTrue(log_filter.filter(self._record(logging.ERROR)))
+        finally:
+            log.sampled_var.reset(token)
+
+    def test_queue_handler_writes_in_background_and_never_blocks(self):
+        stream = io.StringIO()
+        handler = log.QueueStreamHandler(stream=stream, maxsize=1)
+        handler.listener.stop()  # dinleyici durunca kuyruk dolar
+        handler.setFormatter(log.JsonFormatter())
+        handler.handle(self._record())
+        handler.handle(self._record())
+        self.assertEqual(handler.dropped, 1)
+        handler.listener.start()
+        handler.close()
+        self.assertEqual(json.loads(stream.getvalue())['msg'], 'lesson_request.created')
+
+    def test_lesson_request_create_does_not_print(self):
+        subject = Subject.objects.create(name='Mathematics')
+        student = User.objects.create_user(
+            username='logstudent', email='logstudent@test.com', password='testpass123', role='student'
+        )
+        token = RefreshToken.for_user(student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.client.post(reverse('lesson-requests'), {'tutor': 999, 'subject': subject.id})
+        self.assertEqual(stdout.getvalue(), '')
+
+    @unittest.skipIf('CORE_LOG_LEVEL' in os.environ, 'CORE_LOG_LEVEL overrides the test default')
+    def test_info_records_are_not_emitted_under_tests(self):
+        self.assertTrue(settings.TESTING)
+        self.assertFalse(logging.getLogger('core.views').isEnabledFor(logging.INFO))
+        self.assertTrue(logging.getLogger('core.views').isEnabledFor(logging.WARNING))
+
+
+class MetricsTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        metrics.registry.reset()
+        Subject.objects.create(name='Physics')
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse('subjects'))
+        self.client.get(reverse('subjects'))
+        self.client.get(reverse('me'))
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('picourse_requests_total{view="subjects",method="GET",status="200"} 2', body)
+        self.assertIn('picourse_requests_total{view="me",method="GET",status="401"} 1', body)
+        self.assertIn('picourse_request_duration_seconds_count{view="subjects",method="GET"} 2', body)
+        self.assertIn('picourse_request_duration_seconds_bucket{view="subjects",method="GET",le="+Inf"} 2', body)
+        # ilk istek veritabanına gider, ikincisi önbellekten döner
+        self.assertIn('picourse_db_queries_sum{view="subjects"} 2', body)
+        self.assertIn('picourse_response_bytes_total{view="subjects"}', body)
+
+    def test_throttled_requests_are_counted(self):
+        metrics.registry.record('tutors', 'GET', 429, 0.001, 0, 0.0, 10)
+        body = metrics.registry.render()
+        self.assertIn('picourse_throttled_total{view="tutors"} 1', body)
+
+    def test_endpoint_is_internal_only(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LoginFastPathTest(QueryBudgetMixin, ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='fastlogin', email='fastlogin@test.com', password='testpass123', role='student'
+        )
+
+    def _count_verifies(self):
+        original = PBKDF2PasswordHasher.verify
+        calls = []
+
+        def verify(hasher, password, encoded):
+            calls.append(password)
+            return original(hasher, password, encoded)
+
+        return calls, mock.patch.object(PBKDF2PasswordHasher, 'verify', verify)
+
+    def test_email_login_hashes_once(self):
+        calls, patcher = self._count_verifies()
+        with patcher, self.assertQueryBudget(1):
+            response = self.client.post(reverse('login'), {'email': 'fastlogin@test.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(calls), 1)
+
+    def test_wrong_password_hashes_once(self):
+        calls, patcher = self._count_verifies()
+        with patcher:
+            response = self.client.post(reverse('login'), {'email': 'fastlogin@test.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(calls), 1)
+
+    def test_username_wins_over_other_users_email(self):
+        User.objects.create_user(username='other', email='fastlogin', password='otherpass123', role='student')
+        response = self.client.post(reverse('login'), {'username': 'fastlogin', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_email_is_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username='dupe', email='fastlogin@test.com', password='x', role='student')
+        # Boş email birden fazla kullanıcıda olabilir
+        User.objects.create_user(username='blank1', email='', password='x', role='student')
+        User.objects.create_user(username='blank2', email='', password='x', role='student')
+
+    @override_settings(PASSWORD_HASHING={'ITERATIONS': 1500, 'UPGRADE': 'on_login'})
+    def test_upgrade_on_login(self):
+        self.client.post(reverse('login'), {'username': 'fastlogin', 'password': 'testpass123'})
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1500$'))
+
+    @override_settings(PASSWORD_HASHING={'ITERATIONS': 1500, 'UPGRADE': 'never'})
+    def test_upgrade_disabled(self):
+        encoded = self.user.password
+        with self.assertQueryBudget(1):
+            response = self.client.post(reverse('login'), {'username': 'fastlogin', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, encoded)
+
+
+class ClaimsAuthenticationTest(QueryBudgetMixin, ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = User.objects.create_user(
+            username='claimstudent', email='claimstudent@test.com', password='testpass123', role='student'
+        )
+
+    def test_login_embeds_role_and_profile_claims(self):
+        response = self.client.post(reverse('login'), {'username': 'claimstudent', 'password': 'testpass123'})
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['role'], 'student')
+        self.assertEqual(access['profile_id'], self.student.student_profile.id)
+
+    def test_token_user_hydrates_once(self):
+        token = ClaimsRefreshToken.for_user(self.student)
+        user = auth.ClaimsJWTAuthentication().get_user(token.access_token)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.id, user.role), (self.student.id, 'student'))
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.email), ('claimstudent', 'claimstudent@test.com'))
+
+    def test_me_from_claims(self):
+        token = ClaimsRefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        with self.assertQueryBudget(1):
+            response = self.client.get(reverse('me'))
+        self.assertEqual(response.data['username'], 'claimstudent')
+        self.assertIn('profile', response.data)
+
+    def test_token_without_claims_still_works(self):
+        token = RefreshToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        response = self.client.get(reverse('me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'claimstudent@test.com')
+
+
+class SharedThrottleTest(ThrottleResetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.location = os.path.join(self.tmpdir.name, 'throttle.sqlite3')
+
+    def test_gcra_allows_burst_then_spaces_requests(self):
+        store = throttling.SQLiteThrottleStore(self.location)
+        now = 1000.0
+        # 3/dakika: 3'lük patlama, sonra her 20 saniyede bir istek
+        results = [store.hit('k', now, 20.0, 60.0)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        allowed, tat = store.hit('k', now, 20.0, 60.0)
+        self.assertFalse(allowed)
+        self.assertEqual(tat, now + 60.0)
+        self.assertTrue(store.hit('k', now + 20.0, 20.0, 60.0)[0])
+
+    def test_processes_share_the_same_counter(self):
+        # Aynı dosyayı açan iki depo, iki ayrı worker sürecini temsil eder
+        first = throttling.SQLiteThrottleStore(self.location)
+        second = throttling.SQLiteThrottleStore(self.location)
+        now = time.time()
+        self.assertTrue(first.hit('user_1', now, 30.0, 60.0)[0])
+        self.assertTrue(second.hit('user_1', now, 30.0, 60.0)[0])
+        self.assertFalse(first.hit('user_1', now, 30.0, 60.0)[0])
+        self.assertTrue(second.hit('user_2', now, 30.0, 60.0)[0])
+
+    def test_scoped_throttle_denies_with_wait(self):
+        class TwoPerMinute(throttling.ScopedRateThrottle):
+            THROTTLE_RATES = {'test_scope': '2/min'}
+
+        class View:
+            throttle_scope = 'test_scope'
+
+        with override_settings(THROTTLE={'LOCATION': self.location}):
+            request = APIRequestFactory().get('/')
+            request.user = AnonymousUser()
+            allowed = [TwoPerMinute().allow_request(request, View()) for _ in range(2)]
+            throttle = TwoPerMinute()
+            self.assertEqual(allowed, [True, True])
+            self.assertFalse(throttle.allow_request(request, View()))
+            self.assertAlmostEqual(throttle.wait(), 30.0, delta=1.0)
+
+
+class AsyncViewsTest(ThrottleResetMixin, TestCase):
+    """core.async_views must return what the sync DRF views return."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.subject = Subject.objects.create(name='Mathematics')
+        Subject.objects.create(name='Physics')
+        self.tutors = []
+        for i in range(3):
+            tutor = User.objects.create_user(
+                username=f'asynctutor{i}', email=f'asynctutor{i}@test.com', password='testpass123',
+                role='tutor', first_name=f'Async{i}',
+            )
+            tutor.tutor_profile.rating = i
+            tutor.tutor_profile.bio = 'Calculus' if i == 0 else 'Mechanics'
+            tutor.tutor_profile.save()
+            tutor.tutor_profile.subjects.add(self.subject)
+            self.tutors.append(tutor)
+        self.student = User.objects.create_user(
+            username='asyncstudent', email='asyncstudent@test.com', password='testpass123', role='student'
+        )
+
+    def async_get(self, view, path, params=None, headers=None, **kwargs):
+        request = AsyncRequestFactory().get(path, params or {}, headers=headers)
+        return async_to_sync(view)(request, **kwargs)
+
+    def assertSameResponse(self, async_view, name, params=None, headers=None, **kwargs):
+        url = reverse(name, kwargs=kwargs or None)
+        cache.clear()
+        expected = self.client.get(url, params or {}, headers=headers)
+        cache.clear()
+        response = self.async_get(async_view, url, params, headers, **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), expected.json())
+        return response
+
+    def test_subject_list(self):
+        self.assertSameResponse(async_views.SubjectListView.as_view(), 'subjects', {'limit': 1, 'offset': 1})
+
+    def test_tutor_list(self):
+        view = async_views.TutorListView.as_view()
+        self.assertSameResponse(view, 'tutors')
+        self.assertSameResponse(view, 'tutors', {'pagination': 'cursor', 'limit': 2})
+        self.assertSameResponse(view, 'tutors', {'search': 'calculus'})
+        self.assertSameResponse(view, 'tutors', {'tutor_profile__subjects': self.subject.id})
+
+    def test_tutor_detail(self):
+        view = async_views.TutorDetailView.as_view()
+        self.assertSameResponse(view, 'tutor-detail', pk=self.tutors[0].id)
+        self.assertSameResponse(view, 'tutor-detail', pk=self.student.id)
+
+    def test_me(self):
+        view = async_views.me
+        claims = ClaimsRefreshToken.for_user(self.student).access_token
+        legacy = RefreshToken.for_user(self.student).access_token
+        self.assertSameResponse(view, 'me', headers={'Authorization': f'Bearer {claims}'})
+        self.assertSameResponse(view, 'me', headers={'Authorization': f'Bearer {legacy}'})
+        self.assertSameResponse(view, 'me')
+
+    def test_cache_hit_runs_no_queries(self):
+        view = async_views.TutorListView.as_view()
+        first = self.async_get(view, reverse('tutors'))
+        with self.assertNumQueries(0):
+            second = self.async_get(view, reverse('tutors'))
+        self.assertEqual(second.content, first.content)
+
+        not_modified = self.async_get(view, reverse('tutors'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_middleware_runs_in_async_mode(self):
+        metrics.registry.reset()
+        response = await self.async_client.get(reverse('subjects'), headers={'X-Request-ID': 'async-req'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Request-ID'], 'async-req')
+        body = metrics.registry.render()
+        self.assertIn('picourse_requests_total{view="subjects",method="GET",status="200"} 1', body)
+        # Sorgular sync_to_async iş parçacığında çalışsa da isteğe sayılır
+        self.assertIn('picourse_db_queries_count{view="subjects"} 1', body)
+        self.assertIn('picourse_db_queries_sum{view="subjects"} 2', body)
+
+    def test_throttle_check_runs_off_the_event_loop(self):
+        store = throttling.get_store()
+        original, loops = store.hit, []
+
+        def hit(*args):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return original(*args)
+
+        with mock.patch.object(store, 'hit', side_effect=hit):
+            self.async_get(async_views.SubjectListView.as_view(), reverse('subjects'))
+        self.assertEqual(loops[:1], [None])
+
+
+class ReviewTest(ThrottleResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.tutor = User.objects.create_user(
+            username='reviewtutor',
+            email='reviewtutor@test.com',
+            password='testpass123',
+            role='tutor'
+        )
+        self.tutor.tutor_profile.subjects.add(self.subject)
+        self.students = [
+            User.objects.create_user(
+                username=f'reviewstudent{i}',
+                email=f'reviewstudent{i}@test.com',
+                password='testpass123',
+                role='student'
+            )
+            for i in range(2)
+        ]
+        self.lessons = [
+            LessonRequest.objects.create(
+                student=student,
+                tutor=self.tutor,
+                subject=self.subject,
+                start_time=datetime(2030, 1, 7, 9 + i, tzinfo=pytz.UTC),
+                duration_minutes=60
+            )
+            for i, student in enumerate(self.students)
+        ]
+
+    def _authenticate(self, user):
+        token = ClaimsRefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def _complete(self, lesson):
+        self._authenticate(self.tutor)
+        url = reverse('lesson-request-update', kwargs={'pk': lesson.id})
+        response = self.client.patch(url, {'status': 'completed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _review(self, lesson, rating, student=None):
+        self._authenticate(student or lesson.student)
+        url = reverse('lesson-request-review', kwargs={'pk': lesson.id})
+        return self.client.post(url, {'rating': rating, 'comment': 'Thanks'})
+
+    def _profile(self):
+        return TutorProfile.objects.get(user=self.tutor)
+
+    def test_reviews_update_running_totals(self):
+        for lesson in self.lessons:
+            self._complete(lesson)
+        self.assertEqual(self._review(self.lessons[0], 5).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._review(self.lessons[1], 2).status_code, status.HTTP_201_CREATED)
+
+        profile = self._profile()
+        self.assertEqual((profile.rating_sum, profile.rating_count, profile.completed_lessons), (7, 2, 2))
+        self.assertEqual(profile.rating, 3.5)
+
+        Review.objects.get(lesson_request=self.lessons[1]).delete()
+        profile = self._profile()
+        self.assertEqual((profile.rating_sum, profile.rating_count, profile.rating), (5, 1, 5.0))
+        Review.objects.get(lesson_request=self.lessons[0]).delete()
+        self.assertEqual(self._profile().rating, 0.0)
+
+    def test_only_student_of_completed_lesson_reviews_once(self):
+        lesson = self.lessons[0]
+        self.assertEqual(self._review(lesson, 4).status_code, status.HTTP_400_BAD_REQUEST)
+        self._complete(lesson)
+        self.assertEqual(self._review(lesson, 4, student=self.students[1]).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self._review(lesson, 6).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._review(lesson, 4).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._review(lesson, 1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._profile().rating_count, 1)
+
+    def test_completed_lessons_follow_status_changes(self):
+        self._complete(self.lessons[0])
+        self.assertEqual(self._profile().completed_lessons, 1)
+
+        self._authenticate(self.tutor)
+        url = reverse('lesson-request-update', kwargs={'pk': self.lessons[0].id})
+        self.client.patch(url, {'status': 'accepted'})
+        self.assertEqual(self._profile().completed_lessons, 0)
+
+        response = self.client.patch(reverse('lesson-requests-bulk-status'), [
+            {'id': lesson.id, 'status': 'completed'} for lesson in self.lessons
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._profile().completed_lessons, 2)
+
+        LessonRequest.objects.get(pk=self.lessons[1].pk).delete()
+        self.assertEqual(self._profile().completed_lessons, 1)
+
+    def test_profile_save_keeps_concurrent_increments(self):
+        profile = self._profile()
+        profile.bio = 'Stale copy'
+        self._complete(self.lessons[0])
+        self._review(self.lessons[0], 4)
+        profile.save()
+
+        profile = self._profile()
+        self.assertEqual(profile.bio, 'Stale copy')
+        self.assertEqual((profile.rating, profile.rating_count, profile.completed_lessons), (4.0, 1, 1))
+
+    def test_tutor_list_sorts_and_filters_on_aggregates(self):
+        other = User.objects.create_user(
+            username='reviewtutor2',
+            email='reviewtutor2@test.com',
+            password='testpass123',
+            role='tutor'
+        )
+        self._complete(self.lessons[0])
+        self._review(self.lessons[0], 3)
+
+        self.client.credentials()
+        response = self.client.get(reverse('tutors'), {'min_reviews': 1})
+        self.assertEqual([t['id'] for t in response.data['results']], [self.tutor.id])
+        self.assertEqual(response.data['results'][0]['rating_count'], 1)
+        self.assertEqual(response.data['results'][0]['completed_lessons'], 1)
+
+        response = self.client.get(reverse('tutors'), {'min_rating': 3.5})
+        self.assertEqual(response.data['results'], [])
+
+        response = self.client.get(reverse('tutors'), {'ordering': 'tutor_profile__completed_lessons'})
+        self.assertEqual([t['id'] for t in response.data['results']], [other.id, self.tutor.id])
+
+        response = self.client.get(reverse('tutors'), {'min_rating': 'high'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('tutor-reviews', kwargs={'pk': self.tutor.id}))
+        self.assertEqual(response.data['results'][0]['rating'], 3)
+
+
+calls = []
+
+
+@tasks.task(name='tests.record')
+def record_task(value):
+    calls.append(value)
+
+
+@tasks.task(name='tests.fail', max_attempts=2)
+def failing_task():
+    raise RuntimeError('SMTP down')
+
+
+class TaskQueueTest(ThrottleResetMixin, TestCase):
+    """core.tasks queues on commit, runs, retries with backoff and reclaims expired leases."""
+
+    def setUp(self):
+        super().setUp()
+        calls.clear()
+
+    def test_enqueued_only_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                record_task.enqueue(value=1)
+                self.assertFalse(Task.objects.exists())
+        self.assertEqual(list(Task.objects.values_list('name', 'payload')), [('tests.record', {'value': 1})])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                record_task.enqueue(value=2)
+                raise ValueError
+        self.assertEqual((len(callbacks), Task.objects.count()), (0, 1))
+
+        self.assertEqual(tasks.run_pending('w1'), 1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS={'EAGER': True})
+    def test_eager_runs_in_process(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_task.enqueue(value=3)
+        self.assertEqual((calls, Task.objects.count()), ([3], 0))
+
+    def test_failures_back_off_then_fail(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            failing_task.enqueue()
+        before = timezone.now()
+        self.assertEqual(tasks.run_pending('w1'), 1)
+        job = Task.objects.get()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('SMTP down', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+        self.assertEqual(tasks.run_pending('w1'), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        tasks.run_pending('w1')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(tasks.run_pending('w1'), 0)
+
+    def test_expired_lease_is_reclaimed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_task.enqueue(value=4)
+        [lost] = tasks.claim('w1')
+        self.assertEqual(tasks.claim('w2'), [])
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        [job] = tasks.claim('w2')
+        # Geç kalan ilk işçi yeni sahibin satırına dokunmaz
+        tasks.run(lost, 'w1')
+        self.assertTrue(Task.objects.filter(worker='w2', status='running').exists())
+        self.assertTrue(tasks.run(job, 'w2'))
+        self.assertEqual((Task.objects.count(), calls), (0, [4, 4]))
+
+    def test_run_tasks_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_task.enqueue(value=5)
+        out = io.StringIO()
+        call_command('run_tasks', '--once', stdout=out)
+        self.assertIn('Ran 1 tasks', out.getvalue())
+        self.assertEqual(calls, [5])
+
+
+class LessonNotificationTest(ThrottleResetMixin, APITestCase):
+    """Lesson request events are mailed from the task queue, not in the request."""
+
+    def setUp(self):
+        super().setUp()
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.tutor = User.objects.create_user(
+            username='notifytutor', email='notifytutor@test.com', password='testpass123', role='tutor')
+        self.tutor.tutor_profile.subjects.add(self.subject)
+        self.student = User.objects.create_user(
+            username='notifystudent', email='notifystudent@test.com', password='testpass123', role='student',
+            first_name='Grace')
+
+    def authenticate(self, user):
+        token = ClaimsRefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+
+    def test_status_change_mails_student_after_worker_runs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson = LessonRequest.objects.create(
+                student=self.student, tutor=self.tutor, subject=self.subject,
+                start_time=datetime(2030, 1, 7, 9, tzinfo=pytz.UTC), duration_minutes=60)
+        self.authenticate(self.tutor)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('lesson-request-update', kwargs={'pk': lesson.id}),
+                                         {'status': 'accepted'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.count(), 2)
+
+        tasks.run_pending('w1')
+        self.assertEqual([message.to for message in mail.outbox], [['notifytutor@test.com'], ['notifystudent@test.com']])
+        self.assertIn('Grace requested a 60-minute Mathematics lesson', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[1].subject, 'Lesson request accepted: Mathematics')
+
+    def test_bulk_endpoints_queue_one_task_per_batch(self):
+        self.authenticate(self.student)
+        items = [{'tutor': self.tutor.id, 'subject': self.subject.id, 'duration_minutes': 30,
+                  'start_time': f'2030-01-07T{9 + i:02d}:00:00Z'} for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.client.post(reverse('lesson-requests-bulk'), items, format='json').data['results']
+        self.authenticate(self.tutor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('lesson-requests-bulk-status'), [
+                {'id': created[0]['id'], 'status': 'accepted'}, {'id': created[1]['id'], 'status': 'pending'},
+            ], format='json')
+        self.assertEqual(Task.objects.count(), 2)
+        tasks.run_pending('w1')
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[-1].to, ['notifystudent@test.com'])
+
+    def test_recompute_totals(self):
+        lesson = LessonRequest.objects.create(
+            student=self.student, tutor=self.tutor, subject=self.subject, status='completed',
+            start_time=datetime(2030, 1, 7, 9, tzinfo=pytz.UTC), duration_minutes=60)
+        Review.objects.create(lesson_request=lesson, tutor=self.tutor, student=self.student, rating=4)
+        TutorProfile.objects.update(rating=1.5, rating_sum=9, rating_count=3, completed_lessons=7)
+        with self.captureOnCommitCallbacks(execute=True):
+            reviews.recompute_totals.enqueue(tutor_ids=[self.tutor.id])
+        tasks.run_pending('w1')
+        profile = TutorProfile.objects.get()
+        self.assertEqual((profile.rating, profile.rating_sum, profile.rating_count, profile.completed_lessons),
+                         (4.0, 4, 1, 1))
+
+    def test_recompute_totals_keeps_rating_without_reviews(self):
+        unrated = User.objects.create_user(
+            username='unratedtutor', email='unratedtutor@test.com', password='testpass123', role='tutor')
+        TutorProfile.objects.filter(user=unrated).update(rating=4.7)
+        reviews.recompute_totals()
+        profile = TutorProfile.objects.get(user=unrated)
+        self.assertEqual((profile.rating, profile.rating_count), (4.7, 0))
+
+
+class WebSocketClient:
+    """Drives piCourse.asgi's websocket route in-process."""
+
+    def __init__(self, token=None, path=realtime.PATH, use_header=True):
+        from piCourse.asgi import application
+
+        headers, query = [], b''
+        if token is not None and use_header:
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+        elif token is not None:
+            query = f'token={token}'.encode()
+        scope = {'type': 'websocket', 'path': path, 'headers': headers, 'query_string': query}
+        self.incoming, self.outgoing = asyncio.Queue(), asyncio.Queue()
+        self.task = asyncio.ensure_future(application(scope, self.incoming.get, self.outgoing.put))
+
+    async def connect(self):
+        await self.incoming.put({'type': 'websocket.connect'})
+        return (await self.next())['type']
+
+    async def next(self, timeout=2):
+        return await asyncio.wait_for(self.outgoing.get(), timeout)
+
+    async def receive_json(self):
+        return json.loads((await self.next())['text'])
+
+    async def send_json(self, data):
+        await self.incoming.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def close(self):
+        await self.incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, 2)
+
+
+class RealtimeTest(ThrottleResetMixin, APITestCase):
+    """core.realtime pushes lesson request events to the tutor's and student's sockets."""
+
+    def setUp(self):
+        super().setUp()
+        self.subject = Subject.objects.create(name='Mathematics')
+        self.tutor = User.objects.create_user(
+            username='wstutor', email='wstutor@test.com', password='testpass123', role='tutor', first_name='Ada')
+        self.tutor.tutor_profile.subjects.add(self.subject)
+        self.student = User.objects.create_user(
+            username='wsstudent', email='wsstudent@test.com', password='testpass123', role='student')
+        self.other = User.objects.create_user(
+            username='wsother', email='wsother@test.com', password='testpass123', role='student')
+
+    def token(self, user):
+        return str(ClaimsRefreshToken.for_user(user).access_token)
+
+    def write(self, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            if not changes:
+                return LessonRequest.objects.create(
+                    student=self.student, tutor=self.tutor, subject=self.subject,
+                    start_time=datetime(2030, 1, 7, 9, tzinfo=pytz.UTC), duration_minutes=60)
+            lesson = LessonRequest.objects.get()
+            for name, value in changes.items():
+                setattr(lesson, name, value)
+            lesson.save()
+            return lesson
+
+    def test_handshake_requires_valid_token(self):
+        async def scenario():
+            results = []
+            for client in (WebSocketClient(), WebSocketClient('not-a-token'),
+                           WebSocketClient(self.token(self.tutor), path='/ws/other/')):
+                results.append(await client.connect())
+                await asyncio.wait_for(client.task, 2)
+            return results
+
+        self.assertEqual(async_to_sync(scenario)(), ['websocket.close'] * 3)
+
+    def test_events_reach_tutor_and_student_only(self):
+        async def scenario():
+            tutor = WebSocketClient(self.token(self.tutor))
+            student = WebSocketClient(self.token(self.student), use_header=False)
+            other = WebSocketClient(self.token(self.other))
+            for client in (tutor, student, other):
+                self.assertEqual(await client.connect(), 'websocket.accept')
+
+            lesson = await sync_to_async(self.write)()
+            created = [await tutor.receive_json(), await student.receive_json()]
+            await sync_to_async(self.write)(status='accepted')
+            updated = await student.receive_json()
+            await other.send_json({'type': 'ping'})
+            pong = await other.receive_json()
+            for client in (tutor, student, other):
+                await client.close()
+            return lesson, created, updated, pong
+
+        lesson, created, updated, pong = async_to_sync(scenario)()
+        self.assertEqual(created[0], created[1])
+        self.assertEqual(created[0]['type'], 'lesson_request.created')
+        self.assertIsNone(created[0]['previous_status'])
+        self.assertEqual(created[0]['lesson_request']['id'], lesson.id)
+        # Liste uç noktasıyla aynı temsil
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token(self.student)}')
+        [listed] = self.client.get(reverse('lesson-requests')).json()['results']
+        self.assertEqual(created[0]['lesson_request'], {**listed, 'status': 'pending'})
+        self.assertEqual((updated['type'], updated['previous_status'], updated['lesson_request']['status']),
+                         ('lesson_request.updated', 'pending', 'accepted'))
+        self.assertEqual(pong, {'type': 'pong'})
+        self.assertFalse(realtime.get_hub())
+
+    def test_no_listeners_no_query(self):
+        with self.assertNumQueries(0):
+            realtime.publish_lesson_events([(1, None)])
+
+    def test_slow_client_is_told_to_resync(self):
+        async def scenario():
+            hub = realtime.Hub(queue_size=2)
+            subscription = hub.subscribe(self.student.id)
+            for index in range(3):
+                hub.publish([self.student.id, self.other.id], f'{{"n":{index}}}')
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+        self.assertEqual(async_to_sync(scenario)(), [realtime.RESYNC])
+
+    def test_socket_closes_when_token_expires(self):
+        token = ClaimsRefreshToken.for_user(self.tutor).access_token
+        token.set_exp(lifetime=timedelta(seconds=1))
+
+        async def scenario():
+            client = WebSocketClient(str(token))
+            await client.connect()
+            return await client.next(timeout=3)
+
+        self.assertEqual(async_to_sync(scenario)(), {'type': 'websocket.close', 'code': realtime.TOKEN_EXPIRED})
+
+    def test_sqlite_broker_fans_out_across_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, 'realtime.sqlite3')
+            config = {'BROKER': 'core.realtime.SQLiteBroker', 'LOCATION': location, 'POLL_INTERVAL': 0.05}
+            with override_settings(REALTIME=config):
+                async def scenario():
+                    client = WebSocketClient(self.token(self.tutor))
+                    await client.connect()
+                    await asyncio.sleep(0.1)
+                    # Başka bir sürecin yayını: aynı dosyaya ayrı bir broker yazar
+                    await sync_to_async(realtime.SQLiteBroker(location).publish)({self.tutor.id}, '{"type":"x"}')
+                    message = await client.receive_json()
+                    await client.close()
+                    return message
+
+                self.assertEqual(async_to_sync(scenario)(), {'type': 'x'})
+                self.assertIsNone(realtime.get_broker().poller)
+
+
+class LoadTestCommandTest(ThrottleResetMixin, TransactionTestCase):
+    """
+    loadtest seed/run/compare on a tiny dataset. The WSGI driver's threads
+    need committed rows; one client, since the shared in-memory test
+    database locks whole tables.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        metrics.registry.reset()
+        self.tmp = tempfile.mkdtemp()
+        call_command('loadtest', 'seed', '--subjects', '4', '--tutors', '12', '--students', '6',
+                     '--lessons', '60', '--batch-size', '5', stdout=io.StringIO())
+
+    def test_seed_writes_signal_maintained_state(self):
+        self.assertEqual(User.objects.filter(role='tutor').count(), 12)
+        self.assertEqual(TutorProfile.objects.count(), 12)
+        self.assertEqual(StudentProfile.objects.count(), 6)
+        self.assertEqual(TutorSearchDocument.objects.count(), 12)
+        self.assertEqual(LessonRequest.objects.filter(end_time__isnull=True).count(), 0)
+        completed = LessonRequest.objects.filter(status='completed').count()
+        self.assertEqual(sum(TutorProfile.objects.values_list('completed_lessons', flat=True)), completed)
+        name = User.objects.filter(role='tutor').values_list('first_name', flat=True).first()
+        self.assertTrue(search.get_backend().search(name, 10))
+        self.assertTrue(User.objects.get(username='load_student_0').check_password('testpass123'))
+
+    def test_run_writes_comparable_baseline(self):
+        output = os.path.join(self.tmp, 'baseline.json')
+        with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES):
+            call_command('loadtest', 'run', '--endpoints', 'tutors,lesson-requests-student,lesson-request-create',
+                         '--requests', '6', '--concurrency', '1', '--output', output, stderr=io.StringIO())
+        with open(output) as fh:
+            report = json.load(fh)
+        self.assertEqual(report['meta']['dataset']['tutors'], 12)
+        for name, row in report['endpoints'].items():
+            self.assertEqual(row['errors'], 0, name)
+            self.assertEqual(row['requests'], 6)
+            self.assertIsNotNone(row['p99_ms'])
+        self.assertEqual(report['endpoints']['lesson-requests-student']['queries_per_request'], 2.0)
+
+        call_command('loadtest', 'compare', output, output, '--max-regression', '0', stdout=io.StringIO())
+        report['endpoints']['tutors']['queries_per_request'] += 1
+        regressed = os.path.join(self.tmp, 'regressed.json')
+        with open(regressed, 'w') as fh:
+            json.dump(report, fh)
+        with self.assertRaisesMessage(CommandError, 'tutors: queries'):
+            call_command('loadtest', 'compare', output, regressed, '--max-regression', '10', stdout=io.StringIO())
+
+
+class SeedDataCommandTest(ThrottleResetMixin, TransactionTestCase):
+    """seed_data: idempotent sample data, and generated datasets independent of the worker count."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_sample_data_is_idempotent(self):
+        call_command('seed_data', stdout=io.StringIO())
+        call_command('seed_data', stdout=io.StringIO())
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(TutorProfile.objects.count(), 3)
+        self.assertEqual(StudentProfile.objects.count(), 2)
+        self.assertEqual(LessonRequest.objects.count(), 3)
+        self.assertEqual(TutorSearchDocument.objects.count(), 3)
+        self.assertTrue(User.objects.get(username='tutor1').check_password('testpass123'))
+
+    def test_generated_dataset_does_not_depend_on_workers(self):
+        def dataset(prefix):
+            rows = LessonRequest.objects.filter(student__username__startswith=prefix).order_by('id').values_list(
+                'tutor__username', 'student__username', 'start_time', 'created_at', 'status',
+            )
+            # Çalıştırmalar arasında saat dönebilir: başlangıç, oluşturma anına göre karşılaştırılır
+            return [(tutor[4:], student[4:], start - created, status) for tutor, student, start, created, status in rows]
+
+        options = ['--subjects', '3', '--tutors', '8', '--students', '5', '--lessons', '40', '--batch-size', '6']
+        call_command('seed_data', *options, '--prefix', 'one', stdout=io.StringIO())
+        call_command('seed_data', *options, '--prefix', 'two', '--workers', '2', stdout=io.StringIO())
+        one, two = dataset('one_'), dataset('two_')
+        self.assertEqual(len(one), 40)
+        self.assertEqual(one, two)
+        completed = LessonRequest.objects.filter(status='completed').count()
+        self.assertEqual(sum(TutorProfile.objects.values_list('completed_lessons', flat=True)), completed)
+        with self.assertRaises(CommandError):
+            call_command('seed_data', *options, '--prefix', 'one', stdout=io.StringIO())
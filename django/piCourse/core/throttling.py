@@ -0,0 +1,208 @@
+"""
+Rate throttles backed by a store shared between worker processes.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client in
+the Django cache and rewrites it on every check; with the default
+local-memory cache every worker process also counts separately. These
+throttles use GCRA (a token bucket expressed as a single "theoretical
+arrival time" per client): one number per key, updated with one atomic
+statement per check.
+
+Stores (settings.THROTTLE['STORE']):
+
+* ``SQLiteThrottleStore`` - a small SQLite file shared by every process on
+  the host, one UPSERT per check.
+* ``RedisThrottleStore`` - the same algorithm as a Lua script, for setups
+  that run on several hosts (selected automatically when REDIS_URL is set).
+"""
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'STORE': 'core.throttling.SQLiteThrottleStore',
+    # None: varsayılan SQLite veritabanının yanındaki "<NAME>-throttle" dosyası
+    # (testlerdeki gibi bellek içi veritabanında ':memory:')
+    'LOCATION': None,
+    # Depo hata verirse istek reddedilmez, yalnızca loglanır
+    'FAIL_OPEN': True,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_throttle_settings():
+    return {**DEFAULTS, **getattr(settings, 'THROTTLE', {})}
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = get_throttle_settings()
+                _store = import_string(config['STORE'])(config['LOCATION'])
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _store
+    if setting == 'THROTTLE':
+        _store = None
+
+
+class BaseThrottleStore:
+    def hit(self, key, now, interval, period):
+        """
+        Record one request for ``key`` if it fits, where requests are spaced
+        ``interval`` seconds apart and at most ``period`` seconds of them may
+        be outstanding. Returns ``(allowed, tat)``; ``tat`` is the key's
+        theoretical arrival time after the check.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class SQLiteThrottleStore(BaseThrottleStore):
+    SCHEMA = 'CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID'
+    # İzin verilirse tek ifadede yazılır ve yeni tat döner; reddedilirse satır dönmez
+    HIT = (
+        'INSERT INTO throttle (key, tat) VALUES (:key, :now + :interval) '
+        'ON CONFLICT (key) DO UPDATE SET tat = MAX(tat, :now) + :interval '
+        'WHERE MAX(tat, :now) + :interval - :now <= :period '
+        'RETURNING tat'
+    )
+    # Süresi geçmiş anahtarlar hiç kaydı olmayanla aynıdır; tablo sınırlı kalsın diye ara sıra silinir
+    PRUNE_PROBABILITY = 0.001
+
+    def __init__(self, location=None):
+        self.location = location or self.default_location()
+        self.local = threading.local()
+
+    @staticmethod
+    def default_location():
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            return str(settings.BASE_DIR / 'throttle.sqlite3')
+        if connection.is_in_memory_db():
+            return ':memory:'
+        return f"{connection.settings_dict['NAME']}-throttle"
+
+    def connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.location, timeout=5, isolation_level=None, check_same_thread=False)
+            if self.location != ':memory:':
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(self.SCHEMA)
+            self.local.conn = conn
+        return conn
+
+    def hit(self, key, now, interval, period):
+        conn = self.connect()
+        row = conn.execute(self.HIT, {'key': key, 'now': now, 'interval': interval, 'period': period}).fetchone()
+        if random.random() < self.PRUNE_PROBABILITY:
+            conn.execute('DELETE FROM throttle WHERE tat < ?', (now,))
+        if row is not None:
+            return True, row[0]
+        # Red yolu: bekleme süresi için mevcut tat okunur
+        row = conn.execute('SELECT tat FROM throttle WHERE key = ?', (key,)).fetchone()
+        return False, row[0] if row else now
+
+    def clear(self):
+        self.connect().execute('DELETE FROM throttle')
+
+
+class RedisThrottleStore(BaseThrottleStore):
+    SCRIPT = """
+    local now, interval, period = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or ARGV[1]), now)
+    local new_tat = tat + interval
+    if new_tat - now > period then
+        return {0, tostring(tat)}
+    end
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+    return {1, tostring(new_tat)}
+    """
+    KEY_PREFIX = 'throttle:'
+
+    def __init__(self, location=None):
+        import redis
+
+        self.client = redis.Redis.from_url(location or 'redis://localhost:6379/0')
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def hit(self, key, now, interval, period):
+        allowed, tat = self.script(keys=[self.KEY_PREFIX + key], args=[now, interval, period])
+        return bool(allowed), float(tat)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.KEY_PREFIX + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class SharedRateThrottleMixin:
+    """
+    Replaces SimpleRateThrottle's cache-backed history with one store hit.
+    ``rate``/``scope``/``get_cache_key`` keep their DRF meaning.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = time.time()
+        interval = self.duration / self.num_requests
+        try:
+            allowed, tat = get_store().hit(self.key, self.now, interval, self.duration)
+        except Exception:
+            if not get_throttle_settings()['FAIL_OPEN']:
+                raise
+            logger.warning('throttle.store_unavailable', exc_info=True, extra={'scope': self.scope})
+            return True
+
+        # Bir sonraki isteğin sığacağı ana kadar geçecek süre
+        self.wait_seconds = max(0.0, tat + interval - self.duration - self.now)
+        return allowed
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class AnonRateThrottle(SharedRateThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SharedRateThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(SharedRateThrottleMixin, throttling.ScopedRateThrottle):
+    def allow_request(self, request, view):
+        # DRF'in ScopedRateThrottle.allow_request'i ile aynı kapsam çözümü; sayım mixin'de
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -1,13 +1,24 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, metrics, views
+
+# ASGI altında (settings.ASYNC_VIEWS) okuma ağırlıklı uç noktalar async view'lardan sunulur
+catalogue = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('auth/register/', views.register, name='register'),
     path('auth/login/', views.login, name='login'),
-    path('me/', views.me, name='me'),
-    path('subjects/', views.SubjectListView.as_view(), name='subjects'),
-    path('tutors/', views.TutorListView.as_view(), name='tutors'),
-    path('tutors/<int:pk>/', views.TutorDetailView.as_view(), name='tutor-detail'),
+    path('me/', catalogue.me, name='me'),
+    path('subjects/', catalogue.SubjectListView.as_view(), name='subjects'),
+    path('tutors/', catalogue.TutorListView.as_view(), name='tutors'),
+    path('tutors/<int:pk>/', catalogue.TutorDetailView.as_view(), name='tutor-detail'),
+    path('tutors/<int:pk>/availability/', views.TutorAvailabilityView.as_view(), name='tutor-availability'),
+    path('tutors/<int:pk>/reviews/', views.TutorReviewListView.as_view(), name='tutor-reviews'),
     path('lesson-requests/', views.LessonRequestListCreateView.as_view(), name='lesson-requests'),
+    path('lesson-requests/bulk/', views.LessonRequestBulkCreateView.as_view(), name='lesson-requests-bulk'),
+    path('lesson-requests/bulk-status/', views.LessonRequestBulkStatusView.as_view(), name='lesson-requests-bulk-status'),
+    path('lesson-requests/export/', views.LessonRequestExportView.as_view(), name='lesson-requests-export'),
     path('lesson-requests/<int:pk>/', views.LessonRequestUpdateView.as_view(), name='lesson-request-update'),
+    path('lesson-requests/<int:pk>/review/', views.LessonRequestReviewView.as_view(), name='lesson-request-review'),
+    path('internal/metrics/', metrics.metrics_view, name='metrics'),
 ]
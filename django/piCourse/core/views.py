@@ -1,23 +1,38 @@
+import logging
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
 from rest_framework import generics, filters
-from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
-from .models import Subject, User, LessonRequest
+from .models import Subject, User, LessonRequest, Review
+from . import bulk, export, scheduling
+from .auth import RefreshToken, claimed_profile
+from .caching import CatalogueCacheMixin
+from .fastpath import FastListMixin
+from .pagination import KeysetPagination
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import TutorSearchFilter
+from .sparse import SparseFieldsFilter
+from .subject_index import SubjectIndexFilter
+from .throttling import AnonRateThrottle, ScopedRateThrottle
 from .serializers import (
     UserRegistrationSerializer,
     TutorProfileSerializer,
     StudentProfileSerializer, SubjectSerializer, TutorListSerializer, TutorDetailSerializer, LessonRequestSerializer,
     TokenPairSerializer, LoginRequestSerializer,
+    AvailabilityQuerySerializer, TutorAvailabilitySerializer, ReviewSerializer, LessonExportQuerySerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @extend_schema(
     request=UserRegistrationSerializer,
@@ -57,40 +72,41 @@ def login(request):
     if not identifier or not password:
         return Response({'error': 'Email/username and password required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    user = authenticate(username=identifier, password=password)
-    if not user:
-        try:
-            user_obj = User.objects.get(email=identifier)
-            user = authenticate(username=user_obj.username, password=password)
-        except User.DoesNotExist:
-            user = None
-
+    # core.auth.EmailOrUsernameBackend: tek sorgu, tek hash
+    user = authenticate(request, username=identifier, password=password)
     if user:
         refresh = RefreshToken.for_user(user)
         return Response({'access': str(refresh.access_token), 'refresh': str(refresh)})
     return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+def me_payload(user):
+    data = {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'role': user.role,
+    }
+    if user.role == 'tutor' and hasattr(user, 'tutor_profile'):
+        tutor_data = TutorProfileSerializer(user.tutor_profile).data
+        data['profile'] = tutor_data
+    elif user.role == 'student' and hasattr(user, 'student_profile'):
+        student_data = StudentProfileSerializer(user.student_profile).data
+        data['profile'] = student_data
+    return data
+
+
 @api_view(['GET', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def me(request):
     user = request.user
 
     if request.method == 'GET':
-        data = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'role': user.role,
-        }
-        if user.role == 'tutor' and hasattr(user, 'tutor_profile'):
-            tutor_data = TutorProfileSerializer(user.tutor_profile).data
-            data['profile'] = tutor_data
-        elif user.role == 'student' and hasattr(user, 'student_profile'):
-            student_data = StudentProfileSerializer(user.student_profile).data
-            data['profile'] = student_data
-
-        return Response(data)
+        # Claim'li token'da profil ve kullanıcı satırı tek sorguda okunur
+        profile = claimed_profile(user)
+        if profile is not None:
+            user = profile.user
+        return Response(me_payload(user))
 
 
 
@@ -98,15 +114,15 @@ def me(request):
 
         if user.role == 'tutor':
 
-            # User bilgilerini güncelle
+            # User bilgilerini güncelle: yalnızca gönderilen alanlar yazılır
+            # (diğer sütunlar, ör. token kullanıcısının ertelenmiş alanları, okunmaz da yazılmaz da)
 
-            if 'first_name' in request.data:
-                user.first_name = request.data['first_name']
+            user_fields = [name for name in ('first_name', 'last_name') if name in request.data]
+            for name in user_fields:
+                setattr(user, name, request.data[name])
 
-            if 'last_name' in request.data:
-                user.last_name = request.data['last_name']
-
-            user.save()
+            if user_fields:
+                user.save(update_fields=user_fields)
 
             # Tutor profil bilgilerini güncelle
 
@@ -162,32 +178,47 @@ def me(request):
         return Response({'error': 'Profile not found'}, status=400)
 
 
-class SubjectListView(generics.ListAPIView):
+class SubjectListView(CatalogueCacheMixin, generics.ListAPIView):
+    cache_namespaces = ('subjects',)
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
     permission_classes = []
 
 
-class TutorListView(generics.ListAPIView):
+class TutorListView(CatalogueCacheMixin, FastListMixin, generics.ListAPIView):
+    cache_namespaces = ('tutors', 'subjects')
     serializer_class = TutorListSerializer
     permission_classes = []
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['tutor_profile__subjects']
-    search_fields = ['first_name', 'last_name', 'tutor_profile__bio']
-    ordering_fields = ['tutor_profile__rating']
+    # Arama core.search üzerinden; sıralama verilmezse sonuçlar alaka düzeyine göre sıralanır.
+    # Konu filtreleri TutorProfile.subject_mask üzerinde çözülür (core.subject_index): JOIN/DISTINCT yok
+    filter_backends = [SubjectIndexFilter, filters.OrderingFilter, TutorSearchFilter, SparseFieldsFilter]
+    ordering_fields = ['tutor_profile__rating', 'tutor_profile__rating_count', 'tutor_profile__completed_lessons']
     ordering = ['-tutor_profile__rating']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-tutor_profile__rating', '-tutor_profile__user_id')
 
     def get_queryset(self):
         queryset = User.objects.filter(role='tutor').select_related('tutor_profile').prefetch_related(
             'tutor_profile__subjects')
 
-        subject_id = self.request.query_params.get('subject')
-        if subject_id:
-            queryset = queryset.filter(tutor_profile__subjects=subject_id)
+        # Sayaçlar TutorProfile sütunlarında tutulur (core.reviews): filtreler indeksli aralık taramasıdır
+        params = self.request.query_params
+        try:
+            if params.get('min_rating'):
+                queryset = queryset.filter(tutor_profile__rating__gte=float(params['min_rating']))
+            if params.get('min_reviews'):
+                queryset = queryset.filter(tutor_profile__rating_count__gte=int(params['min_reviews']))
+            if params.get('min_price'):
+                queryset = queryset.filter(tutor_profile__hourly_rate__gte=Decimal(params['min_price']))
+            if params.get('max_price'):
+                queryset = queryset.filter(tutor_profile__hourly_rate__lte=Decimal(params['max_price']))
+        except (ValueError, InvalidOperation):
+            raise ValidationError({'error': 'min_rating, min_reviews, min_price and max_price must be numbers'})
         return queryset
 
 
-class TutorDetailView(generics.RetrieveAPIView):
+class TutorDetailView(CatalogueCacheMixin, generics.RetrieveAPIView):
+    cache_namespaces = ('tutors', 'subjects')
     serializer_class = TutorDetailSerializer
     permission_classes = []
 
@@ -195,11 +226,34 @@ class TutorDetailView(generics.RetrieveAPIView):
         return User.objects.filter(role='tutor').select_related('tutor_profile')
 
 
-class LessonRequestListCreateView(generics.ListCreateAPIView):
+class TutorAvailabilityView(generics.GenericAPIView):
+    serializer_class = TutorAvailabilitySerializer
+    permission_classes = []
+
+    def get_queryset(self):
+        return User.objects.filter(role='tutor')
+
+    @extend_schema(parameters=[AvailabilityQuerySerializer], responses={200: TutorAvailabilitySerializer})
+    def get(self, request, pk):
+        params = AvailabilityQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        if not self.get_queryset().filter(pk=pk).exists():
+            return Response({'error': 'Tutor not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        start, end = params.validated_data['start'], params.validated_data['end']
+        slots = scheduling.free_slots(pk, start, end, params.validated_data['min_minutes'])
+        serializer = self.get_serializer({'tutor': pk, 'start': start, 'end': end, 'slots': slots})
+        return Response(serializer.data)
+
+
+class LessonRequestListCreateView(FastListMixin, generics.ListCreateAPIView):
     serializer_class = LessonRequestSerializer
     permission_classes = [IsAuthenticated]
     throttle_classes = [ScopedRateThrottle]  
     throttle_scope = 'lesson_request'
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         user = self.request.user
@@ -207,9 +261,9 @@ class LessonRequestListCreateView(generics.ListCreateAPIView):
         status_filter = self.request.query_params.get('status')
 
         if role == 'student':
-            qs = LessonRequest.objects.filter(student=user)
+            qs = LessonRequest.objects.with_names().filter(student=user)
         else:
-            qs = LessonRequest.objects.filter(tutor=user)
+            qs = LessonRequest.objects.with_names().filter(tutor=user)
 
         if status_filter:
             qs = qs.filter(status=status_filter)
@@ -217,71 +271,150 @@ class LessonRequestListCreateView(generics.ListCreateAPIView):
         return qs
 
     def create(self, request, *args, **kwargs):
-        print("=== CREATE METHOD CALLED ===")
-        print(f"Request data: {request.data}")
-        print(f"User: {request.user}")
-        print(f"User role: {request.user.role}")
-
         if request.user.role != 'student':
             return Response({'error': 'Only students can create requests'},
                             status=status.HTTP_403_FORBIDDEN)
 
-        # Veriyi kopyala ve düzenle
-        data = request.data.copy()
-
-        # Öğrenciyi otomatik ata
-        data['student'] = request.user.id
-
-        # Frontend'den gelen 'tutor' field'ını kontrol et
-        if 'tutor' in data:
-            try:
-                tutor = User.objects.get(id=data['tutor'], role='tutor')
-                data['tutor'] = tutor.id
-            except User.DoesNotExist:
-                return Response({'error': 'Tutor not found'},
-                                status=status.HTTP_400_BAD_REQUEST)
-
-        # Frontend'den gelen 'subject' field'ını kontrol et
-        if 'subject' in data:
-            try:
-                subject = Subject.objects.get(id=data['subject'])
-                data['subject'] = subject.id
-            except Subject.DoesNotExist:
-                return Response({'error': 'Subject not found'},
-                                status=status.HTTP_400_BAD_REQUEST)
-
-        print(f"Modified data: {data}")
-
-        serializer = self.get_serializer(data=data)
-        print(f"Serializer validation: {serializer.is_valid()}")
-
+        # Eğitmen, rol ve konu kontrolü serializer'da tek sorguda yapılır
+        serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
-            print(f"Serializer errors: {serializer.errors}")
+            logger.info('lesson_request.invalid', extra={
+                'user_id': request.user.id, 'errors': serializer.errors,
+            })
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            serializer.save()
+            # Öğrenciyi otomatik ata
+            serializer.save(student=request.user)
             headers = self.get_success_headers(serializer.data)
+            logger.debug('lesson_request.created', extra={
+                'user_id': request.user.id, 'lesson_request_id': serializer.instance.id,
+            })
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        except scheduling.BookingConflict:
+            raise
         except Exception as e:
-            print(f"Exception during save: {e}")
-            print(f"Exception type: {type(e)}")
+            logger.exception('lesson_request.save_failed', extra={'user_id': request.user.id})
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class LessonRequestExportView(generics.GenericAPIView):
+    """
+    The user's whole lesson history as NDJSON (default) or CSV
+    (``?format=csv`` or ``Accept: text/csv``), streamed in chunks.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'lesson_export'
+
+    @extend_schema(parameters=[LessonExportQuerySerializer], responses={
+        (200, NDJSONRenderer.media_type): OpenApiTypes.STR,
+        (200, CSVRenderer.media_type): OpenApiTypes.STR,
+    })
+    def get(self, request):
+        params = LessonExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = export.lesson_history(request.user, **params.validated_data)
+        return export.streaming_response(queryset, request.accepted_renderer, request=request)
+
+
 class LessonRequestUpdateView(generics.UpdateAPIView):
-    queryset = LessonRequest.objects.all()
+    queryset = LessonRequest.objects.with_names()
     serializer_class = LessonRequestSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ['patch']
 
     def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
         lesson_request = self.get_object()
 
-        if request.user != lesson_request.tutor:
+        if request.user.id != lesson_request.tutor_id:
             return Response({'error': 'Only tutor can update'}, status=403)
 
         if 'status' not in request.data:
             return Response({'error': 'Only status can be updated'}, status=400)
 
-        return super().update(request, *args, **kwargs)
+        # super().update() get_object()'i ikinci kez çağırırdı; aynı nesneyle devam et
+        serializer = self.get_serializer(lesson_request, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+
+class LessonRequestReviewView(generics.GenericAPIView):
+    serializer_class = ReviewSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'lesson_request'
+
+    def get_queryset(self):
+        return LessonRequest.objects.only('id', 'tutor_id', 'student_id', 'status')
+
+    @extend_schema(responses={201: ReviewSerializer})
+    def post(self, request, pk):
+        lesson_request = self.get_object()
+
+        if request.user.id != lesson_request.student_id:
+            return Response({'error': 'Only the student of the lesson can review it'},
+                            status=status.HTTP_403_FORBIDDEN)
+        if lesson_request.status != 'completed':
+            return Response({'error': 'Only completed lessons can be reviewed'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # Değerlendirme ve eğitmen toplamları (core.signals -> core.reviews) birlikte yazılır
+            with transaction.atomic():
+                serializer.save(lesson_request=lesson_request, tutor_id=lesson_request.tutor_id,
+                                student_id=request.user.id)
+        except IntegrityError:
+            return Response({'error': 'This lesson has already been reviewed'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class TutorReviewListView(generics.ListAPIView):
+    queryset = Review.objects.all()
+    serializer_class = ReviewSerializer
+    permission_classes = []
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        return self.queryset.filter(tutor_id=self.kwargs['pk']).select_related('student').only(
+            'id', 'lesson_request_id', 'tutor_id', 'student', 'rating', 'comment', 'created_at',
+            'student__username', 'student__first_name', 'student__last_name',
+        ).order_by('-created_at', '-id')
+
+
+class LessonRequestBulkCreateView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'lesson_request'
+    serializer_class = bulk.BulkCreateItemSerializer
+
+    @extend_schema(request=bulk.BulkCreateItemSerializer(many=True), responses={200: OpenApiResponse(
+        description='One result per item: {index, ok, id} or {index, ok, errors}'
+    )})
+    def post(self, request):
+        if request.user.role != 'student':
+            return Response({'error': 'Only students can create requests'},
+                            status=status.HTTP_403_FORBIDDEN)
+        results = bulk.bulk_create_lesson_requests(request.user, request.data)
+        return Response({'results': results})
+
+
+class LessonRequestBulkStatusView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = bulk.BulkStatusItemSerializer
+
+    @extend_schema(request=bulk.BulkStatusItemSerializer(many=True), responses={200: OpenApiResponse(
+        description='One result per item: {index, ok, id, status} or {index, ok, errors}'
+    )})
+    def patch(self, request):
+        if request.user.role != 'tutor':
+            return Response({'error': 'Only tutor can update'}, status=status.HTTP_403_FORBIDDEN)
+        results = bulk.bulk_update_status(request.user, request.data)
+        return Response({'results': results})
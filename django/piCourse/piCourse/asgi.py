@@ -12,5 +12,17 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'piCourse.settings')
+# Katalog uç noktaları ve me GET için async view'lar (core.async_views) PICOURSE_ASYNC_VIEWS=1 ile açılır;
+# ölçümlerde WSGI'daki sync view'lardan hâlâ yavaş oldukları için varsayılan kapalı
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Django kurulduktan sonra: core.realtime modelleri içe aktarır
+from core.realtime import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Ders talebi olayları /ws/lesson-requests/ üzerinden itilir (core.realtime)
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,25 +29,53 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['*']
 
-# settings.py
+# Logging (core.log)
+# Kayıtlar istek thread'inde yalnızca kuyruğa atılır; stdout'a yazma arka plan thread'inde yapılır.
+# LOG_SAMPLE_RATE: WARNING altındaki kayıtların tutulacağı isteklerin oranı (0.0-1.0).
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+# manage.py test altında varsayılan seviyeler yükseltilir (throttle deposunun bellek içi veritabanında
+# ':memory:' kullanması gibi); testlerin beklenen 4xx ve bilgi kayıtları stderr'i doldurmaz.
+# CORE_LOG_LEVEL / DJANGO_REQUEST_LOG_LEVEL verilirse her zaman onlar geçerlidir.
+TESTING = sys.argv[1:2] == ['test']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'core.log.RequestContextFilter',
+            'always_level': 'WARNING',
+        },
+    },
     'handlers': {
         'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
+            'class': 'core.log.QueueStreamHandler',
+            'formatter': 'json',
+            'filters': ['request_context'],
         },
     },
     'loggers': {
         'django.request': {
             'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
+            'level': os.environ.get('DJANGO_REQUEST_LOG_LEVEL', 'ERROR' if TESTING else 'WARNING'),
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('CORE_LOG_LEVEL', 'WARNING' if TESTING else 'INFO'),
+            'propagate': False,
         },
     },
 }
 
+# Prometheus metrics (core.metrics): /api/internal/metrics/ yalnızca bu adreslerden erişilebilir
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -64,6 +94,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # En üstte olmalı
+    'core.log.RequestIDMiddleware',
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -101,9 +133,35 @@ WSGI_APPLICATION = 'piCourse.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # Yük testi veri setleri ayrı bir dosyada tutulabilir (core.seeding / loadtest)
+        'NAME': os.environ.get('DATABASE_PATH') or BASE_DIR / 'db.sqlite3',
+        # İşlemler DEFERRED başlar; yalnızca rezervasyon ve görev kiralama gibi önce okuyup sonra
+        # yazan yollar yazma kilidini baştan alır (core.locking)
+    }
+}
+
+
+# Cache
+# Varsayılan: süreç içi local-memory. REDIS_URL verilirse (ör. redis://localhost:6379/0)
+# Django'nun yerleşik RedisCache backend'i kullanılır ('redis' paketi gerekir).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'picourse',
     }
 }
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Catalogue response cache (core.caching)
+CATALOGUE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
 
 
 # Password validation
@@ -124,6 +182,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Login: username veya email ile tek sorguda kimlik doğrulama (core.auth)
+AUTHENTICATION_BACKENDS = ['core.auth.EmailOrUsernameBackend']
+
+PASSWORD_HASHERS = [
+    'core.auth.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASHING = {
+    'ITERATIONS': int(os.environ['PASSWORD_HASH_ITERATIONS']) if os.environ.get('PASSWORD_HASH_ITERATIONS') else None,
+    'UPGRADE': os.environ.get('PASSWORD_HASH_UPGRADE', 'on_login'),  # 'on_login' | 'never'
+}
+
 # Geliştirme İçin
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -152,11 +226,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # role/profile_id claim'li token'larda kullanıcı sorgusu yapılmaz (core.auth)
+        'core.auth.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON orjson ile (core.renderers); çıktı DRF'in JSONRenderer'ı ile bayt bayt aynıdır
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
@@ -164,20 +249,58 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        # ?fields= / ?expand=: kullanılmayan sütunlar ve ilişkiler sorgudan da çıkarılır
+        'core.sparse.SparseFieldsFilter',
     ],
+    # Sayaçlar süreçler arası ortak depoda tutulur (core.throttling, settings.THROTTLE)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.ScopedRateThrottle',
+        'core.throttling.AnonRateThrottle',
+        'core.throttling.UserRateThrottle',
+        'core.throttling.ScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',        # Anonim kullanıcılar: 100 istek/saat
         'user': '1000/hour',       # Giriş yapmış kullanıcılar: 1000 istek/saat
         'lesson_request': '1000/hour',  # Ders talebi: 10 istek/saat (özel limit)
         'auth': '20/hour',         # Login/Register: 20 istek/saat
+        'lesson_export': '60/hour',  # Ders geçmişi dışa aktarımı: 60 istek/saat
     },
 }
 
+# Throttle deposu (core.throttling): tek sunucuda SQLite dosyası, REDIS_URL varsa Redis
+THROTTLE = {
+    'STORE': 'core.throttling.SQLiteThrottleStore',
+    'LOCATION': os.environ.get('THROTTLE_DB'),
+}
+if os.environ.get('REDIS_URL'):
+    THROTTLE = {
+        'STORE': 'core.throttling.RedisThrottleStore',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Arka plan görevleri (core.tasks): kuyruk veritabanında, işçi `manage.py run_tasks`
+TASKS = {
+    # İşçi olmadan geliştirme: görevler commit sonrası aynı süreçte çalışır
+    'EAGER': os.environ.get('TASKS_EAGER') == '1',
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 10,  # saniye; her denemede iki katı
+}
+
+# WebSocket olayları (core.realtime): tek ASGI sürecinde LocalBroker; aynı sunucuda birden çok
+# süreç soket sunuyorsa REALTIME_BROKER=core.realtime.SQLiteBroker
+REALTIME = {
+    'BROKER': os.environ.get('REALTIME_BROKER', 'core.realtime.LocalBroker'),
+    'QUEUE_SIZE': 100,
+}
+
+# E-posta (core.notifications): EMAIL_HOST verilmezse konsola yazılır
+EMAIL_BACKEND = (
+    'django.core.mail.backends.smtp.EmailBackend' if os.environ.get('EMAIL_HOST')
+    else 'django.core.mail.backends.console.EmailBackend'
+)
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'PiCourse <noreply@picourse.local>')
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -208,5 +331,13 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Katalog ve me GET için async view'lar (core.async_views); ASGI altında da varsayılan kapalı
+ASYNC_VIEWS = os.environ.get('PICOURSE_ASYNC_VIEWS') == '1'
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
+
+# Tutor search (core.search)
+TUTOR_SEARCH = {
+    'BACKEND': None,  # None: SQLite'ta FTS5; başka bir veritabanında 'core.search.DatabaseSearchBackend'
+}
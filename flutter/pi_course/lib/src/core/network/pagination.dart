@@ -2,10 +2,26 @@ class PaginatedResponse<T> {
   const PaginatedResponse({
     required this.count,
     required this.results,
+    this.next,
+    this.previous,
   });
 
-  final int count;
+  /// `?pagination=cursor` modunda backend `count` döndürmez.
+  final int? count;
   final List<T> results;
-}
+  final String? next;
+  final String? previous;
+
+  bool get hasNext => next != null;
 
+  /// `next` linkindeki opak `cursor` parametresi; bir sonraki istekte
+  /// `queryParameters: {'cursor': nextCursor}` olarak gönderilir.
+  String? get nextCursor => _cursorOf(next);
 
+  String? get previousCursor => _cursorOf(previous);
+
+  static String? _cursorOf(String? url) {
+    if (url == null) return null;
+    return Uri.parse(url).queryParameters['cursor'];
+  }
+}
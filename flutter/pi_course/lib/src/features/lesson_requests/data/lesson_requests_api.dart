@@ -4,12 +4,13 @@ class LessonRequestsApi {
   LessonRequestsApi(this._apiClient);
   final ApiClient _apiClient;
 
-  Future<Map<String, dynamic>> list({String? role, String? status}) async {
+  Future<Map<String, dynamic>> list({String? role, String? status, String? cursor}) async {
     final res = await _apiClient.client.get(
       '/api/lesson-requests/', // Zaten trailing slash var
       queryParameters: {
         if (role != null) 'role': role,
         if (status != null) 'status': status,
+        if (cursor != null) 'cursor': cursor,
       },
     );
     return res.data as Map<String, dynamic>;
@@ -16,14 +16,19 @@ class LessonRequestsRepository {
   LessonRequestsRepository(this.api);
   final LessonRequestsApi api;
 
-  Future<PaginatedResponse<LessonRequestModel>> list({String? role, String? status}) async {
-    final json = await api.list(role: role, status: status);
-    final count = json['count'] as int;
+  Future<PaginatedResponse<LessonRequestModel>> list({String? role, String? status, String? cursor}) async {
+    final json = await api.list(role: role, status: status, cursor: cursor);
+    final count = json['count'] as int?;
     final results = (json['results'] as List)
         .cast<Map<String, dynamic>>()
         .map(LessonRequestModel.fromJson)
         .toList();
-    return PaginatedResponse(count: count, results: results);
+    return PaginatedResponse(
+      count: count,
+      results: results,
+      next: json['next'] as String?,
+      previous: json['previous'] as String?,
+    );
   }
 
   Future<LessonRequestModel> create({
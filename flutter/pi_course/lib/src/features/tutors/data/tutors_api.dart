@@ -10,6 +10,7 @@ class TutorsApi {
     String? search,
     int? limit,
     int? offset,
+    String? cursor,
   }) async {
     final res = await _apiClient.client.get('/api/tutors', queryParameters: {
       if (subjectId != null) 'subject': subjectId,
@@ -17,6 +18,7 @@ class TutorsApi {
       if (search != null) 'search': search,
       if (limit != null) 'limit': limit,
       if (offset != null) 'offset': offset,
+      if (cursor != null) 'cursor': cursor,
     });
     return res.data as Map<String, dynamic>;
   }
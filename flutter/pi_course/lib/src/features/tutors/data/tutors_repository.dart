@@ -22,6 +22,7 @@ class TutorsRepository {
     String? search,
     int? limit,
     int? offset,
+    String? cursor,
   }) async {
     final json = await api.listTutors(
       subjectId: subjectId,
@@ -29,13 +30,19 @@ class TutorsRepository {
       search: search,
       limit: limit,
       offset: offset,
+      cursor: cursor,
     );
-    final count = json['count'] as int;
+    final count = json['count'] as int?;
     final results = (json['results'] as List)
         .cast<Map<String, dynamic>>()
         .map(TutorModel.fromJson)
         .toList();
-    return PaginatedResponse(count: count, results: results);
+    return PaginatedResponse(
+      count: count,
+      results: results,
+      next: json['next'] as String?,
+      previous: json['previous'] as String?,
+    );
   }
 
   Future<TutorModel> get(int id) async {